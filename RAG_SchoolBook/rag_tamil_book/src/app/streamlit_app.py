@@ -72,7 +72,7 @@ with tab2:
         else:
             from rag.retriever import retrieve
             with st.spinner("Searching..."):
-                hits = retrieve(q, top_k=8)
+                hits = retrieve(q, top_k=8, mode="hybrid")
             st.write("Top results:")
             for h in hits:
                 st.markdown(f"**Page {h['page']}** — {h['content'][:300]}...")
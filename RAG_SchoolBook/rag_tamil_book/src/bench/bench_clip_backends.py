@@ -0,0 +1,147 @@
+# bench/bench_clip_backends.py
+"""
+CLIP backends compared: sentence-transformers float model ("torch") vs the
+exported int8 ONNX model ("onnx", embeddings.onnx_clip).
+
+- cold start: fresh subprocess per backend, import + load + first embedding,
+  with peak RSS
+- throughput: texts/s and images/s at the configured batch size
+- agreement: cosine between the two backends' vectors per item, and how
+  often text→image and text→text top-1 retrieval picks the same item
+
+    cd src
+    python -m embeddings.onnx_clip export --out models/clip-vit-b-32-int8   # once
+    python -m bench.bench_clip_backends --texts 256 --images 128
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import numpy as np
+
+from bench.bench_ingest import SRC_DIR, RESULT_PREFIX, peak_rss_mb
+from bench.synthetic_pdf import SENTENCES, _figure
+from embeddings.onnx_clip import ONNX_CLIP_DIR
+from embeddings.unified_embedder import UNIFIED_BATCH_SIZE, load_unified_embedder
+
+BACKENDS = ("torch", "onnx")
+
+
+def backend_kwargs(backend, args):
+    kwargs = {"batch_size": args.batch_size}
+    if backend == "onnx":
+        kwargs["model_dir"] = args.onnx_dir
+    else:
+        kwargs["model_name"] = args.model
+    return kwargs
+
+
+def run_cold_child(args):
+    t0 = time.perf_counter()
+    embedder = load_unified_embedder(args.cold_child, **backend_kwargs(args.cold_child, args))
+    loaded = time.perf_counter() - t0
+    embedder.embed_text(SENTENCES[0])
+    first = time.perf_counter() - t0
+    print(RESULT_PREFIX + json.dumps({"load_s": round(loaded, 3), "first_embedding_s": round(first, 3),
+                                      "peak_rss_mb": peak_rss_mb()}))
+
+
+def cold_start(backend, args):
+    cmd = [sys.executable, "-m", "bench.bench_clip_backends", "--cold-child", backend,
+           "--onnx-dir", args.onnx_dir, "--model", args.model, "--batch-size", str(args.batch_size)]
+    proc = subprocess.run(cmd, cwd=SRC_DIR, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no result")
+
+
+def sample_inputs(n_texts, n_images, seed=0):
+    rng = random.Random(seed)
+    texts = [" ".join(rng.sample(SENTENCES, rng.randint(1, 3))) for _ in range(n_texts)]
+    images = [_figure(rng) for _ in range(n_images)]
+    return texts, images
+
+
+def throughput(embedder, texts, images):
+    t0 = time.perf_counter()
+    text_vecs = np.asarray(embedder.embed_texts(texts))
+    t1 = time.perf_counter()
+    image_vecs = np.asarray(embedder.embed_images(images))
+    t2 = time.perf_counter()
+    return {"texts_per_s": round(len(texts) / (t1 - t0), 1), "images_per_s": round(len(images) / (t2 - t1), 1)}, \
+        text_vecs, image_vecs
+
+
+def agreement(ref, other):
+    """Per-item cosine and top-1 retrieval agreement between two backends (normalized vectors)."""
+    (ref_t, ref_i), (oth_t, oth_i) = ref, other
+    cos = np.concatenate([(ref_t * oth_t).sum(1), (ref_i * oth_i).sum(1)])
+
+    def top1_same(q_ref, c_ref, q_oth, c_oth, exclude_self=False):
+        s_ref, s_oth = q_ref @ c_ref.T, q_oth @ c_oth.T
+        if exclude_self:
+            np.fill_diagonal(s_ref, -np.inf)
+            np.fill_diagonal(s_oth, -np.inf)
+        return float((s_ref.argmax(1) == s_oth.argmax(1)).mean())
+
+    return {
+        "cosine_mean": round(float(cos.mean()), 4),
+        "cosine_min": round(float(cos.min()), 4),
+        "text_to_image_top1": round(top1_same(ref_t, ref_i, oth_t, oth_i), 4),
+        "text_to_text_top1": round(top1_same(ref_t, ref_t, oth_t, oth_t, exclude_self=True), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the torch and int8 ONNX CLIP backends")
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--images", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=UNIFIED_BATCH_SIZE)
+    parser.add_argument("--onnx-dir", default=ONNX_CLIP_DIR)
+    parser.add_argument("--model", default="clip-ViT-B-32", help="sentence-transformers model for the torch backend")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--cold-child", choices=BACKENDS, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_child:
+        run_cold_child(args)
+        return
+
+    texts, images = sample_inputs(args.texts, args.images)
+    results, vectors = {}, {}
+    print(f"{args.texts} texts, {args.images} images, batch size {args.batch_size}")
+    print(f"{'backend':<8} {'load s':>7} {'first s':>8} {'RSS MB':>7} {'texts/s':>8} {'images/s':>9}")
+    for backend in BACKENDS:
+        try:
+            cold = cold_start(backend, args)
+            embedder = load_unified_embedder(backend, **backend_kwargs(backend, args))
+        except (ImportError, RuntimeError) as e:
+            print(f"{backend:<8} unavailable: {e}")
+            continue
+        embedder.embed_texts(texts[:2])   # warm-up
+        speed, text_vecs, image_vecs = throughput(embedder, texts, images)
+        embedder.close()
+        results[backend] = {**cold, **speed}
+        vectors[backend] = (text_vecs, image_vecs)
+        rss = f"{cold['peak_rss_mb']:.0f}" if cold["peak_rss_mb"] is not None else "-"
+        print(f"{backend:<8} {cold['load_s']:>7.2f} {cold['first_embedding_s']:>8.2f} {rss:>7} "
+              f"{speed['texts_per_s']:>8.1f} {speed['images_per_s']:>9.1f}")
+
+    if len(vectors) == len(BACKENDS):
+        results["agreement"] = agreement(vectors["torch"], vectors["onnx"])
+        a = results["agreement"]
+        print(f"Agreement onnx vs torch: cosine mean {a['cosine_mean']:.4f} (min {a['cosine_min']:.4f}), "
+              f"top-1 text→image {a['text_to_image_top1']:.1%}, text→text {a['text_to_text_top1']:.1%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "cold_child"}, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
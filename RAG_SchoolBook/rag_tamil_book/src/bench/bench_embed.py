@@ -0,0 +1,74 @@
+# bench/bench_embed.py
+"""
+Embedding concurrency benchmark against the local stub embeddings server:
+sequential embed_texts vs aembed_texts at several concurrency levels.
+
+    cd src
+    python -m bench.bench_embed --texts 512 --batch-size 32 --latency 0.25 --concurrency 1 2 4 8 16
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+from bench.stub_embed_server import start_stub_server
+
+# embedder refuses to import without a key; the stub ignores it
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from openai import OpenAI, AsyncOpenAI
+from ingest import embedder
+from ingest.embed_scheduler import EmbeddingScheduler
+
+
+def unlimited_scheduler(batch_size):
+    # no RPM/TPM pacing: measure request overlap only
+    return EmbeddingScheduler(rpm=0, tpm=0, max_inputs=batch_size)
+
+
+def run_sync(base_url, texts, batch_size):
+    embedder.client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+    t0 = time.perf_counter()
+    vectors = embedder.embed_texts(texts, cache=None, scheduler=unlimited_scheduler(batch_size))
+    return time.perf_counter() - t0, vectors
+
+
+async def run_async(base_url, texts, batch_size, concurrency):
+    aclient = AsyncOpenAI(api_key="stub", base_url=base_url, max_retries=0)
+    try:
+        t0 = time.perf_counter()
+        vectors = await embedder.aembed_texts(texts, cache=None, scheduler=unlimited_scheduler(batch_size),
+                                              concurrency=concurrency, batch_size=batch_size, aclient=aclient)
+        return time.perf_counter() - t0, vectors
+    finally:
+        await aclient.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding request concurrency")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32, help="inputs per request")
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    texts = [f"பாடம் {i}: " + "தமிழ் " * (i % 7 + 1) for i in range(args.texts)]
+    requests = -(-args.texts // args.batch_size)
+
+    print(f"{args.texts} texts, {requests} requests of <= {args.batch_size}, stub latency {args.latency}s")
+    print(f"{'mode':>12} {'seconds':>8} {'texts/s':>8} {'speedup':>8} {'ordered':>7}")
+    baseline, expected = run_sync(base_url, texts, args.batch_size)
+    print(f"{'sequential':>12} {baseline:>8.2f} {args.texts / baseline:>8.1f} {1.0:>7.1f}x {'yes':>7}")
+    for n in args.concurrency:
+        elapsed, vectors = asyncio.run(run_async(base_url, texts, args.batch_size, n))
+        ordered = "yes" if vectors == expected else "NO"
+        print(f"{'async x' + str(n):>12} {elapsed:>8.2f} {args.texts / elapsed:>8.1f} "
+              f"{baseline / elapsed:>7.1f}x {ordered:>7}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# bench/bench_ingest.py
+"""
+End-to-end ingest benchmark, fully offline and repeatable.
+
+Generates synthetic Tamil PDFs (bench.synthetic_pdf), starts the stub OCR
+and embeddings servers, and runs the real ingest_to_pgvector.main() once per
+(PDF kind, worker count) in a fresh subprocess, with Postgres and Neo4j
+replaced by bench.stub_stores. Reports pages/s, chunks/s and peak RSS (main
+process and extraction workers), plus the stub request counts.
+
+    cd src
+    python -m bench.bench_ingest --pages 40 --workers 1 4
+    python -m bench.bench_ingest --kinds scanned --ocr-latency 0.5 --json /tmp/bench.json
+
+Caches are off and each run starts cold, so results compare across commits.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+from bench.synthetic_pdf import KINDS, make_pdf
+from bench import stub_ocr_server, stub_embed_server
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MB of this process (or its reaped children); None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        if children:
+            return None
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2 ** 20
+        except (ImportError, AttributeError):
+            return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+
+def run_child(args):
+    """One ingest run inside this (fresh) process; prints a BENCH_RESULT line."""
+    from bench.stub_stores import install
+    pg, graph = install(latency=args.db_latency)
+
+    import ingest_to_pgvector
+    from ingest.pdf_ingest import count_pages
+    from ingest.profiling import profiler
+
+    argv = ["--pdf", args.child, "--workers", str(args.workers[0]),
+            "--manifest", os.path.join(args.run_dir, "manifest.json"),
+            "--checkpoint", os.path.join(args.run_dir, "checkpoint.json"),
+            "--profile-dir", args.run_dir]
+    if args.bulk_load:
+        argv.append("--bulk-load")
+
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    with redirect_stdout(log):
+        ingest_to_pgvector.main(argv)
+    elapsed = time.perf_counter() - t0
+
+    stages = profiler.report()["stages"]
+    result = {
+        "pages": count_pages(args.child),
+        "chunks": stages.get("pg.copy", {}).get("items", 0),
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "workers_peak_rss_mb": peak_rss_mb(children=True) if args.workers[0] > 1 else None,
+        "pg_copy_mb": round(pg.copy_bytes / 1e6, 2),
+        "neo4j_rows": graph.rows,
+        "stages": stages,
+    }
+    with open(os.path.join(args.run_dir, "ingest.log"), "w", encoding="utf-8") as f:
+        f.write(log.getvalue())
+    print(RESULT_PREFIX + json.dumps(result))
+
+
+def run_once(pdf_path, workers, args, env, run_dir):
+    cmd = [sys.executable, "-m", "bench.bench_ingest", "--child", pdf_path, "--workers", str(workers),
+           "--db-latency", str(args.db_latency), "--run-dir", run_dir]
+    if args.bulk_load:
+        cmd.append("--bulk-load")
+    proc = subprocess.run(cmd, cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"benchmark run failed for {pdf_path} (workers={workers}):\n{proc.stderr[-2000:]}")
+
+
+def _mb(value):
+    return f"{value:.0f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end ingest benchmark")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--ocr-latency", type=float, default=0.3, help="stub OCR seconds per request")
+    parser.add_argument("--embed-latency", type=float, default=0.2, help="stub embeddings seconds per request")
+    parser.add_argument("--db-latency", type=float, default=0.01, help="Postgres/Neo4j stand-in seconds per round-trip")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    parser.add_argument("--bulk-load", action="store_true", help="pass --bulk-load to the ingest")
+    parser.add_argument("--out", default=None, help="directory for PDFs, logs and profiles (default: temp dir)")
+    parser.add_argument("--json", default=None, help="also write all results to this file")
+    # internal: a single run in a child process
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--run-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    out = args.out or tempfile.mkdtemp(prefix="bench_ingest_")
+    os.makedirs(out, exist_ok=True)
+    ocr_server, ocr_url = stub_ocr_server.start_stub_server(latency=args.ocr_latency)
+    embed_server, embed_url = stub_embed_server.start_stub_server(latency=args.embed_latency, dim=args.dim)
+
+    env = dict(os.environ)
+    env.update({
+        "DEEPSEEK_OCR_URL": ocr_url, "DEEPSEEK_API_KEY": "stub",
+        "OPENAI_BASE_URL": embed_url, "OPENAI_API_KEY": "stub", "EMBED_DIM": str(args.dim),
+        "EMBED_RPM": "0", "EMBED_TPM": "0",
+        "NEON_DATABASE_URL": "postgresql://stub/stub",   # never connected to (bench.stub_stores)
+        "OCR_CACHE_PATH": "off", "EMBED_CACHE_PATH": "off",
+    })
+
+    print(f"{args.pages} pages per PDF, stub latency OCR {args.ocr_latency}s / embeddings {args.embed_latency}s "
+          f"/ stores {args.db_latency}s; output in {out}")
+    print(f"{'kind':<12} {'workers':>7} {'seconds':>8} {'pages/s':>8} {'chunks':>7} {'chunks/s':>8} "
+          f"{'OCR req':>8} {'emb req':>8} {'RSS MB':>7} {'wrk MB':>7}")
+    results = []
+    try:
+        for kind in args.kinds:
+            pdf_path = make_pdf(os.path.join(out, f"{kind}.pdf"), kind, args.pages)
+            for workers in args.workers:
+                run_dir = os.path.join(out, f"{kind}-w{workers}")
+                os.makedirs(run_dir, exist_ok=True)
+                ocr_before = ocr_server.stats.as_dict()["requests"]
+                emb_before = embed_server.stats.as_dict()["requests"]
+                r = run_once(pdf_path, workers, args, env, run_dir)
+                r.update(kind=kind, workers=workers,
+                         ocr_requests=ocr_server.stats.as_dict()["requests"] - ocr_before,
+                         embed_requests=embed_server.stats.as_dict()["requests"] - emb_before)
+                results.append(r)
+                secs = r["seconds"] or float("nan")
+                print(f"{kind:<12} {workers:>7} {r['seconds']:>8.2f} {r['pages'] / secs:>8.1f} {r['chunks']:>7} "
+                      f"{r['chunks'] / secs:>8.1f} {r['ocr_requests']:>8} {r['embed_requests']:>8} "
+                      f"{_mb(r['peak_rss_mb']):>7} {_mb(r['workers_peak_rss_mb']):>7}")
+    finally:
+        ocr_server.shutdown()
+        embed_server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k not in ("child", "run_dir")},
+                       "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench/bench_ocr.py
+"""
+OCR client concurrency benchmark against the local stub server.
+
+    cd src
+    python -m bench.bench_ocr --images 64 --latency 0.25 --in-flight 1 2 4 8 16
+"""
+
+import os
+import time
+import argparse
+
+from bench.stub_ocr_server import start_stub_server
+
+# ocr_deepseek refuses to import without these; the stub ignores the key
+os.environ.setdefault("DEEPSEEK_API_KEY", "stub")
+os.environ.setdefault("DEEPSEEK_OCR_URL", "http://127.0.0.1:8765/ocr")
+
+from ingest.ocr_deepseek import DeepSeekOCRClient
+
+
+def run(url, images, in_flight):
+    client = DeepSeekOCRClient(url=url, api_key="stub", max_in_flight=in_flight, cache=None)
+    try:
+        t0 = time.perf_counter()
+        results = client.ocr_many(images, language="ta", return_layout=True)
+        elapsed = time.perf_counter() - t0
+    finally:
+        client.close()
+    errors = sum(1 for r in results if isinstance(r, Exception))
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR client concurrency")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency)
+    images = [f"fake-png-{i}".encode("utf-8") * 256 for i in range(args.images)]
+
+    print(f"{args.images} images, stub latency {args.latency}s")
+    print(f"{'in-flight':>9} {'seconds':>8} {'img/s':>8} {'speedup':>8} {'errors':>6}")
+    baseline = None
+    for n in args.in_flight:
+        elapsed, errors = run(url, images, n)
+        baseline = baseline or elapsed
+        print(f"{n:>9} {elapsed:>8.2f} {args.images / elapsed:>8.1f} {baseline / elapsed:>7.1f}x {errors:>6}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# bench/bench_vector_storage.py
+"""
+Recall of the reduced ANN index modes (db.pgvector_store.VECTOR_STORAGE)
+against exact full-precision search.
+
+Offline (default): numpy simulation of each mode - float16 rounding for
+"halfvec", first-N dims + L2 normalization for "truncated" - with exact
+candidate search on the reduced vectors, rerank on the full vectors, and
+recall@k against the exact top-k. Measures the loss from the storage
+format and rerank depth alone (HNSW's own approximation comes on top).
+Vectors come from the local embedding cache when it has enough of them,
+otherwise from a synthetic Matryoshka-like set (variance decaying by dim).
+
+    cd src
+    python -m bench.bench_vector_storage --ann-dims 256 512 1024 --factors 1 2 4 8
+    python -m bench.bench_vector_storage --synthetic 20000 --dim 1536
+
+Live (--db): runs query_similar with the current env (VECTOR_STORAGE,
+ANN_DIM, RERANK_FACTOR, index built) against an exact sequential scan on
+the same table, using stored embeddings as queries; reports recall@k,
+latency and the index size.
+
+    VECTOR_STORAGE=halfvec python -m bench.bench_vector_storage --db --queries 100
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import numpy as np
+
+from ingest.embedding_cache import EMBED_CACHE_PATH
+from ingest.profiling import percentile
+
+METRICS = {"vector_l2_ops": "l2", "vector_cosine_ops": "cosine", "vector_ip_ops": "ip"}
+
+
+def load_cached_vectors(path, model=None, limit=50000):
+    """float32 matrix of cached embeddings (the most common dim), or None."""
+    if not path or path.lower() == "off" or not os.path.exists(path):
+        return None
+    db = sqlite3.connect(path)
+    try:
+        sql = "SELECT dim, vector FROM embeddings" + (" WHERE model = ?" if model else "") + " LIMIT ?"
+        rows = db.execute(sql, (model, limit) if model else (limit,)).fetchall()
+    finally:
+        db.close()
+    if not rows:
+        return None
+    dims = [d for d, _ in rows]
+    dim = max(set(dims), key=dims.count)
+    return np.stack([np.frombuffer(blob, dtype=np.float32) for d, blob in rows if d == dim])
+
+
+def synthetic_vectors(n, dim, seed=0, clusters=200):
+    """
+    Clustered unit vectors whose per-dim scale decays with the index, so the
+    leading dims carry most of the signal (as in Matryoshka-trained models).
+    """
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 32.0)
+    centers = rng.standard_normal((clusters, dim)) * scale
+    vecs = centers[rng.integers(clusters, size=n)] + 0.6 * rng.standard_normal((n, dim)) * scale
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype(np.float32)
+
+
+def distances(queries, corpus, metric):
+    """Pairwise distances with pgvector's semantics (smaller = closer)."""
+    if metric == "l2":
+        sq = (queries ** 2).sum(1)[:, None] + (corpus ** 2).sum(1)[None, :] - 2 * queries @ corpus.T
+        return np.sqrt(np.maximum(sq, 0))
+    if metric == "cosine":
+        qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        cn = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        return 1 - qn @ cn.T
+    return -(queries @ corpus.T)
+
+
+def top_n(dist, n):
+    idx = np.argpartition(dist, min(n, dist.shape[1] - 1), axis=1)[:, :n]
+    order = np.take_along_axis(dist, idx, axis=1).argsort(axis=1)
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def reduce(vecs, mode, ann_dim):
+    if mode == "halfvec":
+        return vecs.astype(np.float16).astype(np.float32)
+    if mode == "truncated":
+        head = vecs[:, :ann_dim]
+        return head / np.maximum(np.linalg.norm(head, axis=1, keepdims=True), 1e-12)
+    return vecs
+
+
+def simulate(corpus, queries, metric, k, modes, factors):
+    """recall@k per (mode, factor): candidates by reduced vectors, rerank by full ones."""
+    full_dist = distances(queries, corpus, metric)
+    truth = top_n(full_dist, k)
+    results = []
+    for mode, ann_dim in modes:
+        reduced_dist = distances(reduce(queries, mode, ann_dim), reduce(corpus, mode, ann_dim), metric)
+        for factor in factors:
+            cand = top_n(reduced_dist, min(k * factor, corpus.shape[0]))
+            cand_dist = np.take_along_axis(full_dist, cand, axis=1)
+            reranked = np.take_along_axis(cand, cand_dist.argsort(axis=1)[:, :k], axis=1)
+            hits = sum(len(set(t) & set(r)) for t, r in zip(truth, reranked))
+            dims = ann_dim if mode == "truncated" else corpus.shape[1]
+            bytes_per_vec = dims * (2 if mode == "halfvec" else 4)
+            results.append({"mode": mode, "ann_dim": dims, "factor": factor,
+                            "recall": hits / truth.size, "index_bytes_per_vec": bytes_per_vec})
+    return results
+
+
+def run_offline(args):
+    vecs = None if args.synthetic else load_cached_vectors(args.cache, args.model)
+    if vecs is None or len(vecs) < args.queries + 10 * args.k:
+        n = args.synthetic or 20000
+        vecs = synthetic_vectors(n + args.queries, args.dim)
+        source = f"synthetic ({n} x {args.dim})"
+    else:
+        source = f"embedding cache ({len(vecs) - args.queries} x {vecs.shape[1]})"
+    rng = np.random.default_rng(1)
+    perm = rng.permutation(len(vecs))
+    queries, corpus = vecs[perm[:args.queries]], vecs[perm[args.queries:]]
+
+    modes = [("full", None), ("halfvec", None)]
+    modes += [("truncated", d) for d in args.ann_dims if d < corpus.shape[1]]
+    print(f"Corpus: {source}, {len(queries)} held-out queries, metric {args.metric}, recall@{args.k}")
+    print(f"{'mode':<10} {'dims':>6} {'bytes/vec':>10} {'factor':>7} {'recall':>8}")
+    for r in simulate(corpus, queries, args.metric, args.k, modes, args.factors):
+        if r["mode"] == "full" and r["factor"] != args.factors[0]:
+            continue   # exact either way
+        print(f"{r['mode']:<10} {r['ann_dim']:>6} {r['index_bytes_per_vec']:>10} {r['factor']:>7} {r['recall']:>8.4f}")
+
+
+def run_live(args):
+    from db import pgvector_store as store
+
+    queries = [row[0] for row in store._read("SELECT embedding FROM embeddings ORDER BY random() LIMIT %s;",
+                                              (args.queries,))]
+    (index_bytes, table_bytes), = store._read(
+        "SELECT pg_relation_size('idx_embeddings_embedding'), pg_relation_size('embeddings');")
+    if not queries:
+        raise SystemExit("The embeddings table is empty.")
+
+    exact_sql = ("SET LOCAL enable_indexscan = off; "
+                 f"SELECT chunk_id FROM embeddings ORDER BY embedding {store.DISTANCE_OP} %s::vector LIMIT %s;")
+    hits, ann_ms, exact_ms = 0, [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        got = store.query_similar(q, top_k=args.k)
+        ann_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        exact = {row[0] for row in store._read(exact_sql, (store.vector_literal(q), args.k))}
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+        hits += len(exact & {row[0] for row in got})
+
+    ann_ms.sort()
+    exact_ms.sort()
+    mode = store.VECTOR_STORAGE + (f" ({store.ANN_DIM} dims)" if store.VECTOR_STORAGE == "truncated" else "")
+    print(f"VECTOR_STORAGE={mode}, RERANK_FACTOR={store.RERANK_FACTOR}, {len(queries)} queries")
+    print(f"  recall@{args.k}:      {hits / (len(queries) * args.k):.4f}")
+    print(f"  query_similar:  p50 {percentile(ann_ms, 0.5):.1f} ms, p90 {percentile(ann_ms, 0.9):.1f} ms")
+    print(f"  exact scan:     p50 {percentile(exact_ms, 0.5):.1f} ms, p90 {percentile(exact_ms, 0.9):.1f} ms")
+    print(f"  index size:     {index_bytes / 2 ** 20:.1f} MB (table {table_bytes / 2 ** 20:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall of halfvec / truncated ANN storage vs exact search")
+    parser.add_argument("--db", action="store_true", help="measure the live table with the current env settings")
+    parser.add_argument("--k", type=int, default=5, help="top_k")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4, 8], help="rerank over-fetch factors")
+    parser.add_argument("--ann-dims", type=int, nargs="+", default=[256, 512, 1024], help="truncated dims to try")
+    parser.add_argument("--metric", choices=sorted(set(METRICS.values())),
+                        default=METRICS.get(os.getenv("VECTOR_OPS", "vector_l2_ops"), "l2"))
+    parser.add_argument("--cache", default=EMBED_CACHE_PATH, help="embedding cache to sample vectors from")
+    parser.add_argument("--model", default=None, help="only cached vectors of this model")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of the cache")
+    parser.add_argument("--dim", type=int, default=1536, help="synthetic vector dimension")
+    args = parser.parse_args()
+
+    if args.db:
+        run_live(args)
+    else:
+        run_offline(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# bench/stub_embed_server.py
+"""
+Local stand-in for the OpenAI embeddings endpoint (offline tests/benchmarks).
+
+- Accepts POST .../embeddings with {"model", "input", "encoding_format"}
+- Sleeps `latency` seconds per request to mimic the real round-trip
+- Returns `dim`-dimensional vectors: component 0 is the input's length
+  (so callers can check result ordering), the rest are derived from its
+  sha1 (same text → same vector). "base64" encoding is honoured, as the
+  openai client asks for it by default
+- GET /stats returns request/input counts and the peak number of
+  requests that were in flight at the same time
+
+Run:
+    python -m bench.stub_embed_server --port 8766 --latency 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 OPENAI_API_KEY=stub EMBED_DIM=8 python src/ingest_to_pgvector.py
+"""
+
+import json
+import time
+import base64
+import hashlib
+import argparse
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.stub_ocr_server import _Stats
+
+
+def stub_vector(text, dim):
+    """The vector the stub returns for text."""
+    digest = hashlib.sha1(text.encode("utf-8")).digest()
+    return [float(len(text))] + [digest[i % len(digest)] / 255.0 for i in range(dim - 1)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            stats = self.server.stats.as_dict()
+            stats["inputs"] = self.server.inputs
+            self._send_json(stats)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        stats = self.server.stats
+        stats.enter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                self._send_json({"error": {"message": "not found"}}, status=404)
+                return
+            inputs = req.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            with stats.lock:
+                self.server.inputs += len(inputs)
+            time.sleep(self.server.latency)
+
+            data = []
+            for i, text in enumerate(inputs):
+                vec = stub_vector(text, self.server.dim)
+                if req.get("encoding_format") == "base64":
+                    vec = base64.b64encode(array("f", vec).tobytes()).decode("ascii")
+                data.append({"object": "embedding", "index": i, "embedding": vec})
+            self._send_json({
+                "object": "list",
+                "data": data,
+                "model": req.get("model", "stub"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+        finally:
+            stats.leave()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.2, dim=8):
+    """
+    Start the stub in a daemon thread.
+    Returns (server, base_url); pass base_url to OpenAI(base_url=...) and
+    call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.dim = dim
+    server.inputs = 0
+    server.stats = _Stats()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/v1"
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI embeddings server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--dim", type=int, default=8, help="vector dimension")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.host, args.port, args.latency, args.dim)
+    print(f"Stub embeddings server listening on {base_url} (latency {args.latency}s, dim {args.dim}). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench/stub_ocr_server.py
+"""
+Local stand-in for the DeepSeek OCR endpoint (offline tests/benchmarks).
+
+- Accepts the same multipart POST that ingest.ocr_deepseek sends
+- Sleeps `latency` seconds per request to mimic the real round-trip
+- Returns {"text", "blocks", "image_sha1", "request_bytes"}: the sha1
+  of the upload (same image → same text) and the request size, so callers
+  can check result ordering
+- GET /stats returns request counts and the peak number of requests
+  that were in flight at the same time
+
+Run:
+    python -m bench.stub_ocr_server --port 8765 --latency 0.3
+    DEEPSEEK_OCR_URL=http://127.0.0.1:8765/ocr DEEPSEEK_API_KEY=stub python src/ingest_to_pgvector.py
+"""
+
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_TEXT = "தமிழ் எங்கள் உயிருக்கு நேர். இது ஒரு மாதிரி பக்கம்."
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def enter(self):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def as_dict(self):
+        with self.lock:
+            return {"requests": self.requests, "in_flight": self.in_flight,
+                    "max_in_flight": self.max_in_flight}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            self._send_json(self.server.stats.as_dict())
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        stats = self.server.stats
+        stats.enter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            time.sleep(self.server.latency)
+            # drop the random multipart boundary so equal images give equal text
+            ctype = self.headers.get("Content-Type", "")
+            boundary = ctype.split("boundary=")[-1].encode("ascii") if "boundary=" in ctype else b""
+            digest = hashlib.sha1(body.replace(boundary, b"") if boundary else body).hexdigest()
+            text = f"{SAMPLE_TEXT} [{digest[:8]}]"
+            self._send_json({
+                "text": text,
+                "blocks": [{"text": text, "bbox": [0, 0, 100, 20], "confidence": 0.99}],
+                "image_sha1": digest,
+                "request_bytes": len(body),
+            })
+        finally:
+            stats.leave()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.2):
+    """
+    Start the stub in a daemon thread.
+    Returns (server, url); call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.stats = _Stats()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/ocr"
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub DeepSeek OCR server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, args.latency)
+    print(f"Stub OCR server listening on {url} (latency {args.latency}s). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# bench/stub_stores.py
+"""
+In-process stand-ins for Postgres+pgvector and Neo4j (offline benchmarks).
+
+They sit behind db.pgvector_store.get_pool() and kg.neo4j_client.get_driver(),
+so everything above them runs for real: COPY payloads are still built and
+streamed, UNWIND batches are still assembled. Each round-trip (statement,
+COPY, commit, Neo4j query) sleeps `latency` seconds to mimic the network.
+
+    from bench.stub_stores import install
+    pg, graph = install(latency=0.005)
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn._round_trip()
+        self.conn.statements += 1
+        self.rowcount = 0
+        self._rows = []
+
+    def copy_expert(self, sql, file):
+        data = file.read()
+        self.conn._round_trip()
+        with self.conn.lock:
+            self.conn.copies += 1
+            self.conn.copy_bytes += len(data)
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakePgConnection:
+    """Accepts every statement; counts statements, COPYs, bytes and commits."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.statements = 0
+        self.copies = 0
+        self.copy_bytes = 0
+        self.commits = 0
+        self.closed = 0
+        self.autocommit = False
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self._round_trip()
+        with self.lock:
+            self.commits += 1
+
+    def rollback(self):
+        self._round_trip()
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Hands out the one FakePgConnection for every checkout."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connection(self, autocommit=False):
+        yield self.conn
+
+    def status(self):
+        return {"size": 1, "idle": 1, "in_use": 0}
+
+    def closeall(self):
+        pass
+
+
+class _FakeTx:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def run(self, query, **params):
+        self.graph._round_trip()
+        with self.graph.lock:
+            self.graph.queries += 1
+            self.graph.rows += len(params.get("rows", [])) or 1
+
+
+class _FakeSession(_FakeTx):
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(_FakeTx(self.graph), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeNeo4jDriver:
+    """Sessions whose queries only count rows."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.rows = 0
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def session(self, **kwargs):
+        return _FakeSession(self)
+
+    def close(self):
+        pass
+
+
+def install(latency=0.0):
+    """
+    Route db.pgvector_store and kg.neo4j_client to the stand-ins.
+    Returns (FakePgConnection, FakeNeo4jDriver).
+    """
+    import db.pgvector_store as pg_store
+    import kg.neo4j_client as neo4j_client
+
+    pg = FakePgConnection(latency)
+    graph = FakeNeo4jDriver(latency)
+    pool = FakePool(pg)
+    pg_store.get_pool = lambda: pool
+    neo4j_client.get_driver = lambda: graph
+    return pg, graph
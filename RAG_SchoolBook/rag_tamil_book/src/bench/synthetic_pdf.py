@@ -0,0 +1,239 @@
+# bench/synthetic_pdf.py
+"""
+Synthetic Tamil PDFs for the ingest benchmark (no fonts or PDF libraries
+needed, output is deterministic for a given seed).
+
+Page kinds:
+- "digital":     selectable Tamil text only
+- "scanned":     one full-page JPEG, no text layer (full-page OCR path)
+- "image_heavy": some text plus embedded images per page: distinct
+                 figures, a logo repeated on every page, a tiny icon and a
+                 flat fill (exercises native extraction, dedup and skipping)
+
+Text is set in a minimal Type3 font whose glyphs are plain boxes but whose
+ToUnicode map yields real Tamil code points, so pdfplumber extracts Tamil
+exactly as it would from a textbook.
+
+    cd src
+    python -m bench.synthetic_pdf --kind image_heavy --pages 50 --out /tmp/heavy.pdf
+"""
+
+import io
+import random
+import argparse
+from PIL import Image, ImageDraw
+
+KINDS = ("digital", "scanned", "image_heavy")
+PAGE_W, PAGE_H = 595, 842   # A4 in points
+
+SENTENCES = [
+    "தமிழ் எங்கள் உயிருக்கு நேர்.",
+    "யாதும் ஊரே யாவரும் கேளிர்.",
+    "கற்க கசடற கற்பவை கற்றபின் நிற்க அதற்குத் தக.",
+    "அகர முதல எழுத்தெல்லாம் ஆதி பகவன் முதற்றே உலகு.",
+    "இந்தப் பாடத்தில் நாம் இயற்கை வளங்களைப் பற்றி அறிந்துகொள்வோம்.",
+    "மரங்கள் நமக்கு நிழலும் காற்றும் தருகின்றன.",
+    "நீர் இன்றி அமையாது உலகு என்றார் வள்ளுவர்.",
+    "பயிற்சி வினாக்களுக்கு விடை எழுதுக.",
+    "சங்க இலக்கியம் தமிழரின் வாழ்வியலைக் காட்டுகிறது.",
+    "கல்வி கரையில கற்பவர் நாள் சில.",
+]
+
+_TOUNICODE = b"""/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<00> <FF>
+endcodespacerange
+2 beginbfrange
+<20> <7E> <0020>
+<80> <FF> <0B80>
+endbfrange
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end"""
+
+
+def encode_text(text):
+    """Tamil/ASCII text → hex string in the Type3 font's byte encoding."""
+    out = bytearray()
+    for ch in text:
+        cp = ord(ch)
+        if 0x20 <= cp < 0x7F:
+            out.append(cp)
+        elif 0x0B80 <= cp <= 0x0BFF:
+            out.append(0x80 + cp - 0x0B80)
+        else:
+            out.append(0x3F)  # "?"
+    return "<" + out.hex() + ">"
+
+
+class _PdfWriter:
+    """Just enough PDF: numbered objects, streams and an xref table."""
+
+    def __init__(self):
+        self.objects = []
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, num, body):
+        self.objects[num - 1] = body if isinstance(body, bytes) else body.encode("latin-1")
+
+    def add(self, body):
+        num = self.reserve()
+        self.set(num, body)
+        return num
+
+    def stream(self, data, extra=""):
+        return self.add(f"<< {extra} /Length {len(data)} >>\nstream\n".encode("latin-1") + data + b"\nendstream")
+
+    def tobytes(self, root):
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(self.objects, 1):
+            offsets.append(out.tell())
+            out.write(f"{i} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for off in offsets:
+            out.write(f"{off:010d} 00000 n \n".encode("latin-1"))
+        out.write(f"trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\n"
+                  f"startxref\n{xref}\n%%EOF\n".encode("latin-1"))
+        return out.getvalue()
+
+
+def _type3_font(w):
+    box = w.stream(b"500 0 50 0 450 600 d1 50 0 400 600 re f")
+    space = w.stream(b"250 0 0 0 0 0 d1")
+    tounicode = w.stream(_TOUNICODE)
+    differences = "32 /sp " + " ".join(["/box"] * (255 - 32))
+    widths = " ".join(["250"] + ["500"] * (255 - 32))
+    return w.add(
+        "<< /Type /Font /Subtype /Type3 /FontBBox [0 0 600 700] /FontMatrix [0.001 0 0 0.001 0 0] "
+        f"/CharProcs << /box {box} 0 R /sp {space} 0 R >> "
+        f"/Encoding << /Type /Encoding /Differences [{differences}] >> "
+        f"/FirstChar 32 /LastChar 255 /Widths [{widths}] /ToUnicode {tounicode} 0 R /Resources << >> >>"
+    )
+
+
+def _jpeg(img, quality=80):
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def _image_xobject(w, img):
+    data = _jpeg(img)
+    cs = "/DeviceGray" if img.mode == "L" else "/DeviceRGB"
+    return w.stream(data, f"/Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} "
+                          f"/ColorSpace {cs} /BitsPerComponent 8 /Filter /DCTDecode")
+
+
+def _figure(rng, size=(320, 240)):
+    """A distinct 'diagram': random shapes and text-like strokes."""
+    img = Image.new("RGB", size, (255, 255, 255))
+    d = ImageDraw.Draw(img)
+    for _ in range(12):
+        x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+        x1, y1 = x0 + rng.randrange(10, 120), y0 + rng.randrange(10, 80)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        (d.ellipse if rng.random() < 0.5 else d.rectangle)([x0, y0, x1, y1], outline=color, width=3)
+    for row in range(6):
+        y = 20 + row * 32
+        d.line([(20, y), (20 + rng.randrange(80, size[0] - 40), y)], fill=(30, 30, 30), width=4)
+    return img
+
+
+def _scan(rng, size=(1240, 1754)):
+    """A grey 150 dpi 'scan': paper noise plus dark text lines."""
+    img = Image.frombytes("L", size, rng.randbytes(size[0] * size[1])).point(lambda v: 215 + v // 8)
+    d = ImageDraw.Draw(img)
+    for row in range(40):
+        y = 120 + row * 38
+        x = 110
+        while x < size[0] - 160:
+            word = rng.randrange(30, 140)
+            d.rectangle([x, y, x + word, y + 18], fill=rng.randrange(20, 70))
+            x += word + rng.randrange(14, 30)
+    return img
+
+
+def _text_ops(rng, lines, top=800):
+    ops = [f"BT /F1 11 Tf 15 TL 50 {top} Td"]
+    for _ in range(lines):
+        ops.append(f"{encode_text(rng.choice(SENTENCES))} Tj T*")
+    ops.append("ET")
+    return ops
+
+
+def make_pdf(path, kind="digital", pages=20, seed=0):
+    """Write a `pages`-page synthetic PDF of the given kind to path."""
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    rng = random.Random(seed)
+    w = _PdfWriter()
+    catalog = w.reserve()
+    pages_root = w.reserve()
+    font = _type3_font(w)
+
+    shared = {}
+    if kind == "image_heavy":
+        logo = Image.new("RGB", (120, 60), (200, 40, 40))
+        ImageDraw.Draw(logo).text((10, 20), "TN BOOK", fill=(255, 255, 255))
+        shared["Logo"] = _image_xobject(w, logo)
+        shared["Icon"] = _image_xobject(w, Image.frombytes("RGB", (16, 16), rng.randbytes(16 * 16 * 3)))
+        shared["Fill"] = _image_xobject(w, Image.new("RGB", (200, 100), (230, 230, 230)))
+
+    page_nums = []
+    for _ in range(pages):
+        xobjects = dict(shared)
+        if kind == "digital":
+            ops = _text_ops(rng, 48)
+        elif kind == "scanned":
+            xobjects["Scan"] = _image_xobject(w, _scan(rng))
+            ops = [f"q {PAGE_W} 0 0 {PAGE_H} 0 0 cm /Scan Do Q"]
+        else:
+            ops = _text_ops(rng, 12)
+            for i in range(3):
+                xobjects[f"Fig{i}"] = _image_xobject(w, _figure(rng))
+                x, y = 50 + (i % 2) * 260, 420 - (i // 2) * 210
+                ops.append(f"q 240 0 0 180 {x} {y} cm /Fig{i} Do Q")
+            ops.append("q 90 0 0 45 480 20 cm /Logo Do Q")
+            ops.append("q 16 0 0 16 30 30 cm /Icon Do Q")
+            ops.append("q 200 0 0 100 300 40 cm /Fill Do Q")
+
+        content = w.stream("\n".join(ops).encode("latin-1"))
+        xo = " ".join(f"/{name} {num} 0 R" for name, num in xobjects.items())
+        page_nums.append(w.add(
+            f"<< /Type /Page /Parent {pages_root} 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> /XObject << {xo} >> >> /Contents {content} 0 R >>"
+        ))
+
+    kids = " ".join(f"{n} 0 R" for n in page_nums)
+    w.set(pages_root, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_nums)} >>")
+    w.set(catalog, f"<< /Type /Catalog /Pages {pages_root} 0 R >>")
+    with open(path, "wb") as f:
+        f.write(w.tobytes(catalog))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Tamil PDF")
+    parser.add_argument("--kind", choices=KINDS, default="digital")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    make_pdf(args.out, args.kind, args.pages, args.seed)
+    print(f"Wrote {args.pages} {args.kind} pages to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
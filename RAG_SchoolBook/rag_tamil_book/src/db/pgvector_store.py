@@ -2,22 +2,85 @@
 """
 Neon + pgvector integration layer.
 Handles:
-- SSL-secured Postgres connection
+- SSL-secured, pooled Postgres connections (db.pool; autocommit for reads)
 - Vector table initialization
-- Upsert embeddings
-- Vector similarity search (L2 distance)
+- HNSW index build (deferrable for bulk loads, parameters from env)
+- Reduced ANN index storage (halfvec or Matryoshka-truncated) with exact rerank
+- Upsert embeddings (single row, or bulk via COPY + one merge per batch)
+- Delete stale chunks of re-ingested pages
+- Vector similarity search (distance matching VECTOR_OPS, L2 by default)
+- Hybrid search: full-text + vector candidates fused by reciprocal rank
+  in one statement
+- Figure image index (CLIP vectors with page/bbox, own HNSW index) and
+  combined chunk + figure search in one statement
+- Semantic answer cache, invalidated by triggers when a source chunk changes
 """
 
 import os
+import io
+import re
+import json
+import math
+import struct
+import atexit
+import threading
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
 from pgvector.psycopg2 import register_vector
 from dotenv import load_dotenv
+from ingest.profiling import profiler
+from db.pool import ConnectionPool, CONNECTION_ERRORS
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("NEON_DATABASE_URL")
 EMBED_DIM = int(os.getenv("EMBED_DIM", 3072))  # 3072 for text-embedding-3-large
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 500))  # rows per COPY + merge
+COPY_FORMAT = os.getenv("COPY_FORMAT", "binary").lower()  # "binary" (pgvector send/recv) or "text"
+
+# connection pool (db.pool.ConnectionPool)
+POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", 1))
+POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", 10))
+POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", 30))          # seconds to wait for a free connection
+POOL_CHECK_AFTER = float(os.getenv("PG_POOL_CHECK_AFTER", 60))  # idle seconds before a ping on checkout
+
+# HNSW index configuration
+HNSW_M = int(os.getenv("HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 200))
+VECTOR_OPS = os.getenv("VECTOR_OPS", "vector_l2_ops")
+INDEX_MAINTENANCE_WORK_MEM = os.getenv("INDEX_MAINTENANCE_WORK_MEM", "1GB")
+INDEX_PARALLEL_WORKERS = int(os.getenv("INDEX_PARALLEL_WORKERS", 4))
+
+# What the HNSW index stores (the embedding column always stays full float32):
+# "full"      - the vectors as they are
+# "halfvec"   - 16-bit floats, half the index size (needed above 2000 dims)
+# "truncated" - first ANN_DIM dims, L2-normalized (Matryoshka embeddings,
+#               e.g. text-embedding-3-*)
+# The reduced modes over-fetch RERANK_FACTOR x top_k candidates from the
+# index and rerank them exactly on the full column (pgvector >= 0.7).
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "full").lower()
+ANN_DIM = int(os.getenv("ANN_DIM", 512))
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", 4))
+VECTOR_STORAGE_MODES = ("full", "halfvec", "truncated")
+
+# hybrid search (query_hybrid): full-text index on content, fused with the
+# ANN results by reciprocal-rank fusion. "simple" = words as written,
+# lowercased, no stemming or stop words (Postgres has no Tamil dictionary).
+FTS_CONFIG = os.getenv("FTS_CONFIG", "simple")
+HYBRID_DEPTH = int(os.getenv("HYBRID_DEPTH", 40))  # candidates taken from each list
+RRF_K = int(os.getenv("RRF_K", 60))                # 1 / (RRF_K + rank) per list
+
+# figures table: CLIP vectors (UnifiedEmbedder, normalized → cosine)
+FIGURE_EMBED_DIM = int(os.getenv("FIGURE_EMBED_DIM", 512))
+FIGURE_VECTOR_OPS = os.getenv("FIGURE_VECTOR_OPS", "vector_cosine_ops")
+
+# query operator must match the index ops class or the index is not used
+DISTANCE_OPERATORS = {
+    "vector_l2_ops": "<->",
+    "vector_cosine_ops": "<=>",
+    "vector_ip_ops": "<#>",
+}
 
 if not DATABASE_URL:
     raise RuntimeError("NEON_DATABASE_URL missing in .env")
@@ -26,71 +89,357 @@ if not DATABASE_URL:
 if "sslmode" not in DATABASE_URL.lower():
     DATABASE_URL += "?sslmode=require"
 
-_conn = None
+if VECTOR_OPS not in DISTANCE_OPERATORS:
+    raise RuntimeError(f"VECTOR_OPS must be one of {sorted(DISTANCE_OPERATORS)}, got {VECTOR_OPS!r}")
+
+DISTANCE_OP = DISTANCE_OPERATORS[VECTOR_OPS]
+
+if FIGURE_VECTOR_OPS not in DISTANCE_OPERATORS:
+    raise RuntimeError(f"FIGURE_VECTOR_OPS must be one of {sorted(DISTANCE_OPERATORS)}, got {FIGURE_VECTOR_OPS!r}")
+
+FIGURE_DISTANCE_OP = DISTANCE_OPERATORS[FIGURE_VECTOR_OPS]
+
+if not re.fullmatch(r"[a-z_][a-z0-9_]*", FTS_CONFIG):
+    raise RuntimeError(f"FTS_CONFIG must be a text search configuration name, got {FTS_CONFIG!r}")
+
+if VECTOR_STORAGE not in VECTOR_STORAGE_MODES:
+    raise RuntimeError(f"VECTOR_STORAGE must be one of {VECTOR_STORAGE_MODES}, got {VECTOR_STORAGE!r}")
+if VECTOR_STORAGE == "truncated" and not 0 < ANN_DIM < EMBED_DIM:
+    raise RuntimeError(f"ANN_DIM must be between 1 and EMBED_DIM - 1 ({EMBED_DIM - 1}), got {ANN_DIM}")
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _connect():
+    """New psycopg2 connection with the pgvector types registered."""
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        register_vector(conn)
+        return conn
+    except Exception as e:
+        raise RuntimeError(f"Failed to connect to Neon/Postgres: {e}")
+
+
+def get_pool():
+    """
+    Process-wide connection pool (PG_POOL_* settings), shared by all
+    threads, e.g. concurrent Streamlit sessions. A forked child opens its
+    own instead of reusing the parent's sockets.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(_connect, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_TIMEOUT, POOL_CHECK_AFTER)
+                _pool_pid = os.getpid()
+    return _pool
+
 
+def connection(autocommit=False):
+    """
+    Borrow a pooled connection for a `with` block:
+
+        with connection() as conn, conn.cursor() as cur:
+            ...
+            conn.commit()
 
-def get_conn():
+    Uncommitted work is rolled back when the block ends; a connection that
+    failed at the network level is dropped and replaced on the next checkout.
     """
-    Maintains a single persistent psycopg2 connection.
-    Registers pgvector extension on the connection.
+    return get_pool().connection(autocommit)
+
+
+def _read(sql, params=None):
     """
-    global _conn
-    if _conn is None:
+    fetchall() of a read-only query on an autocommit connection (no
+    transaction held open between calls). Retried once on a fresh
+    connection if the first one turns out to be dead (e.g. Neon idle
+    timeout).
+    """
+    for attempt in (1, 2):
         try:
-            _conn = psycopg2.connect(DATABASE_URL)
-            register_vector(_conn)
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to Neon/Postgres: {e}")
-    return _conn
+            with connection(autocommit=True) as conn, conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall()
+        except CONNECTION_ERRORS:
+            if attempt == 2:
+                raise
+
 
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
 
-def initialize_schema():
+
+atexit.register(close_pool)
+
+
+def initialize_schema(create_index=True):
     """
     Creates:
     - pgvector extension
     - embeddings table (3072-dim vectors)
-    - HNSW index for fast similarity search
+    - full-text (GIN) index on content for hybrid search
+    - answer_cache table and its invalidation triggers
+    - HNSW index for fast similarity search (skip with create_index=False
+      and call build_vector_index() after a bulk load)
+    """
+    with connection() as conn, conn.cursor() as cur:
+        # pgvector extension
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+
+        # table
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id SERIAL PRIMARY KEY,
+                chunk_id TEXT UNIQUE,
+                content TEXT,
+                page INT,
+                source TEXT,
+                metadata JSONB,
+                embedding vector({EMBED_DIM})
+            );
+        """)
+
+        # full-text index for query_hybrid (rebuild after changing FTS_CONFIG)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_embeddings_content_fts ON embeddings USING gin ({fts_expression()});")
+
+        conn.commit()
+
+    initialize_answer_cache_schema()
+
+    if create_index:
+        build_vector_index()
+
+
+def ann_expression(vector_sql="embedding"):
+    """
+    The expression the HNSW index is built on for VECTOR_STORAGE, applied to
+    vector_sql (the column, or a query vector); queries must ORDER BY the
+    same expression for the index to be used.
+    """
+    if VECTOR_STORAGE == "halfvec":
+        return f"({vector_sql}::halfvec({EMBED_DIM}))"
+    if VECTOR_STORAGE == "truncated":
+        return f"(l2_normalize(subvector({vector_sql}, 1, {ANN_DIM}))::vector({ANN_DIM}))"
+    return vector_sql
+
+
+def ann_ops():
+    """Operator class for the index: VECTOR_OPS, or its halfvec_* twin."""
+    if VECTOR_STORAGE == "halfvec":
+        return "halfvec_" + VECTOR_OPS[len("vector_"):]
+    return VECTOR_OPS
+
+
+def vector_index_sql():
+    """CREATE INDEX statement built from HNSW_M / HNSW_EF_CONSTRUCTION / VECTOR_OPS / VECTOR_STORAGE."""
+    return f"""
+        CREATE INDEX IF NOT EXISTS idx_embeddings_embedding
+        ON embeddings
+        USING hnsw ({ann_expression()} {ann_ops()})
+        WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION});
     """
-    conn = get_conn()
-    cur = conn.cursor()
 
-    # pgvector extension
-    cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
 
-    # table
+def drop_vector_index():
+    """Drop the HNSW index so a bulk load does not pay per-row graph maintenance."""
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("DROP INDEX IF EXISTS idx_embeddings_embedding;")
+        conn.commit()
+
+
+def build_vector_index(rebuild=False):
+    """
+    Builds the HNSW index in one pass, with more maintenance memory and
+    parallel maintenance workers for this build only.
+    rebuild=True drops an existing index first (e.g. after changing HNSW_M
+    or VECTOR_STORAGE).
+    """
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            if rebuild:
+                cur.execute("DROP INDEX IF EXISTS idx_embeddings_embedding;")
+            # SET LOCAL: only for this transaction
+            cur.execute("SET LOCAL maintenance_work_mem = %s;", (INDEX_MAINTENANCE_WORK_MEM,))
+            cur.execute("SET LOCAL max_parallel_maintenance_workers = %s;", (INDEX_PARALLEL_WORKERS,))
+            with profiler.stage("pg.index_build"):
+                cur.execute(vector_index_sql())
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to build vector index: {e}")
+
+
+@contextmanager
+def deferred_vector_index():
+    """
+    Bulk-load mode:
+
+        with deferred_vector_index():
+            ... load all rows ...
+
+    drops idx_embeddings_embedding on entry and rebuilds it once on exit
+    (also when the load fails, so queries never run without an index; a
+    failing rebuild is then only logged, and the load's own error raised).
+    """
+    drop_vector_index()
+    try:
+        yield
+    except BaseException:
+        print("Building HNSW index after the failed load...")
+        try:
+            build_vector_index()
+        except Exception as e:
+            print(f"[WARN] HNSW index rebuild failed ({e}); run build_vector_index() before querying.")
+        raise
+    print("Building HNSW index...")
+    build_vector_index()
+
+
+def upsert_embedding(chunk_id, content, page, source, metadata, embedding_vector):
+    """
+    Inserts or updates a vector chunk.
+    """
+    sql = """
+        INSERT INTO embeddings (chunk_id, content, page, source, metadata, embedding, id)
+        VALUES (%s, %s, %s, %s, %s, %s, DEFAULT)
+        ON CONFLICT (chunk_id) DO UPDATE
+        SET
+            content = EXCLUDED.content,
+            page = EXCLUDED.page,
+            metadata = EXCLUDED.metadata,
+            embedding = EXCLUDED.embedding;
+    """
+
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            cur.execute(sql, (
+                chunk_id,
+                content,
+                page,
+                source,
+                Json(metadata),
+                embedding_vector
+            ))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to upsert embedding: {e}")
+
+
+def _row_error(row):
+    """Returns a reason string when a row cannot be loaded, else None."""
+    chunk_id, content, page, source, metadata, embedding = row
+    if not chunk_id:
+        return "missing chunk_id"
+    if embedding is None:
+        return "missing embedding"
+    if len(embedding) != EMBED_DIM:
+        return f"embedding has {len(embedding)} dims, expected {EMBED_DIM}"
+    if not all(math.isfinite(x) for x in embedding):
+        return "embedding contains NaN/Inf"
+    return None
+
+
+def _copy_binary(rows):
+    """
+    Postgres binary COPY stream for the staging table.
+    vector uses pgvector's binary format: int16 dim, int16 unused, float4[dim].
+    """
+    buf = io.BytesIO()
+    buf.write(b"PGCOPY\n\xff\r\n\x00")
+    buf.write(struct.pack("!ii", 0, 0))  # flags, header extension length
+
+    def put(data):
+        if data is None:
+            buf.write(struct.pack("!i", -1))
+        else:
+            buf.write(struct.pack("!i", len(data)))
+            buf.write(data)
+
+    for chunk_id, content, page, source, metadata, embedding in rows:
+        buf.write(struct.pack("!h", 6))
+        put(chunk_id.encode("utf-8"))
+        put(content.encode("utf-8") if content is not None else None)
+        put(struct.pack("!i", page) if page is not None else None)
+        put(source.encode("utf-8") if source is not None else None)
+        # jsonb binary = version byte 1 + JSON text
+        put(b"\x01" + json.dumps(metadata, ensure_ascii=False).encode("utf-8") if metadata is not None else None)
+        dim = len(embedding)
+        put(struct.pack(f"!hh{dim}f", dim, 0, *embedding))
+
+    buf.write(struct.pack("!h", -1))  # trailer
+    buf.seek(0)
+    return buf
+
+
+def _copy_text_value(value):
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_text(rows):
+    """Text-format COPY stream (fallback for servers without vector_recv)."""
+    lines = []
+    for chunk_id, content, page, source, metadata, embedding in rows:
+        vec = "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+        meta = json.dumps(metadata, ensure_ascii=False) if metadata is not None else None
+        lines.append("\t".join(_copy_text_value(v) for v in (chunk_id, content, page, source, meta, vec)))
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def _merge_batch(cur, rows):
+    """COPY rows into the session's temp staging table and merge in one statement."""
     cur.execute(f"""
-        CREATE TABLE IF NOT EXISTS embeddings (
-            id SERIAL PRIMARY KEY,
-            chunk_id TEXT UNIQUE,
+        CREATE TEMP TABLE IF NOT EXISTS embeddings_staging (
+            chunk_id TEXT,
             content TEXT,
             page INT,
             source TEXT,
             metadata JSONB,
             embedding vector({EMBED_DIM})
-        );
+        ) ON COMMIT DELETE ROWS;
     """)
 
-    # HNSW index (Neon recommended)
-    cur.execute("""
-        CREATE INDEX IF NOT EXISTS idx_embeddings_embedding
-        ON embeddings
-        USING hnsw (embedding vector_l2_ops)
-        WITH (m = 16, ef_construction = 200);
-    """)
+    columns = "(chunk_id, content, page, source, metadata, embedding)"
+    if COPY_FORMAT == "text":
+        sql, payload = f"COPY embeddings_staging {columns} FROM STDIN", _copy_text(rows)
+    else:
+        sql, payload = f"COPY embeddings_staging {columns} FROM STDIN WITH (FORMAT binary)", _copy_binary(rows)
+    with profiler.stage("pg.copy", bytes_sent=payload.getbuffer().nbytes, items=len(rows)):
+        cur.copy_expert(sql, payload)
 
-    conn.commit()
+    with profiler.stage("pg.merge", items=len(rows)):
+        cur.execute("""
+            INSERT INTO embeddings (chunk_id, content, page, source, metadata, embedding)
+            SELECT chunk_id, content, page, source, metadata, embedding
+            FROM embeddings_staging
+            ON CONFLICT (chunk_id) DO UPDATE
+            SET
+                content = EXCLUDED.content,
+                page = EXCLUDED.page,
+                metadata = EXCLUDED.metadata,
+                embedding = EXCLUDED.embedding;
+        """)
 
 
-def upsert_embedding(chunk_id, content, page, source, metadata, embedding_vector):
+def _upsert_rows_one_by_one(conn, rows):
     """
-    Inserts or updates a vector chunk.
+    Fallback after a failed bulk merge: one transaction, one savepoint per
+    row, so a bad row is reported and the rest are still written.
     """
-    conn = get_conn()
-    cur = conn.cursor()
-
+    failures = []
     sql = """
-        INSERT INTO embeddings (chunk_id, content, page, source, metadata, embedding, id)
-        VALUES (%s, %s, %s, %s, %s, %s, DEFAULT)
+        INSERT INTO embeddings (chunk_id, content, page, source, metadata, embedding)
+        VALUES (%s, %s, %s, %s, %s, %s)
         ON CONFLICT (chunk_id) DO UPDATE
         SET
             content = EXCLUDED.content,
@@ -98,43 +447,535 @@ def upsert_embedding(chunk_id, content, page, source, metadata, embedding_vector
             metadata = EXCLUDED.metadata,
             embedding = EXCLUDED.embedding;
     """
+    with conn.cursor() as cur:
+        for chunk_id, content, page, source, metadata, embedding in rows:
+            cur.execute("SAVEPOINT bulk_row;")
+            try:
+                cur.execute(sql, (chunk_id, content, page, source, Json(metadata), embedding))
+                cur.execute("RELEASE SAVEPOINT bulk_row;")
+            except Exception as e:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_row;")
+                failures.append((chunk_id, str(e).strip()))
+    conn.commit()
+    return failures
 
-    try:
-        cur.execute(sql, (
-            chunk_id,
-            content,
-            page,
-            source,
-            Json(metadata),
-            embedding_vector
-        ))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise RuntimeError(f"Failed to upsert embedding: {e}")
 
+def upsert_embeddings_bulk(rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Bulk insert-or-update.
+
+    rows: iterable of (chunk_id, content, page, source, metadata, embedding),
+          same order as upsert_embedding's arguments.
+
+    Each batch is streamed with COPY into a temp staging table and merged
+    into `embeddings` with a single INSERT ... ON CONFLICT, then committed
+    (one round-trip + one fsync per batch instead of per row).
 
-def query_similar(embedding_vector, top_k=5):
+    Rows that cannot be loaded do not abort the batch: invalid rows are
+    skipped up front, and if the merge itself fails the batch is retried
+    row by row. Returns a list of (chunk_id, error) for the failed rows.
     """
-    ANN search using L2 vector distance.
-    Returns rows sorted by relevance.
+    failures = []
+    valid = {}
+    for row in rows:
+        err = _row_error(row)
+        if err:
+            failures.append((row[0], err))
+        else:
+            valid[row[0]] = row   # last occurrence of a chunk_id wins
+
+    rows = list(valid.values())
+    if not rows:
+        return failures
+
+    with connection() as conn, conn.cursor() as cur:
+        for i in range(0, len(rows), batch_size):
+            part = rows[i:i + batch_size]
+            try:
+                _merge_batch(cur, part)
+                with profiler.stage("pg.commit"):
+                    conn.commit()
+            except CONNECTION_ERRORS:
+                raise   # nothing to fall back to on this connection; the pool discards it
+            except Exception as e:
+                conn.rollback()
+                print(f"[WARN] Bulk merge failed ({e}); retrying {len(part)} rows one by one.")
+                with profiler.stage("pg.row_fallback", items=len(part)):
+                    failures.extend(_upsert_rows_one_by_one(conn, part))
+
+    return failures
+
+
+def delete_stale_chunks(pages, keep_chunk_ids):
+    """
+    Deletes rows on `pages` whose chunk_id is not in keep_chunk_ids,
+    e.g. chunks 3 and 4 of a page that shrank from 5 chunks to 3.
+    An empty keep list clears the pages completely.
+    Returns the number of rows deleted.
     """
-    conn = get_conn()
-    cur = conn.cursor()
+    if not pages:
+        return 0
 
     sql = """
+        DELETE FROM embeddings
+        WHERE page = ANY(%s)
+          AND NOT (chunk_id = ANY(%s::text[]));
+    """
+
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            with profiler.stage("pg.delete_stale") as rec:
+                cur.execute(sql, (list(pages), list(keep_chunk_ids)))
+                deleted = cur.rowcount
+                conn.commit()
+                rec.items = deleted
+            return deleted
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to delete stale chunks: {e}")
+
+
+def vector_literal(vec):
+    """pgvector text form, for an explicit %s::vector parameter."""
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
+
+
+def _chunk_search_sql(top_k, candidates=None, query_sql="%(q)s::vector"):
+    """
+    SELECT for the top_k nearest chunks to the vector `query_sql` (default
+    the %(q)s parameter; see query_similar), with its parameters besides q
+    and the number of rows the index must return.
+    Returns (sql, params, fetch); sql has no trailing semicolon.
+    """
+    params = {"k": top_k}
+    if VECTOR_STORAGE == "full":
+        sql = f"""
+            SELECT
+                chunk_id,
+                content,
+                page,
+                source,
+                metadata,
+                embedding {DISTANCE_OP} {query_sql} AS distance
+            FROM embeddings
+            ORDER BY embedding {DISTANCE_OP} {query_sql}
+            LIMIT %(k)s
+        """
+        return sql, params, top_k
+
+    fetch = max(top_k, candidates or top_k * RERANK_FACTOR)
+    params["n"] = fetch
+    # a subquery rather than a CTE, so it can also run per row of a LATERAL join
+    sql = f"""
         SELECT
             chunk_id,
             content,
             page,
             source,
             metadata,
-            embedding <-> %s AS distance
-        FROM embeddings
-        ORDER BY embedding <-> %s
-        LIMIT %s;
+            embedding {DISTANCE_OP} {query_sql} AS distance
+        FROM (
+            SELECT chunk_id, content, page, source, metadata, embedding
+            FROM embeddings
+            ORDER BY {ann_expression()} {DISTANCE_OP} {ann_expression(query_sql)}
+            LIMIT %(n)s
+        ) candidates
+        ORDER BY distance
+        LIMIT %(k)s
+    """
+    return sql, params, fetch
+
+
+def _with_ef_search(sql, fetch):
+    """
+    Prefix a read with SET LOCAL hnsw.ef_search when the index must return
+    more than its default 40 rows. Sent as one multi-statement query, which
+    runs as a single implicit transaction even on an autocommit connection,
+    so the setting applies to this query only.
     """
+    if fetch <= 40:
+        return sql
+    return f"SET LOCAL hnsw.ef_search = {int(fetch)}; {sql}"
 
-    cur.execute(sql, (embedding_vector, embedding_vector, top_k))
-    rows = cur.fetchall()
-    return rows
+
+def query_similar(embedding_vector, top_k=5, candidates=None):
+    """
+    ANN search using the distance operator of VECTOR_OPS (L2 by default).
+
+    With VECTOR_STORAGE halfvec/truncated the index yields `candidates`
+    nearest rows by the reduced vectors (default RERANK_FACTOR * top_k),
+    which are reranked by exact distance on the full-precision column.
+    Returns rows sorted by relevance:
+    (chunk_id, content, page, source, metadata, distance)
+    """
+    sql, params, fetch = _chunk_search_sql(top_k, candidates)
+    params["q"] = vector_literal(embedding_vector)
+    return _read(_with_ef_search(sql, fetch), params)
+
+
+def query_similar_many(embedding_vectors, top_k=5, candidates=None):
+    """
+    query_similar for several query vectors in one statement: a LATERAL
+    join runs the same index search once per element of the unnested
+    vector array.
+    Returns one list of rows per vector, in input order, each as
+    query_similar returns them.
+    """
+    vectors = [vector_literal(vec) for vec in embedding_vectors]
+    if not vectors:
+        return []
+
+    chunk_sql, params, fetch = _chunk_search_sql(top_k, candidates, query_sql="q.vec")
+    params["qs"] = vectors
+    sql = f"""
+        SELECT q.ord, hit.chunk_id, hit.content, hit.page, hit.source, hit.metadata, hit.distance
+        FROM unnest(%(qs)s::vector[]) WITH ORDINALITY AS q(vec, ord)
+        CROSS JOIN LATERAL ({chunk_sql}) hit
+        ORDER BY q.ord, hit.distance;
+    """
+
+    rows = _read(_with_ef_search(sql, fetch), params)
+
+    grouped = [[] for _ in vectors]
+    for ord_, *row in rows:
+        grouped[ord_ - 1].append(tuple(row))
+    return grouped
+
+
+def fts_expression():
+    """Indexed tsvector of a chunk; queries must use the same expression to hit the index."""
+    return f"to_tsvector('{FTS_CONFIG}', content)"
+
+
+def query_hybrid(question, embedding_vector, top_k=5, depth=HYBRID_DEPTH, candidates=None):
+    """
+    Lexical + vector search fused by reciprocal-rank fusion, in one statement.
+
+    - vector list: the `depth` nearest chunks, as query_similar
+    - lexical list: the `depth` best full-text matches of any word of
+      `question` (OR of its words, ranked by ts_rank_cd, which favours
+      chunks holding more of them close together, i.e. exact phrases)
+    - score = sum over the lists a chunk is in of 1 / (RRF_K + rank)
+
+    Returns the top_k rows by score:
+    (chunk_id, content, page, source, metadata, distance, score)
+    distance is None for chunks found only by the full-text search.
+    """
+    depth = max(depth, top_k)
+    chunk_sql, params, fetch = _chunk_search_sql(depth, candidates)
+    params.update(q=vector_literal(embedding_vector), text=question or "", d=depth, top=top_k, rrf=RRF_K)
+
+    # plainto_tsquery ANDs the words; the text form is 'a' & 'b', so OR them instead
+    tsquery = f"replace(plainto_tsquery('{FTS_CONFIG}', %(text)s)::text, ' & ', ' | ')::tsquery"
+    sql = f"""
+        WITH vector_hits AS (
+            SELECT chunk_id, distance, row_number() OVER (ORDER BY distance) AS rank
+            FROM ({chunk_sql}) v
+        ),
+        lexical_hits AS (
+            SELECT chunk_id, row_number() OVER (ORDER BY lex_rank DESC, chunk_id) AS rank
+            FROM (
+                SELECT chunk_id, ts_rank_cd({fts_expression()}, {tsquery}) AS lex_rank
+                FROM embeddings
+                WHERE {fts_expression()} @@ {tsquery}
+                ORDER BY lex_rank DESC, chunk_id
+                LIMIT %(d)s
+            ) l
+        ),
+        fused AS (
+            SELECT chunk_id, sum(1.0 / (%(rrf)s + rank)) AS score
+            FROM (
+                SELECT chunk_id, rank FROM vector_hits
+                UNION ALL
+                SELECT chunk_id, rank FROM lexical_hits
+            ) r
+            GROUP BY chunk_id
+            ORDER BY score DESC
+            LIMIT %(top)s
+        )
+        SELECT e.chunk_id, e.content, e.page, e.source, e.metadata, v.distance, f.score::float8
+        FROM fused f
+        JOIN embeddings e ON e.chunk_id = f.chunk_id
+        LEFT JOIN vector_hits v ON v.chunk_id = f.chunk_id
+        ORDER BY f.score DESC, v.distance NULLS LAST;
+    """
+
+    return _read(_with_ef_search(sql, fetch), params)
+
+
+# ---------------------------------------------------------------------------
+# Figure image index
+# ---------------------------------------------------------------------------
+
+def initialize_figure_schema():
+    """
+    Creates the figures table (one row per embedded figure crop, with its
+    page, bbox in PDF points and OCR caption) and its HNSW index.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS figures (
+                id SERIAL PRIMARY KEY,
+                figure_id TEXT UNIQUE,
+                page INT,
+                source TEXT,
+                bbox REAL[],
+                caption TEXT,
+                metadata JSONB,
+                embedding vector({FIGURE_EMBED_DIM})
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_figures_page ON figures (page);")
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_figures_embedding
+            ON figures
+            USING hnsw (embedding {FIGURE_VECTOR_OPS})
+            WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION});
+        """)
+        conn.commit()
+
+
+def upsert_figures(rows):
+    """
+    Insert-or-update figures in one statement and one transaction.
+    rows: iterable of (figure_id, page, source, bbox, caption, metadata, embedding)
+    Returns the number of rows written.
+    """
+    rows = [
+        (figure_id, page, source, list(bbox) if bbox else None, caption, Json(metadata), vector_literal(embedding))
+        for figure_id, page, source, bbox, caption, metadata, embedding in rows
+    ]
+    if not rows:
+        return 0
+
+    sql = """
+        INSERT INTO figures (figure_id, page, source, bbox, caption, metadata, embedding)
+        VALUES %s
+        ON CONFLICT (figure_id) DO UPDATE
+        SET
+            page = EXCLUDED.page,
+            source = EXCLUDED.source,
+            bbox = EXCLUDED.bbox,
+            caption = EXCLUDED.caption,
+            metadata = EXCLUDED.metadata,
+            embedding = EXCLUDED.embedding;
+    """
+
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            with profiler.stage("pg.figures", items=len(rows)):
+                execute_values(cur, sql, rows, template="(%s, %s, %s, %s, %s, %s, %s::vector)", page_size=len(rows))
+                conn.commit()
+            return len(rows)
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to upsert figures: {e}")
+
+
+def delete_stale_figures(pages, keep_figure_ids):
+    """
+    Deletes figures on `pages` whose figure_id is not in keep_figure_ids
+    (same contract as delete_stale_chunks). Returns the number deleted.
+    """
+    if not pages:
+        return 0
+
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            cur.execute("""
+                DELETE FROM figures
+                WHERE page = ANY(%s)
+                  AND NOT (figure_id = ANY(%s::text[]));
+            """, (list(pages), list(keep_figure_ids)))
+            deleted = cur.rowcount
+            conn.commit()
+            return deleted
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to delete stale figures: {e}")
+
+
+def query_multimodal(text_vector=None, figure_vector=None, top_k=5, figure_k=3, candidates=None):
+    """
+    Chunks and figures for one query, in a single statement.
+
+    text_vector:   query embedding in the chunks' space (embed_texts); the
+                   nearest top_k chunks are returned, as in query_similar
+    figure_vector: CLIP embedding of the query (text or image); the nearest
+                   figure_k figures are returned
+    With only figure_vector (an image query) the chunks are those of the
+    pages of the matched figures, best figure first.
+
+    Returns (chunk_rows, figure_rows):
+      chunk_rows:  (chunk_id, content, page, source, metadata, distance)
+                   distance is None for chunks found through figures
+      figure_rows: (figure_id, page, source, bbox, caption, metadata, distance)
+    """
+    if figure_vector is None:
+        if text_vector is None:
+            raise ValueError("query_multimodal needs text_vector, figure_vector or both")
+        return query_similar(text_vector, top_k, candidates), []
+
+    params = {"f": vector_literal(figure_vector), "fk": figure_k, "k": top_k}
+    fetch = figure_k
+    if text_vector is not None:
+        chunk_sql, chunk_params, chunk_fetch = _chunk_search_sql(top_k, candidates)
+        params.update(chunk_params, q=vector_literal(text_vector))
+        fetch = max(fetch, chunk_fetch)
+    else:
+        chunk_sql = """
+            SELECT e.chunk_id, e.content, e.page, e.source, e.metadata, NULL::float8 AS distance
+            FROM embeddings e
+            JOIN (SELECT page, min(distance) AS best FROM figure_hits GROUP BY page) fp ON fp.page = e.page
+            ORDER BY fp.best, e.page, (e.metadata->>'chunk_index')::int
+            LIMIT %(k)s
+        """
+
+    sql = f"""
+        WITH figure_hits AS (
+            SELECT figure_id, page, source, bbox, caption, metadata,
+                   embedding {FIGURE_DISTANCE_OP} %(f)s::vector AS distance
+            FROM figures
+            ORDER BY embedding {FIGURE_DISTANCE_OP} %(f)s::vector
+            LIMIT %(fk)s
+        ),
+        chunk_hits AS ({chunk_sql})
+        SELECT 'chunk', chunk_id, content, page, source, metadata, NULL::real[], distance FROM chunk_hits
+        UNION ALL
+        SELECT 'figure', figure_id, caption, page, source, metadata, bbox, distance FROM figure_hits;
+    """
+
+    rows = _read(_with_ef_search(sql, fetch), params)
+
+    chunks, figures = [], []
+    for kind, item_id, text, page, source, metadata, bbox, distance in rows:
+        if kind == "chunk":
+            chunks.append((item_id, text, page, source, metadata, distance))
+        else:
+            figures.append((item_id, page, source, bbox, text, metadata, distance))
+    # UNION ALL keeps no order across branches
+    figures.sort(key=lambda r: r[6])
+    if text_vector is not None:
+        chunks.sort(key=lambda r: r[5])
+    else:
+        best = {}
+        for f in figures:
+            best.setdefault(f[1], f[6])
+        chunks.sort(key=lambda r: (best.get(r[2], math.inf), r[2], (r[4] or {}).get("chunk_index", 0)))
+    return chunks, figures
+
+
+# ---------------------------------------------------------------------------
+# Semantic answer cache
+# ---------------------------------------------------------------------------
+
+def initialize_answer_cache_schema():
+    """
+    Creates the answer_cache table (question embedding, answer, sources and
+    the chunk_ids the answer was generated from) and the triggers that drop
+    every cached answer built on a chunk once that chunk is updated or
+    deleted in `embeddings` (re-ingest, delete_stale_chunks), whichever
+    code path wrote it. Idempotent; needs the embeddings table.
+
+    No ANN index: the table stays small enough for an exact scan, and
+    EMBED_DIM may exceed HNSW's 2000-dim limit.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS answer_cache (
+                id BIGSERIAL PRIMARY KEY,
+                variant TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding vector({EMBED_DIM}) NOT NULL,
+                answer TEXT NOT NULL,
+                sources JSONB NOT NULL,
+                chunk_ids TEXT[] NOT NULL,
+                generation_ms REAL,
+                hits INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                last_hit_at TIMESTAMPTZ
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_answer_cache_chunk_ids ON answer_cache USING gin (chunk_ids);")
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION invalidate_answer_cache() RETURNS trigger AS $$
+            BEGIN
+                DELETE FROM answer_cache
+                WHERE chunk_ids && (SELECT array_agg(chunk_id) FROM changed_chunks);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        # statement-level with a transition table: one DELETE per merge batch, not per row
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'answer_cache_on_update'
+                               AND tgrelid = 'embeddings'::regclass) THEN
+                    CREATE TRIGGER answer_cache_on_update AFTER UPDATE ON embeddings
+                    REFERENCING OLD TABLE AS changed_chunks
+                    FOR EACH STATEMENT EXECUTE FUNCTION invalidate_answer_cache();
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'answer_cache_on_delete'
+                               AND tgrelid = 'embeddings'::regclass) THEN
+                    CREATE TRIGGER answer_cache_on_delete AFTER DELETE ON embeddings
+                    REFERENCING OLD TABLE AS changed_chunks
+                    FOR EACH STATEMENT EXECUTE FUNCTION invalidate_answer_cache();
+                END IF;
+            END $$;
+        """)
+        conn.commit()
+
+
+def lookup_cached_answer(embedding_vector, variant, max_distance):
+    """
+    Nearest cached answer of the same variant within max_distance (cosine
+    distance), counted as a hit in the same statement.
+    Returns (question, answer, sources, chunk_ids, generation_ms, distance) or None.
+    """
+    sql = """
+        WITH best AS (
+            SELECT id, embedding <=> %(q)s::vector AS distance
+            FROM answer_cache
+            WHERE variant = %(variant)s
+            ORDER BY embedding <=> %(q)s::vector
+            LIMIT 1
+        )
+        UPDATE answer_cache a
+        SET hits = a.hits + 1, last_hit_at = now()
+        FROM best
+        WHERE a.id = best.id AND best.distance <= %(max_distance)s
+        RETURNING a.question, a.answer, a.sources, a.chunk_ids, a.generation_ms, best.distance;
+    """
+    params = {"q": vector_literal(embedding_vector), "variant": variant, "max_distance": max_distance}
+
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, params)
+        row = cur.fetchone()
+        conn.commit()
+    return row
+
+
+def store_cached_answer(embedding_vector, variant, question, answer, sources, chunk_ids, generation_ms):
+    """Adds one answer to the cache."""
+    with connection() as conn, conn.cursor() as cur:
+        try:
+            cur.execute("""
+                INSERT INTO answer_cache (variant, question, embedding, answer, sources, chunk_ids, generation_ms)
+                VALUES (%s, %s, %s::vector, %s, %s, %s::text[], %s);
+            """, (variant, question, vector_literal(embedding_vector), answer, Json(sources),
+                  list(chunk_ids), generation_ms))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Failed to store cached answer: {e}")
+
+
+def answer_cache_totals():
+    """Entries, hits and the retrieval + generation time those hits skipped (gross of lookups)."""
+    (entries, hits, saved_ms), = _read("""
+        SELECT count(*), coalesce(sum(hits), 0), coalesce(sum(hits * generation_ms), 0)
+        FROM answer_cache;
+    """)
+    return {"entries": entries, "hits": int(hits), "saved_ms": float(saved_ms)}
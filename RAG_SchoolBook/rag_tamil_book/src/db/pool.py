@@ -0,0 +1,167 @@
+# db/pool.py
+"""
+Thread-safe psycopg2 connection pool.
+
+- between min_size and max_size connections; callers wait up to `timeout`
+  seconds for a free one when all max_size are checked out
+- a connection idle for more than check_after seconds is pinged
+  (SELECT 1) on checkout and replaced if the ping fails
+- connections that failed with a connection-level error are discarded
+  instead of returned, so the next checkout opens a fresh one
+- every returned connection is rolled back to a clean state
+
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(...)
+        conn.commit()
+
+    with pool.connection(autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute("SELECT ...")   # read, no transaction left open
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+import psycopg2.extensions
+
+# errors after which a connection is not trusted again
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0, check_after=60.0):
+        """connect: zero-argument callable returning a new psycopg2 connection."""
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"need 0 <= min_size <= max_size and max_size >= 1, got {min_size}, {max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._idle = deque()        # (conn, last returned, monotonic)
+        self._size = 0              # open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"checkouts": 0, "waits": 0, "connects": 0, "reconnects": 0, "discarded": 0}
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+            self._size += 1
+
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self.stats["connects"] += 1
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, autocommit=False):
+        """Check a connection out (blocking up to `timeout`); return it with putconn()."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()     # most recently used: still warm
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = last_used = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"no free connection within {self.timeout}s (max_size={self.max_size})")
+                self.stats["waits"] += 1
+                self._cond.wait(remaining)
+            self.stats["checkouts"] += 1
+
+        try:
+            if conn is None:
+                conn = self._open()
+            elif not self._healthy(conn, last_used):
+                self._close_quietly(conn)
+                with self._cond:
+                    self.stats["reconnects"] += 1
+                conn = self._open()
+            if conn.autocommit != autocommit:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()     # e.g. type lookups run by the connect callable
+                conn.autocommit = autocommit
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; discard=True (or a broken connection) closes it instead."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self.stats["discarded"] += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, autocommit=False):
+        """Borrow a connection for the `with` block; uncommitted work is rolled back on return."""
+        conn = self.getconn(autocommit)
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            self.putconn(conn, discard=True)
+            raise
+        except BaseException:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._size - len(self._idle),
+                    "max_size": self.max_size, **self.stats}
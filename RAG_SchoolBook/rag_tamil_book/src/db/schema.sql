@@ -11,8 +11,78 @@ CREATE TABLE IF NOT EXISTS embeddings (
   embedding vector(3072)
 );
 
--- Example HNSW index for fast ANN (preferred for Neon)
+-- Example HNSW index for fast ANN (preferred for Neon).
+-- db.pgvector_store builds it from HNSW_M / HNSW_EF_CONSTRUCTION / VECTOR_OPS;
+-- for a full load, create it after the data (ingest_to_pgvector.py --bulk-load):
+--   SET maintenance_work_mem = '1GB';
+--   SET max_parallel_maintenance_workers = 4;
+-- With VECTOR_STORAGE=halfvec / truncated the index is on an expression
+-- instead (the column stays full precision for the exact rerank), e.g.
+--   USING hnsw ((embedding::halfvec(3072)) halfvec_l2_ops)
+--   USING hnsw ((l2_normalize(subvector(embedding, 1, 512))::vector(512)) vector_l2_ops)
+-- Change modes with build_vector_index(rebuild=True).
 CREATE INDEX IF NOT EXISTS idx_embeddings_embedding
 ON embeddings
 USING hnsw (embedding vector_l2_ops)
-WITH (m = 16, ef_construction = 200);
\ No newline at end of file
+WITH (m = 16, ef_construction = 200);
+-- Full-text index for hybrid search (query_hybrid, FTS_CONFIG).
+CREATE INDEX IF NOT EXISTS idx_embeddings_content_fts
+ON embeddings
+USING gin (to_tsvector('simple', content));
+
+-- Figure image index (ingest_to_pgvector.py --figures): one row per figure
+-- crop, CLIP vectors from embeddings.unified_embedder (FIGURE_EMBED_DIM).
+CREATE TABLE IF NOT EXISTS figures (
+  id SERIAL PRIMARY KEY,
+  figure_id TEXT UNIQUE,
+  page INT,
+  source TEXT,
+  bbox REAL[],        -- x0, top, x1, bottom in PDF points
+  caption TEXT,       -- OCR text of the figure
+  metadata JSONB,
+  embedding vector(512)
+);
+
+CREATE INDEX IF NOT EXISTS idx_figures_page ON figures (page);
+
+CREATE INDEX IF NOT EXISTS idx_figures_embedding
+ON figures
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 200);
+
+-- Semantic answer cache (rag.answer_cache): answers keyed by question
+-- embedding; no ANN index, the table is scanned exactly.
+CREATE TABLE IF NOT EXISTS answer_cache (
+  id BIGSERIAL PRIMARY KEY,
+  variant TEXT NOT NULL,          -- LLM / language / top_k the answer was made with
+  question TEXT NOT NULL,
+  embedding vector(3072) NOT NULL,
+  answer TEXT NOT NULL,
+  sources JSONB NOT NULL,
+  chunk_ids TEXT[] NOT NULL,      -- chunks the answer was generated from
+  generation_ms REAL,
+  hits INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  last_hit_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_answer_cache_chunk_ids ON answer_cache USING gin (chunk_ids);
+
+-- Re-ingesting or deleting a chunk drops every cached answer built on it.
+CREATE OR REPLACE FUNCTION invalidate_answer_cache() RETURNS trigger AS $$
+BEGIN
+  DELETE FROM answer_cache
+  WHERE chunk_ids && (SELECT array_agg(chunk_id) FROM changed_chunks);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS answer_cache_on_update ON embeddings;
+CREATE TRIGGER answer_cache_on_update AFTER UPDATE ON embeddings
+REFERENCING OLD TABLE AS changed_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION invalidate_answer_cache();
+
+DROP TRIGGER IF EXISTS answer_cache_on_delete ON embeddings;
+CREATE TRIGGER answer_cache_on_delete AFTER DELETE ON embeddings
+REFERENCING OLD TABLE AS changed_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION invalidate_answer_cache();
@@ -0,0 +1,223 @@
+# embeddings/onnx_clip.py
+"""
+CLIP on onnxruntime with int8-quantized weights: the same interface as
+UnifiedEmbedder, without torch or sentence-transformers at runtime (fast
+cold start, small footprint on CPU-only instances).
+
+One-time export (needs torch + transformers + onnx, on any machine):
+
+    cd src
+    python -m embeddings.onnx_clip export --out models/clip-vit-b-32-int8
+
+writes text.onnx / vision.onnx (dynamic int8 weights), tokenizer.json and
+preprocess.json. The runtime needs only onnxruntime, tokenizers, numpy and
+pillow:
+
+    embedder = OnnxClipEmbedder("models/clip-vit-b-32-int8")
+    embedder.embed_texts(["ஒளிச்சேர்க்கை"])
+
+bench/bench_clip_backends.py compares it with the float model.
+"""
+
+import os
+import json
+import inspect
+import argparse
+import numpy as np
+from PIL import Image
+from dotenv import load_dotenv
+
+from embeddings.unified_embedder import UNIFIED_BATCH_SIZE, IMAGE_EXTENSIONS, load_image
+
+load_dotenv()
+
+ONNX_CLIP_DIR = os.getenv("ONNX_CLIP_DIR", "models/clip-vit-b-32-int8")
+# onnxruntime intra-op threads; 0 = onnxruntime's default (all cores)
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", 0))
+
+# the Hugging Face checkpoint behind sentence-transformers' clip-ViT-B-32
+DEFAULT_HF_MODEL = "openai/clip-vit-base-patch32"
+
+
+def _normalize(emb):
+    return emb / np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+
+
+class OnnxClipEmbedder:
+
+    def __init__(self, model_dir=ONNX_CLIP_DIR, batch_size=UNIFIED_BATCH_SIZE, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if not os.path.exists(os.path.join(model_dir, "text.onnx")):
+            raise RuntimeError(f"No exported model in {model_dir}; run: python -m embeddings.onnx_clip export --out {model_dir}")
+        with open(os.path.join(model_dir, "preprocess.json"), encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.batch_size = batch_size
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        self.text_session = ort.InferenceSession(os.path.join(model_dir, "text.onnx"), opts, providers=providers)
+        self.vision_session = ort.InferenceSession(os.path.join(model_dir, "vision.onnx"), opts, providers=providers)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.config["max_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def preprocess(self, img):
+        """CLIPImageProcessor in numpy: bicubic resize of the short side, center crop, normalize → CHW float32."""
+        size = self.config["image_size"]
+        w, h = img.size
+        scale = size / min(w, h)
+        img = img.resize((max(size, round(w * scale)), max(size, round(h * scale))), Image.BICUBIC)
+        left = (img.width - size) // 2
+        top = (img.height - size) // 2
+        img = img.crop((left, top, left + size, top + size))
+        arr = np.asarray(img, dtype=np.float32) / 255.0
+        arr = (arr - np.array(self.config["image_mean"], dtype=np.float32)) / np.array(self.config["image_std"], dtype=np.float32)
+        return arr.transpose(2, 0, 1)
+
+    def _encode_texts(self, texts):
+        enc = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in enc], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in enc], dtype=np.int64),
+        }
+        return self.text_session.run(None, feeds)[0]
+
+    def _encode_images(self, images):
+        pixels = np.stack([self.preprocess(load_image(img)) for img in images])
+        return self.vision_session.run(None, {"pixel_values": pixels})[0]
+
+    def _batched(self, encode, items, batch_size=None):
+        items = list(items)
+        if not items:
+            return []
+        batch_size = batch_size or self.batch_size
+        out = [encode(items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+        return _normalize(np.concatenate(out)).tolist()
+
+    def embed_texts(self, texts, batch_size=None):
+        """Returns one 512-dim embedding per text, in order."""
+        return self._batched(self._encode_texts, texts, batch_size)
+
+    def embed_images(self, images, batch_size=None):
+        """Returns one 512-dim embedding per image (file path, bytes or PIL image), in order."""
+        return self._batched(self._encode_images, images, batch_size)
+
+    def embed_text(self, text: str):
+        """Returns 512-dim embedding for text."""
+        return self.embed_texts([text])[0]
+
+    def embed_image(self, image):
+        """Returns 512-dim embedding for an image (file path, bytes or PIL image)."""
+        return self.embed_images([image])[0]
+
+    def embed_query(self, input_value):
+        """
+        Automatically detects: text string, or image (file path, bytes, PIL image).
+        Use this for unified handling.
+        """
+        if isinstance(input_value, (bytes, bytearray, memoryview, Image.Image)):
+            return self.embed_image(input_value)
+        if isinstance(input_value, str) and input_value.lower().endswith(IMAGE_EXTENSIONS):
+            return self.embed_image(input_value)
+        return self.embed_text(input_value)
+
+
+def export(out_dir, hf_model=DEFAULT_HF_MODEL, quantize=True, opset=17):
+    """
+    Export the CLIP text and vision towers (projected features) to ONNX with
+    a dynamic batch axis, then quantize MatMul/Gemm weights to int8.
+    """
+    import torch
+    from transformers import CLIPModel, CLIPProcessor
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = CLIPModel.from_pretrained(hf_model).eval()
+    processor = CLIPProcessor.from_pretrained(hf_model)
+
+    class TextTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, input_ids, attention_mask):
+            return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, pixel_values):
+            return self.clip.get_image_features(pixel_values=pixel_values)
+
+    max_length = processor.tokenizer.model_max_length
+    sample = processor.tokenizer(["a diagram", "photosynthesis"], padding="max_length",
+                                 max_length=max_length, return_tensors="pt")
+    size = processor.image_processor.crop_size["height"]
+    targets = {
+        "text": (TextTower(model), (sample["input_ids"], sample["attention_mask"]),
+                 ["input_ids", "attention_mask"], {"input_ids": {0: "batch", 1: "sequence"},
+                                                   "attention_mask": {0: "batch", 1: "sequence"}}),
+        "vision": (VisionTower(model), (torch.zeros(2, 3, size, size),),
+                   ["pixel_values"], {"pixel_values": {0: "batch"}}),
+    }
+    # torch >= 2.5 accepts dynamo= (and later defaults to the dynamo exporter); older
+    # releases reject the kwarg, and their only exporter is the TorchScript one we want
+    export_kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    for name, (module, inputs, input_names, axes) in targets.items():
+        path = os.path.join(out_dir, f"{name}.onnx")
+        float_path = path + ".float" if quantize else path
+        with torch.no_grad():
+            torch.onnx.export(module, inputs, float_path, input_names=input_names, output_names=["embeds"],
+                              dynamic_axes={**axes, "embeds": {0: "batch"}}, opset_version=opset, **export_kwargs)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(float_path, path, weight_type=QuantType.QInt8, op_types_to_quantize=["MatMul", "Gemm"])
+            os.remove(float_path)
+
+    tok = processor.tokenizer
+    tok.backend_tokenizer.save(os.path.join(out_dir, "tokenizer.json"))
+    ip = processor.image_processor
+    with open(os.path.join(out_dir, "preprocess.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "hf_model": hf_model,
+            "quantized": quantize,
+            "max_length": max_length,
+            "pad_id": tok.pad_token_id,
+            "pad_token": tok.pad_token,
+            "image_size": size,
+            "image_mean": list(ip.image_mean),
+            "image_std": list(ip.image_std),
+        }, f, indent=2)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export CLIP to quantized ONNX for OnnxClipEmbedder")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export")
+    exp.add_argument("--out", default=ONNX_CLIP_DIR)
+    exp.add_argument("--model", default=DEFAULT_HF_MODEL, help="Hugging Face CLIP checkpoint")
+    exp.add_argument("--no-quantize", action="store_true", help="keep float32 weights")
+    args = parser.parse_args()
+    export(args.out, args.model, quantize=not args.no_quantize)
+    print(f"Exported {args.model} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,155 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+from io import BytesIO
 from PIL import Image
 import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# items per SentenceTransformer.encode batch (CPU: larger batches amortize the
+# per-call overhead; GPU: bounded by memory)
+UNIFIED_BATCH_SIZE = int(os.getenv("UNIFIED_BATCH_SIZE", 64))
+# 0 = encode in this process; N > 0 = pool of N encoder processes
+UNIFIED_EMBED_PROCESSES = int(os.getenv("UNIFIED_EMBED_PROCESSES", 0))
+# "torch": sentence-transformers float model; "onnx": exported int8 model
+# (embeddings.onnx_clip, no torch needed at runtime)
+UNIFIED_BACKEND = os.getenv("UNIFIED_BACKEND", "torch").lower()
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def load_image(image):
+    """PIL image, encoded image bytes (PNG/JPEG/... e.g. pdf_ingest crops) or a file path → RGB PIL image."""
+    if isinstance(image, Image.Image):
+        img = image
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        img = Image.open(BytesIO(bytes(image)))
+    else:
+        img = Image.open(image)
+    return img if img.mode == "RGB" else img.convert("RGB")
+
 
 class UnifiedEmbedder:
 
-    def __init__(self, model_name="clip-ViT-B-32"):
+    def __init__(self, model_name="clip-ViT-B-32", batch_size=UNIFIED_BATCH_SIZE, processes=UNIFIED_EMBED_PROCESSES):
+        # imported here so the onnx backend never loads torch
+        from sentence_transformers import SentenceTransformer
+
         # loads once on startup
         self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.pool = None
+        if processes:
+            self.start_pool(processes)
+
+    def start_pool(self, processes=None):
+        """
+        Start `processes` CPU encoder processes (default: one per core) used
+        by embed_texts / embed_images for inputs larger than one batch.
+        Each process gets an equal share of the cores for its torch threads.
+        """
+        if self.pool is not None:
+            return
+        processes = processes or os.cpu_count() or 1
+        threads = str(max(1, (os.cpu_count() or 1) // processes))
+        saved = {k: os.environ.get(k) for k in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")}
+        os.environ.update({k: threads for k in saved})   # inherited by the spawned workers
+        try:
+            self.pool = self.model.start_multi_process_pool(target_devices=["cpu"] * processes)
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+    def stop_pool(self):
+        if self.pool is not None:
+            type(self.model).stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def close(self):
+        self.stop_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _encode(self, items, batch_size=None):
+        """Normalized float32 matrix, one row per item."""
+        batch_size = batch_size or self.batch_size
+        if self.pool is not None and len(items) > batch_size:
+            emb = self.model.encode_multi_process(items, self.pool, batch_size=batch_size)
+            norms = np.linalg.norm(emb, axis=1, keepdims=True)
+            return emb / np.maximum(norms, 1e-12)
+        return self.model.encode(items, batch_size=batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=False)
+
+    def embed_texts(self, texts, batch_size=None):
+        """Returns one 512-dim embedding per text, in order."""
+        if not texts:
+            return []
+        return self._encode(list(texts), batch_size).tolist()
+
+    def embed_images(self, images, batch_size=None):
+        """
+        Returns one 512-dim embedding per image, in order. Images can be PIL
+        images, encoded bytes or file paths; they are decoded one slab at a
+        time, so a whole book's figures never sit in memory decoded at once.
+        """
+        images = list(images)
+        if not images:
+            return []
+        slab = (batch_size or self.batch_size) * 16
+        out = []
+        for i in range(0, len(images), slab):
+            decoded = [load_image(img) for img in images[i:i + slab]]
+            out.extend(self._encode(decoded, batch_size).tolist())
+        return out
 
     def embed_text(self, text: str):
         """Returns 512-dim embedding for text."""
-        emb = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
-        return emb.tolist()
+        return self.embed_texts([text])[0]
 
-    def embed_image(self, image_path: str):
-        """Returns 512-dim embedding for image."""
-        img = Image.open(image_path).convert("RGB")
-        emb = self.model.encode(img, convert_to_numpy=True, normalize_embeddings=True)
-        return emb.tolist()
+    def embed_image(self, image):
+        """Returns 512-dim embedding for an image (file path, bytes or PIL image)."""
+        return self.embed_images([image])[0]
 
     def embed_query(self, input_value):
         """
-        Automatically detects: text string or image file path.
+        Automatically detects: text string, or image (file path, bytes, PIL image).
         Use this for unified handling.
         """
-        if isinstance(input_value, str) and input_value.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
+        if isinstance(input_value, (bytes, bytearray, memoryview, Image.Image)):
+            return self.embed_image(input_value)
+        if isinstance(input_value, str) and input_value.lower().endswith(IMAGE_EXTENSIONS):
             return self.embed_image(input_value)
         else:
             return self.embed_text(input_value)
+
+
+def load_unified_embedder(backend=UNIFIED_BACKEND, **kwargs):
+    """UnifiedEmbedder ("torch") or OnnxClipEmbedder ("onnx"); same interface."""
+    if backend == "onnx":
+        from embeddings.onnx_clip import OnnxClipEmbedder
+        return OnnxClipEmbedder(**kwargs)
+    if backend != "torch":
+        raise ValueError(f"UNIFIED_BACKEND must be 'torch' or 'onnx', got {backend!r}")
+    return UnifiedEmbedder(**kwargs)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_unified_embedder():
+    """Process-wide embedder for UNIFIED_BACKEND, loaded on first use."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = load_unified_embedder()
+    return _embedder
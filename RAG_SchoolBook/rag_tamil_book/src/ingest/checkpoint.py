@@ -0,0 +1,140 @@
+# ingest/checkpoint.py
+"""
+Run checkpoint for resuming an interrupted ingest (--resume).
+
+Written after every committed upsert batch, always after the database
+commit it describes, so it never claims work that is not stored:
+
+{
+  "pdf": "data/tamil_grade8_book.pdf",
+  "fingerprint": [size, mtime_ns],
+  "status": "running" | "complete",
+  "figures": true,                         # run indexes figures (--figures)
+  "batches": 42,
+  "pages": [1, 2, 3],                      # stored, stale chunks pruned
+  "chunks": {"<chunk_id>": "<text sha1>"}, # stored chunks of unfinished pages
+  "kg_pending": {"3": {"excerpt": "...", "source": "TamilBook"}}
+}
+
+A resumed run skips "pages" without extracting them, does not re-embed
+"chunks" whose text is unchanged, and first writes the Page nodes still in
+"kg_pending". The file is replaced atomically (ingest.manifest), so killing
+the process at any point leaves the previous or the next checkpoint.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+from ingest.manifest import write_json_atomic
+
+load_dotenv()
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "data/ingest_checkpoint.json")
+
+
+def pdf_fingerprint(pdf_path):
+    st = os.stat(pdf_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def chunk_text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Thread-safe run checkpoint; the upsert and KG stages update it from their own threads."""
+
+    def __init__(self, path=CHECKPOINT_PATH, data=None):
+        self.path = path
+        self.data = data or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, pdf_path, path=CHECKPOINT_PATH, figures=False):
+        """Fresh checkpoint for a new run (replaces any previous one)."""
+        cp = cls(path, {
+            "pdf": pdf_path,
+            "fingerprint": pdf_fingerprint(pdf_path),
+            "status": "running",
+            "figures": bool(figures),
+            "batches": 0,
+            "pages": [],
+            "chunks": {},
+            "kg_pending": {},
+        })
+        cp.save()
+        return cp
+
+    @classmethod
+    def load(cls, path=CHECKPOINT_PATH):
+        """The saved checkpoint, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    def matches(self, pdf_path):
+        """True if the checkpoint was written for this exact PDF file."""
+        return (self.data.get("pdf") == pdf_path
+                and self.data.get("fingerprint") == pdf_fingerprint(pdf_path))
+
+    @property
+    def figures(self):
+        """True if the run also wrote the figures of its done pages."""
+        return bool(self.data.get("figures"))
+
+    @property
+    def complete(self):
+        return self.data.get("status") == "complete"
+
+    def done_pages(self):
+        return set(self.data.get("pages", []))
+
+    def stored_chunks(self):
+        """{chunk_id: text sha1} of stored chunks of unfinished pages."""
+        with self._lock:
+            return dict(self.data.get("chunks", {}))
+
+    def kg_pending(self):
+        with self._lock:
+            return [{"page": int(p), **info} for p, info in self.data.get("kg_pending", {}).items()]
+
+    def save(self):
+        with self._lock:
+            write_json_atomic(self.data, self.path)
+
+    def commit_batch(self, chunks, done_pages):
+        """
+        Record one committed upsert batch: chunks (dicts with chunk_id and
+        text) are stored, done_pages (page infos) are stored and pruned.
+        """
+        with self._lock:
+            stored = self.data["chunks"]
+            for c in chunks:
+                stored[c["chunk_id"]] = chunk_text_hash(c["text"])
+            pages = set(self.data["pages"])
+            for p in done_pages:
+                pages.add(p["page"])
+                for cid in p["chunk_ids"]:
+                    stored.pop(cid, None)
+                if p["chunk_ids"]:
+                    self.data["kg_pending"][str(p["page"])] = {"excerpt": p["excerpt"], "source": p["source"]}
+            self.data["pages"] = sorted(pages)
+            self.data["batches"] += 1
+            write_json_atomic(self.data, self.path)
+
+    def kg_done(self, page_nums):
+        """Page nodes for page_nums are written."""
+        with self._lock:
+            pending = self.data["kg_pending"]
+            for n in page_nums:
+                pending.pop(str(n), None)
+            write_json_atomic(self.data, self.path)
+
+    def finish(self):
+        with self._lock:
+            self.data["status"] = "complete"
+            write_json_atomic(self.data, self.path)
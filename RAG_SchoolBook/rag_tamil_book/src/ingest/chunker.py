@@ -1,6 +1,7 @@
 # ingest/chunker.py
 import os
 from dotenv import load_dotenv
+from ingest.profiling import profiler
 load_dotenv()
 
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 2000))
@@ -11,9 +12,11 @@ def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
     chunks = []
     start = 0
     L = len(text)
-    while start < L:
-        end = min(start + chunk_size, L)
-        chunk = text[start:end]
-        chunks.append({"text": chunk, "start": start, "end": end})
-        start += chunk_size - overlap
+    with profiler.stage("chunk") as rec:
+        while start < L:
+            end = min(start + chunk_size, L)
+            chunk = text[start:end]
+            chunks.append({"text": chunk, "start": start, "end": end})
+            start += chunk_size - overlap
+        rec.items = len(chunks)
     return chunks
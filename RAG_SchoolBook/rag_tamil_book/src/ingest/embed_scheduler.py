@@ -0,0 +1,189 @@
+# ingest/embed_scheduler.py
+"""
+Request packing and rate limiting for the embeddings API.
+
+Texts are packed into requests by estimated token count, up to the
+per-request limits. Before a request is sent it takes one unit from a
+requests-per-minute bucket and its token estimate from a tokens-per-minute
+bucket, so throughput follows the account quota (EMBED_RPM / EMBED_TPM)
+instead of fixed sleeps.
+"""
+import os
+import asyncio
+import threading
+import time
+from typing import List, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a byte-length estimate
+    tiktoken = None
+
+# Per-request limits of the OpenAI embeddings endpoint
+EMBED_MAX_TOKENS_PER_REQUEST = int(os.getenv("EMBED_MAX_TOKENS_PER_REQUEST", 300000))
+EMBED_MAX_INPUTS_PER_REQUEST = int(os.getenv("EMBED_MAX_INPUTS_PER_REQUEST", 2048))
+# Account quota; <= 0 disables that limit
+EMBED_RPM = float(os.getenv("EMBED_RPM", 3000))
+EMBED_TPM = float(os.getenv("EMBED_TPM", 1000000))
+
+_encodings = {}
+_tiktoken_failed = False    # encoding could not be loaded (e.g. offline BPE download)
+
+
+def _encoding(model):
+    """The tiktoken encoding for model, or None when tiktoken is missing or unusable."""
+    global _tiktoken_failed
+    if tiktoken is None or _tiktoken_failed:
+        return None
+    enc = _encodings.get(model)
+    if enc is None:
+        try:
+            try:
+                enc = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+            except KeyError:
+                enc = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"[WARN] tiktoken encoding unavailable ({e}); estimating tokens from UTF-8 length.")
+            _tiktoken_failed = True
+            return None
+        _encodings[model] = enc
+    return enc
+
+
+def estimate_tokens(text: str, model: str = None) -> int:
+    """
+    Token count of text: exact when a tiktoken encoding can be loaded,
+    otherwise about one token per two UTF-8 bytes (over-counts English,
+    close for Tamil script).
+    """
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text.encode("utf-8")) // 2 + 1
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+    Holds at most one minute's worth; rate_per_minute <= 0 means unlimited.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, amount: float) -> float:
+        """Take amount if available; otherwise return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount is available; returns the seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        # a single request larger than the bucket goes through once it is full
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            wait = self._take(amount)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def aacquire(self, amount: float = 1) -> float:
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking."""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            wait = self._take(amount)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class EmbeddingScheduler:
+    """
+    Packs texts into requests and paces them against the RPM/TPM buckets.
+    One instance should be shared by everything embedding with the same key.
+    """
+
+    def __init__(self, rpm=EMBED_RPM, tpm=EMBED_TPM,
+                 max_tokens=EMBED_MAX_TOKENS_PER_REQUEST, max_inputs=EMBED_MAX_INPUTS_PER_REQUEST):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_tokens = max_tokens
+        self.max_inputs = max_inputs
+        self.requests_sent = 0
+        self.tokens_sent = 0
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def fits(self, tokens: int, count: int) -> bool:
+        """True if count inputs totalling tokens fit in one request."""
+        return count <= self.max_inputs and tokens <= self.max_tokens
+
+    def pack(self, texts: List[str], model: str = None, max_inputs: int = None) -> List[Tuple[int, int, int]]:
+        """
+        Split texts into consecutive requests.
+        Returns (start, end, estimated_tokens) slices in order; an input that
+        alone exceeds max_tokens gets a request of its own. max_inputs caps
+        the inputs per request further (smaller requests to run concurrently).
+        """
+        batches = []
+        start, total = 0, 0
+        for i, text in enumerate(texts):
+            n = estimate_tokens(text, model)
+            count = i - start + 1
+            if i > start and (not self.fits(total + n, count) or (max_inputs and count > max_inputs)):
+                batches.append((start, i, total))
+                start, total = i, 0
+            total += n
+        if start < len(texts):
+            batches.append((start, len(texts), total))
+        return batches
+
+    def acquire(self, tokens: int):
+        """Block until one request carrying tokens is allowed."""
+        waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+        self._count(tokens, waited)
+
+    async def aacquire(self, tokens: int):
+        """acquire() for coroutines."""
+        waited = await self.requests.aacquire(1) + await self.tokens.aacquire(tokens)
+        self._count(tokens, waited)
+
+    def _count(self, tokens, waited):
+        with self._lock:
+            self.requests_sent += 1
+            self.tokens_sent += tokens
+            self.throttled_seconds += waited
+
+    def summary(self) -> str:
+        return (f"Embedding: {self.requests_sent} requests, ~{self.tokens_sent} tokens, "
+                f"{self.throttled_seconds:.1f}s waiting on rate limits")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> EmbeddingScheduler:
+    """Process-wide scheduler, so every caller draws from the same quota."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = EmbeddingScheduler()
+        return _scheduler
@@ -1,21 +1,56 @@
 # ingest/embedder.py
 import os
-import time
+import re
+import asyncio
+import weakref
 import unicodedata
 from typing import List
 from dotenv import load_dotenv
-from openai import OpenAI
+import openai
+from openai import OpenAI, AsyncOpenAI
 import backoff
+from ingest.embedding_cache import get_cache, text_hash
+from ingest.embed_scheduler import get_scheduler
+from ingest.profiling import profiler
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_EMBED_MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", 4))  # aembed_texts requests in flight
 
 if not OPENAI_API_KEY:
     raise RuntimeError("Missing OPENAI_API_KEY in .env")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# retries are done by embed_batch's backoff only, not also inside the client
+client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+# Rate limits, timeouts, dropped connections and 5xx; anything else
+# (bad request, auth, ...) fails immediately.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# BadRequestError messages for a request over the per-request token/input
+# limit; only these are worth splitting (an empty input or one over the
+# model's context length fails the same way in every half)
+_REQUEST_LIMIT = re.compile(r"per request|array too long|at most \d+ (?:items|inputs|elements)", re.IGNORECASE)
+
+# one AsyncOpenAI (and so one HTTP connection pool) per event loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Shared async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    aclient = _async_clients.get(loop)
+    if aclient is None:
+        aclient = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+        _async_clients[loop] = aclient
+    return aclient
 
 def normalize(text: str) -> str:
     """Unicode normalization + strip."""
@@ -24,30 +59,140 @@ def normalize(text: str) -> str:
     return unicodedata.normalize("NFKC", text).strip()
 
 
-@backoff.on_exception(backoff.expo, Exception, max_tries=5)
-def embed_batch(batch: List[str]):
+def _is_request_too_large(err):
+    return getattr(err, "code", None) == "max_tokens_per_request" or bool(_REQUEST_LIMIT.search(str(err)))
+
+
+def _payload_bytes(batch):
+    return sum(len(t.encode("utf-8")) for t in batch)
+
+
+@backoff.on_exception(backoff.expo, RETRYABLE_ERRORS, max_tries=5)
+def embed_batch(batch: List[str], model=OPENAI_EMBED_MODEL):
     """
     Embeds a batch of strings using OpenAI newer embedding API.
     """
-    response = client.embeddings.create(
-        model=OPENAI_EMBED_MODEL,
-        input=batch
-    )
+    with profiler.stage("embed.request", bytes_sent=_payload_bytes(batch), items=len(batch)):
+        response = client.embeddings.create(
+            model=model,
+            input=batch
+        )
     # response.data is a list of embeddings in order
     return [item.embedding for item in response.data]
 
 
-def embed_texts(texts: List[str], batch_size=16, sleep_between=0.05):
+def embed_packed(batch: List[str], tokens: int, model=OPENAI_EMBED_MODEL, scheduler=None):
     """
-    Batch embed text list and return vector list
+    Embeds one packed request after taking its share of the rate limits.
+    If the API rejects it for the per-request limit (token estimate too
+    low), the batch is halved; any other bad request is raised at once.
+    """
+    scheduler = scheduler or get_scheduler()
+    scheduler.acquire(tokens)
+    try:
+        return embed_batch(batch, model=model)
+    except openai.BadRequestError as e:
+        if len(batch) < 2 or not _is_request_too_large(e):
+            raise
+        mid = len(batch) // 2
+        return (embed_packed(batch[:mid], tokens // 2, model, scheduler)
+                + embed_packed(batch[mid:], tokens - tokens // 2, model, scheduler))
+
+
+@backoff.on_exception(backoff.expo, RETRYABLE_ERRORS, max_tries=5)
+async def aembed_batch(batch: List[str], model=OPENAI_EMBED_MODEL, aclient=None):
+    """embed_batch() on the async client."""
+    aclient = aclient or get_async_client()
+    with profiler.stage("embed.request", bytes_sent=_payload_bytes(batch), items=len(batch)):
+        response = await aclient.embeddings.create(model=model, input=batch)
+    return [item.embedding for item in response.data]
+
+
+async def aembed_packed(batch: List[str], tokens: int, model=OPENAI_EMBED_MODEL, scheduler=None, aclient=None):
+    """embed_packed() on the async client."""
+    scheduler = scheduler or get_scheduler()
+    await scheduler.aacquire(tokens)
+    try:
+        return await aembed_batch(batch, model=model, aclient=aclient)
+    except openai.BadRequestError as e:
+        if len(batch) < 2 or not _is_request_too_large(e):
+            raise
+        mid = len(batch) // 2
+        return (await aembed_packed(batch[:mid], tokens // 2, model, scheduler, aclient)
+                + await aembed_packed(batch[mid:], tokens - tokens // 2, model, scheduler, aclient))
+
+
+def _cache_lookup(texts, model, cache):
+    """
+    Normalize texts and read their cached vectors.
+    Returns (keys, found, miss_keys, miss_texts); misses are unique, in
+    first-seen order.
     """
     cleaned = [normalize(t) for t in texts]
+    keys = [text_hash(t) for t in cleaned]
+    found = cache.get_many(model, keys) if cache is not None else {}
+
+    missing = {}
+    for k, t in zip(keys, cleaned):
+        if k not in found and k not in missing:
+            missing[k] = t
+    miss_keys = list(missing)
+    return keys, found, miss_keys, [missing[k] for k in miss_keys]
+
+
+def embed_texts(texts: List[str], model=OPENAI_EMBED_MODEL, cache="default", scheduler=None):
+    """
+    Batch embed text list and return vector list.
+
+    Vectors are looked up in the embedding cache first (one batched read);
+    only the misses go to the API, packed into as few requests as the
+    per-request token limit allows and paced by the shared RPM/TPM
+    scheduler (ingest.embed_scheduler). Each fresh batch is written back.
+    cache="default" uses the shared EMBED_CACHE_PATH cache; None disables it.
+    """
+    if cache == "default":
+        cache = get_cache()
+    scheduler = scheduler or get_scheduler()
+    keys, found, miss_keys, miss_texts = _cache_lookup(texts, model, cache)
+
+    for start, end, tokens in scheduler.pack(miss_texts, model):
+        batch_vectors = embed_packed(miss_texts[start:end], tokens, model=model, scheduler=scheduler)
+        fresh = list(zip(miss_keys[start:end], batch_vectors))
+        found.update(fresh)
+        if cache is not None:
+            cache.put_many(model, fresh)
+
+    return [found[k] for k in keys]
+
+
+async def aembed_texts(texts: List[str], model=OPENAI_EMBED_MODEL, cache="default", scheduler=None,
+                       concurrency=EMBED_CONCURRENCY, batch_size=None, aclient=None):
+    """
+    Async embed_texts(): keeps up to `concurrency` batch requests in flight
+    on one shared HTTP client and returns vectors in input order.
+
+    batch_size caps the inputs per request (below the token-packing limit),
+    trading request size for parallelism; rate limits still apply.
+    """
+    if cache == "default":
+        cache = get_cache()
+    scheduler = scheduler or get_scheduler()
+    # SQLite reads/writes (WAL, fsync) run off the event loop
+    keys, found, miss_keys, miss_texts = await asyncio.to_thread(_cache_lookup, texts, model, cache)
+
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(start, end, tokens):
+        async with slots:
+            batch_vectors = await aembed_packed(miss_texts[start:end], tokens, model=model,
+                                                scheduler=scheduler, aclient=aclient)
+        fresh = list(zip(miss_keys[start:end], batch_vectors))
+        if cache is not None:
+            await asyncio.to_thread(cache.put_many, model, fresh)
+        return fresh
 
-    vectors = []
-    for i in range(0, len(cleaned), batch_size):
-        batch = cleaned[i:i + batch_size]
-        batch_vectors = embed_batch(batch)
-        vectors.extend(batch_vectors)
-        time.sleep(sleep_between)
+    batches = scheduler.pack(miss_texts, model, max_inputs=batch_size)
+    for fresh in await asyncio.gather(*(run(*b) for b in batches)):
+        found.update(fresh)
 
-    return vectors
+    return [found[k] for k in keys]
@@ -0,0 +1,126 @@
+# ingest/embedding_cache.py
+"""
+Disk-backed embedding cache (SQLite).
+
+Key   = (model name, sha256 of the NFKC-normalized text)
+Value = float32 vector
+
+Lookups for a whole batch of texts are a single read (chunked IN query),
+so embed_texts only sends the misses to the API. Set EMBED_CACHE_PATH to an
+empty string (or "off") to disable it.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "data/cache/embedding_cache.sqlite")
+
+# stay well under SQLite's bound-parameter limit
+_IN_CHUNK = 500
+
+
+def text_hash(normalized_text):
+    return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector):
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob):
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+
+    def __init__(self, path=EMBED_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL;")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            );
+        """)
+        self._db.commit()
+
+    def get_many(self, model, hashes):
+        """
+        Batched lookup.
+        Returns: {text_hash: vector} for the hashes that are cached.
+        """
+        wanted = list(dict.fromkeys(hashes))
+        found = {}
+        with self._lock:
+            for i in range(0, len(wanted), _IN_CHUNK):
+                part = wanted[i:i + _IN_CHUNK]
+                placeholders = ",".join("?" * len(part))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = _unpack(blob)
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, model, items):
+        """items: iterable of (text_hash, vector)."""
+        rows = [(model, h, len(vec), _pack(vec)) for h, vec in items]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide cache, or None when disabled via EMBED_CACHE_PATH.
+    Reopened after a fork (SQLite handles must not cross processes).
+    """
+    global _cache, _cache_pid
+    if not EMBED_CACHE_PATH or EMBED_CACHE_PATH.lower() == "off":
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache_pid != os.getpid():
+                _cache = EmbeddingCache()
+                _cache_pid = os.getpid()
+    return _cache
@@ -0,0 +1,145 @@
+# ingest/image_dedup.py
+"""
+Cheap image filters in front of OCR:
+- decorative prefilter: skip tiny or low-entropy (flat) images
+- duplicate images (logos, headers, borders, icons repeated on every page)
+  are OCR'd once and the result is reused. By default only byte-identical
+  crops (sha256 of the PNG) count as duplicates: text-bearing crops with a
+  similar layout (word boxes, labelled diagrams, table cells) can be close
+  in dHash and still say different things. OCR_DEDUP_NEAR=on also reuses
+  results for crops of the same pixel size within OCR_DEDUP_MAX_DISTANCE
+  dHash bits
+"""
+
+import os
+import math
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from PIL import Image
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_DEDUP_NEAR = os.getenv("OCR_DEDUP_NEAR", "off").lower() in ("1", "on", "true")  # opt-in near-duplicates
+OCR_DEDUP_MAX_DISTANCE = int(os.getenv("OCR_DEDUP_MAX_DISTANCE", 0))  # Hamming bits out of 64 (near mode)
+OCR_DEDUP_MAX_ENTRIES = int(os.getenv("OCR_DEDUP_MAX_ENTRIES", 2048))
+MIN_IMAGE_SIDE = int(os.getenv("MIN_IMAGE_SIDE", 32))                 # pixels
+MIN_IMAGE_ENTROPY = float(os.getenv("MIN_IMAGE_ENTROPY", 0.1))        # bits; flat fills/rules are ~0
+
+
+def dhash(img, size=8):
+    """64-bit difference hash: compares neighbouring pixels of a 9x8 grayscale thumbnail."""
+    small = img.convert("L").resize((size + 1, size), Image.BILINEAR)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return bits
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# digest: sha256 of the PNG bytes; dhash: 64-bit dHash; size: (width, height)
+ImageKey = namedtuple("ImageKey", "digest dhash size")
+
+
+def image_key(img, png_bytes):
+    return ImageKey(hashlib.sha256(png_bytes).hexdigest(), dhash(img), img.size)
+
+
+def image_entropy(img):
+    """Shannon entropy (bits) of the grayscale histogram, on a thumbnail."""
+    gray = img.convert("L")
+    gray.thumbnail((128, 128))
+    hist = gray.histogram()
+    total = float(sum(hist)) or 1.0
+    return -sum((c / total) * math.log2(c / total) for c in hist if c)
+
+
+def decorative_reason(img, min_side=MIN_IMAGE_SIDE, min_entropy=MIN_IMAGE_ENTROPY):
+    """Returns "small" / "low_entropy" for images not worth OCR, else None."""
+    if min(img.size) < min_side:
+        return "small"
+    if image_entropy(img) < min_entropy:
+        return "low_entropy"
+    return None
+
+
+class ImageDeduper:
+    """
+    Duplicate index: ImageKey → OCR result, LRU-bounded.
+    Exact matches are a dict lookup; near mode adds a linear Hamming scan
+    over same-size entries, which is fine for a few thousand distinct
+    images per book.
+    """
+
+    def __init__(self, near=OCR_DEDUP_NEAR, max_distance=OCR_DEDUP_MAX_DISTANCE, max_entries=OCR_DEDUP_MAX_ENTRIES):
+        self.near = near
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # digest → (ImageKey, result)
+        self._lock = threading.Lock()
+
+    def same_image(self, a, b):
+        """Identical bytes, or (near mode) same pixel size and dHash within max_distance."""
+        if a.digest == b.digest:
+            return True
+        return self.near and a.size == b.size and hamming(a.dhash, b.dhash) <= self.max_distance
+
+    def lookup(self, key):
+        with self._lock:
+            if key.digest in self._entries:
+                self._entries.move_to_end(key.digest)
+                return self._entries[key.digest][1]
+            if self.near:
+                for digest, (known, result) in self._entries.items():
+                    if self.same_image(known, key):
+                        self._entries.move_to_end(digest)
+                        return result
+        return None
+
+    def add(self, key, result):
+        with self._lock:
+            self._entries[key.digest] = (key, result)
+            self._entries.move_to_end(key.digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class OCRStats:
+    """Counters for the ingest report (per process; pool workers send theirs back)."""
+
+    FIELDS = ("images_seen", "ocr_requests", "dedup_hits", "skipped_small", "skipped_low_entropy")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        for f in self.FIELDS:
+            setattr(self, f, 0)
+
+    def add(self, **counts):
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def merge(self, other):
+        self.add(**other)
+
+    def as_dict(self):
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def calls_avoided(self):
+        return self.dedup_hits + self.skipped_small + self.skipped_low_entropy
+
+    def summary(self):
+        return (f"OCR: {self.ocr_requests} requests, {self.images_seen} embedded images seen, "
+                f"{self.calls_avoided()} calls avoided ({self.dedup_hits} duplicates reused, "
+                f"{self.skipped_small} tiny + {self.skipped_low_entropy} low-entropy images skipped)")
@@ -0,0 +1,118 @@
+# ingest/manifest.py
+"""
+Page manifest for incremental re-ingestion.
+
+Stores, per page, a content hash of everything that feeds chunking
+(selectable text, full-page OCR text/blocks, embedded-image OCR and the
+sha256 of every embedded-image crop) and the chunk_ids written for that
+page. The hash does not depend on --figures; "figures" marks pages whose
+figure crops were written to the figure index by a --figures run:
+
+{
+  "pdf": "data/tamil_grade8_book.pdf",
+  "pages": {
+    "12": {"hash": "...", "chunk_ids": ["...", "..."], "figures": true}
+  }
+}
+"""
+
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MANIFEST_PATH = os.getenv("MANIFEST_PATH", "data/ingest_manifest.json")
+
+
+def page_hash(page):
+    """
+    sha256 over the extracted text and OCR output of one page dict and its
+    image crops' sha256 (set by ingest.pdf_ingest on every run), so a
+    redrawn figure with unchanged OCR text still counts as a change.
+    """
+    images = []
+    for im in page.get("images", []) or []:
+        ocr = im.get("ocr")
+        entry = {
+            "bbox": list(im.get("bbox") or []),
+            "text": ocr.get("text", "") if isinstance(ocr, dict) else "",
+            "error": im.get("error"),
+        }
+        if im.get("sha256"):
+            entry["sha256"] = im["sha256"]
+        images.append(entry)
+    payload = {
+        "text": page.get("text", "") or "",
+        "blocks": page.get("blocks", []) or [],
+        "images": images,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"pdf": None, "pages": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data.setdefault("pages", {})
+    return data
+
+
+def write_json_atomic(data, path):
+    """
+    Durable atomic write: temp file, fsync, rename, fsync the directory.
+    A crash or kill leaves either the old or the new file, never half of one.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(folder or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Atomic write (temp file + rename) so a crash never leaves half a manifest."""
+    write_json_atomic(manifest, path)
+
+
+def page_changed(page, manifest, figures=False):
+    """
+    True when the page is new or its content hash differs from the manifest;
+    with figures=True also when it has images that are not in the figure
+    index yet (e.g. the first --figures run).
+    """
+    known = manifest.get("pages", {}).get(str(page["page"]), {})
+    if known.get("hash") != page_hash(page):
+        return True
+    return bool(figures and page.get("images") and not known.get("figures"))
+
+
+def removed_pages(total_pages, manifest):
+    """Page numbers recorded in the manifest that are past the end of the PDF."""
+    return sorted(int(k) for k in manifest.get("pages", {}) if int(k) > total_pages)
+
+
+def record_page(manifest, page_num, content_hash, chunk_ids, figures=False):
+    """figures=True: the page's figures were written too (--figures run)."""
+    entry = {"hash": content_hash, "chunk_ids": list(chunk_ids)}
+    if figures:
+        entry["figures"] = True
+    manifest.setdefault("pages", {})[str(page_num)] = entry
+
+
+def forget_page(manifest, page_num):
+    """Drop a page so the next incremental run processes it again."""
+    manifest.setdefault("pages", {}).pop(str(page_num), None)
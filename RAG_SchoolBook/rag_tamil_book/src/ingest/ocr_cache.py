@@ -0,0 +1,143 @@
+# ingest/ocr_cache.py
+"""
+Content-addressed OCR result cache (SQLite).
+
+Key   = sha256(image bytes) + language + return_layout flag
+Value = full DeepSeek JSON response
+
+The cache is bounded by OCR_CACHE_MAX_MB; when it grows past the limit the
+least recently used entries are evicted. Set OCR_CACHE_PATH to an empty
+string (or "off") to disable it.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", "data/cache/ocr_cache.sqlite")
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", 1024))
+
+# how often (in puts) the total size is re-checked against the limit
+EVICT_CHECK_EVERY = 32
+
+
+def cache_key(image_bytes, language="ta", return_layout=False):
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"{digest}:{language}:{int(bool(return_layout))}"
+
+
+class OCRCache:
+    """
+    Thread-safe; several processes may share the same file (SQLite WAL),
+    which is how the --workers page pool uses it.
+    """
+
+    def __init__(self, path=OCR_CACHE_PATH, max_bytes=int(OCR_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL;")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results (last_used);")
+        self._db.commit()
+
+    def get(self, key):
+        """Returns the cached OCR JSON (dict) or None."""
+        with self._lock:
+            row = self._db.execute("SELECT response FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._db.commit()
+            self._puts += 1
+            if self._puts % EVICT_CHECK_EVERY == 0:
+                self._evict_locked()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            return self._evict_locked()
+
+    def _evict_locked(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        # keep the newest entries whose running size fits the limit
+        cur = self._db.execute("""
+            DELETE FROM ocr_results WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running
+                    FROM ocr_results
+                ) WHERE running > ?
+            )
+        """, (self.max_bytes,))
+        self._db.commit()
+        return cur.rowcount
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide cache, or None when disabled via OCR_CACHE_PATH.
+    Reopened after a fork (SQLite handles must not cross processes).
+    """
+    global _cache, _cache_pid
+    if not OCR_CACHE_PATH or OCR_CACHE_PATH.lower() == "off":
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache_pid != os.getpid():
+                _cache = OCRCache()
+                _cache_pid = os.getpid()
+    return _cache
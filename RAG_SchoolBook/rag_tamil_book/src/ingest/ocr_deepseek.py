@@ -4,17 +4,26 @@ DeepSeek OCR client – supports:
 - Image OCR
 - Tamil OCR (default)
 - Layout extraction (blocks, bounding boxes)
+- Concurrent requests over one pooled keep-alive session
+- Persistent content-addressed result cache (ingest.ocr_cache)
 """
 
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from ingest.ocr_cache import get_cache, cache_key
+from ingest.profiling import profiler
 
 load_dotenv()
 
 # Load environment variables
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 DEEPSEEK_OCR_URL = os.getenv("DEEPSEEK_OCR_URL")
+OCR_MAX_IN_FLIGHT = int(os.getenv("OCR_MAX_IN_FLIGHT", 8))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 120))
 
 if not DEEPSEEK_API_KEY:
     raise RuntimeError("DEEPSEEK_API_KEY missing in .env")
@@ -22,9 +31,127 @@ if not DEEPSEEK_API_KEY:
 if not DEEPSEEK_OCR_URL:
     raise RuntimeError("DEEPSEEK_OCR_URL missing in .env")
 
-HEADERS = {
-    "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-}
+class DeepSeekOCRClient:
+    """
+    Threaded OCR client:
+    - one persistent requests.Session (keep-alive, pooled connections)
+    - at most `max_in_flight` requests on the wire at any time
+    - ocr_many() returns results in input order
+    - cache hits (same image bytes/language/layout flag) skip the API
+    """
+
+    def __init__(self, url=DEEPSEEK_OCR_URL, api_key=DEEPSEEK_API_KEY,
+                 max_in_flight=OCR_MAX_IN_FLIGHT, timeout=OCR_TIMEOUT, cache="default"):
+        self.url = url
+        self.timeout = timeout
+        # cache="default" → shared OCR_CACHE_PATH cache; None disables it
+        self.cache = get_cache() if cache == "default" else cache
+        self.api_calls = 0
+        self._count_lock = threading.Lock()   # _post runs on the executor threads
+        self.max_in_flight = max(1, int(max_in_flight))
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # pool size == in-flight limit, so the executor is the throttle
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                            thread_name_prefix="deepseek-ocr")
+
+    def ocr(self, image_bytes, language="ta", return_layout=False):
+        """Blocking single OCR call over the shared session (cache first)."""
+        key = None
+        if self.cache is not None:
+            key = cache_key(image_bytes, language, return_layout)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._post(image_bytes, language, return_layout)
+
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def _post(self, image_bytes, language, return_layout):
+        files = {
+            "file": ("image.png", image_bytes, "image/png")
+        }
+
+        params = {
+            "language": language
+        }
+
+        # Enable block-level layout extraction
+        if return_layout:
+            params["layout"] = "true"
+
+        with self._count_lock:
+            self.api_calls += 1
+        try:
+            with profiler.stage("ocr.request", bytes_sent=len(image_bytes), items=1):
+                resp = self.session.post(
+                    self.url,
+                    files=files,
+                    params=params,
+                    timeout=self.timeout
+                )
+                resp.raise_for_status()
+                return resp.json()
+
+        except requests.exceptions.HTTPError as http_err:
+            raise RuntimeError(f"DeepSeek OCR HTTP error: {http_err}")
+
+        except Exception as e:
+            raise RuntimeError(f"DeepSeek OCR request failed: {e}")
+
+    def submit(self, image_bytes, language="ta", return_layout=False):
+        """Queue one OCR call; returns a concurrent.futures.Future."""
+        return self._executor.submit(self.ocr, image_bytes, language, return_layout)
+
+    def ocr_many(self, images, language="ta", return_layout=False, return_exceptions=True):
+        """
+        OCR a list of image bytes concurrently.
+
+        Returns a list aligned with `images`. With return_exceptions=True a
+        failed call leaves its RuntimeError in place instead of raising, so
+        one bad image does not lose the rest of the window.
+        """
+        futures = [self.submit(img, language, return_layout) for img in images]
+        results = []
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Process-wide shared client. Created lazily and rebuilt after a fork,
+    so every worker process in a pool gets its own session and threads.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = DeepSeekOCRClient()
+                _client_pid = os.getpid()
+    return _client
 
 
 def ocr_image_bytes(image_bytes, language="ta", return_layout=False):
@@ -43,35 +170,7 @@ def ocr_image_bytes(image_bytes, language="ta", return_layout=False):
                 "blocks": [...]
               }
     """
-
-    files = {
-        "file": ("image.png", image_bytes, "image/png")
-    }
-
-    params = {
-        "language": language
-    }
-
-    # Enable block-level layout extraction
-    if return_layout:
-        params["layout"] = "true"
-
-    try:
-        resp = requests.post(
-            DEEPSEEK_OCR_URL,
-            headers=HEADERS,
-            files=files,
-            params=params,
-            timeout=120
-        )
-        resp.raise_for_status()
-        return resp.json()
-
-    except requests.exceptions.HTTPError as http_err:
-        raise RuntimeError(f"DeepSeek OCR HTTP error: {http_err}")
-
-    except Exception as e:
-        raise RuntimeError(f"DeepSeek OCR request failed: {e}")
+    return get_client().ocr(image_bytes, language=language, return_layout=return_layout)
 
 
 def ocr_file(path, language="ta", return_layout=False):
@@ -2,8 +2,28 @@
 import pdfplumber
 from io import BytesIO
 from PIL import Image
+import os
+import math
 import unicodedata
-from ingest.ocr_deepseek import ocr_image_bytes
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.pdftypes import resolve1
+from ingest.ocr_deepseek import ocr_image_bytes, get_client
+from ingest.image_dedup import ImageDeduper, OCRStats, decorative_reason, image_key
+from ingest.profiling import profiler
+
+# Pages whose OCR calls are fanned out together (per worker process)
+OCR_PAGE_WINDOW = int(os.getenv("OCR_PAGE_WINDOW", 8))
+RENDER_RESOLUTION = 300
+# "raster": always crop from the page raster (default, what the page shows);
+# "native": decode embedded image streams directly when possible (no
+# clipping/rotation, /Decode or SMask applied), else crop from the raster
+IMAGE_EXTRACT_MODE = os.getenv("IMAGE_EXTRACT_MODE", "raster").lower()
+
+# per-process: dedup index of OCR'd images, and counters for the ingest report
+image_deduper = ImageDeduper()
+ocr_stats = OCRStats()
 
 
 def normalize_text(text):
@@ -13,32 +33,149 @@ def normalize_text(text):
     return unicodedata.normalize("NFKC", text).strip()
 
 
+def render_page_image(page, resolution=RENDER_RESOLUTION):
+    """Rasterize a full page once; returns a PIL image of page.bbox."""
+    with profiler.stage("pdf.render", items=1):
+        return page.to_image(resolution=resolution).original
+
+
+def to_png_bytes(img):
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def crop_from_raster(page_img, page, bbox, resolution=RENDER_RESOLUTION):
+    """Crop a PDF-coordinate bbox out of a page raster (no re-rendering)."""
+    scale = resolution / 72.0
+    ox, oy = page.bbox[0], page.bbox[1]
+    box = (
+        max(0, int(round((bbox[0] - ox) * scale))),
+        max(0, int(round((bbox[1] - oy) * scale))),
+        min(page_img.width, int(round((bbox[2] - ox) * scale))),
+        min(page_img.height, int(round((bbox[3] - oy) * scale))),
+    )
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return page_img.crop(box)
+
+
+def _literal_name(obj):
+    """PSLiteral / resolved object / str → plain name string."""
+    obj = resolve1(obj)
+    name = getattr(obj, "name", obj)
+    if isinstance(name, bytes):
+        name = name.decode("latin-1")
+    return name if isinstance(name, str) else None
+
+
+def _native_mode(img_dict):
+    """PIL mode for an unfiltered/Flate image stream, or None if unsupported."""
+    if img_dict.get("imagemask") or img_dict.get("bits") != 8:
+        return None
+    cs = img_dict.get("colorspace") or []
+    cs = resolve1(cs[0]) if isinstance(cs, list) and cs else resolve1(cs)
+    if isinstance(cs, list) and cs and _literal_name(cs[0]) == "ICCBased":
+        n = resolve1(cs[1]).attrs.get("N") if len(cs) > 1 else None
+        return {1: "L", 3: "RGB", 4: "CMYK"}.get(n)
+    return {"DeviceGray": "L", "DeviceRGB": "RGB", "DeviceCMYK": "CMYK"}.get(_literal_name(cs))
+
+
+# filters pdfminer can undo in stream.get_data()
+_TRANSPORT_FILTERS = {"FlateDecode", "Fl", "ASCII85Decode", "A85", "ASCIIHexDecode", "AHx",
+                      "LZWDecode", "LZW", "RunLengthDecode", "RL"}
+
+
+def native_image(img_dict):
+    """
+    Decode the image stream stored in the PDF, skipping rasterization:
+    - DCTDecode (JPEG) streams are opened as JPEG
+    - Flate/ASCII85/... 8-bit Gray/RGB/CMYK streams become raw pixels
+    Returns a PIL image, or None when the stream needs the renderer
+    (masks, indexed colors, JBIG2/JPX...).
+    Note: this is the image as stored; clipping/rotation applied on the page,
+    /Decode arrays and soft masks (SMask) are not reproduced.
+    """
+    stream = img_dict.get("stream")
+    if stream is None:
+        return None
+    try:
+        filters = [_literal_name(f) for f, _ in stream.get_filters()]
+        if filters and filters[-1] in ("DCTDecode", "DCT") and set(filters[:-1]) <= _TRANSPORT_FILTERS:
+            # get_data() undoes the transport filters and leaves the JPEG as-is
+            img = Image.open(BytesIO(stream.get_data()))
+            img.load()
+            return img if img.mode in ("L", "RGB") else img.convert("RGB")
+        if set(filters) <= _TRANSPORT_FILTERS:
+            mode = _native_mode(img_dict)
+            if mode is None:
+                return None
+            width, height = img_dict["srcsize"]
+            img = Image.frombytes(mode, (int(width), int(height)), stream.get_data())
+            return img.convert("RGB") if mode == "CMYK" else img
+    except Exception:
+        return None
+    return None
+
+
+def page_image_crops(page, resolution=RENDER_RESOLUTION, mode=None):
+    """
+    Yields (bbox, PIL image) for every embedded image of the page.
+
+    The page is rendered at most once (lazily, only when some image cannot
+    be taken from its native stream) and every bbox is cropped from that
+    raster in memory. mode="native" (or IMAGE_EXTRACT_MODE=native) first
+    tries each image's stored stream (native_image).
+    """
+    mode = mode or IMAGE_EXTRACT_MODE
+    page_img = None
+    for img_dict in page.images:
+        bbox = (img_dict["x0"], img_dict["top"], img_dict["x1"], img_dict["bottom"])
+        try:
+            img = native_image(img_dict) if mode == "native" else None
+            if img is None:
+                if page_img is None:
+                    page_img = render_page_image(page, resolution)
+                img = crop_from_raster(page_img, page, bbox, resolution)
+        except Exception:
+            img = None
+        if img is not None:
+            yield bbox, img
+
+
 def image_from_page(page, img_dict):
     """
     Extract a PDF-embedded image using its bbox.
     Returns: (image_bytes, bbox) or (None, None)
+    Kept only for API compatibility; the ingest path uses page_image_crops(),
+    which renders the page once for all its images.
     """
     bbox = (img_dict["x0"], img_dict["top"], img_dict["x1"], img_dict["bottom"])
     try:
-        # Render only the region inside the bounding box
-        cropped_img = page.within_bbox(bbox).to_image(resolution=300).original
-        buf = BytesIO()
-        cropped_img.save(buf, format="PNG")
-        return buf.getvalue(), bbox
+        img = native_image(img_dict) if IMAGE_EXTRACT_MODE == "native" else None
+        if img is None:
+            img = crop_from_raster(render_page_image(page), page, bbox)
+        if img is None:
+            return None, None
+        return to_png_bytes(img), bbox
     except Exception:
         return None, None
 
 
+def render_page_png(page):
+    """Rasterize a full page at 300 DPI and return PNG bytes."""
+    return to_png_bytes(render_page_image(page))
+
+
 def extract_full_page_ocr(page, ocr_language="ta"):
     """
     OCR for full page — used when there is NO selectable text.
     Returns: (text, blocks)
+    Kept only for API compatibility; the ingest path plans full-page OCR in
+    plan_page_ocr() and sends it with the rest of the window.
     """
     try:
-        page_img = page.to_image(resolution=300).original
-        buf = BytesIO()
-        page_img.save(buf, format="PNG")
-        image_bytes = buf.getvalue()
+        image_bytes = render_page_png(page)
 
         ocr_res = ocr_image_bytes(image_bytes, language=ocr_language, return_layout=True)
         text = normalize_text(ocr_res.get("text", ""))
@@ -49,10 +186,259 @@ def extract_full_page_ocr(page, ocr_language="ta"):
         return "", []
 
 
-def extract_pages(pdf_path, ocr_language="ta"):
+def plan_page_ocr(page, idx):
+    """
+    First pass over a page: selectable text plus every image that needs OCR.
+    No network calls happen here. Decorative images (tiny / flat) are
+    dropped and every kept crop gets an ImageKey (sha256 + dHash + size)
+    for deduplication.
+
+    Returns: (page_dict, jobs) where jobs is a list of
+             (kind, bbox, image_bytes, key), kind = "page" | "image"
+    """
+    with profiler.stage("pdf.page", items=1):
+        return _plan_page_ocr(page, idx)
+
+
+def _plan_page_ocr(page, idx):
+    """plan_page_ocr() body, timed as stage "pdf.page" (rendering is "pdf.render")."""
+    # 1️⃣ Try extracting text directly (for digital PDFs)
+    selectable_text = normalize_text(page.extract_text() or "")
+
+    # 2️⃣ If no text → scanned page → OCR whole page
+    if not selectable_text.strip():
+        page_out = {"page": idx, "text": "", "blocks": [], "images": []}
+        try:
+            return page_out, [("page", None, render_page_png(page), None)]
+        except Exception:
+            return page_out, []
+
+    # 3️⃣ If text exists → also extract embedded images (page rendered once)
+    jobs = []
+    for bbox, img in page_image_crops(page):
+        ocr_stats.add(images_seen=1)
+        reason = decorative_reason(img)
+        if reason:
+            ocr_stats.add(**{f"skipped_{reason}": 1})
+            continue
+        png = to_png_bytes(img)
+        jobs.append(("image", bbox, png, image_key(img, png)))
+
+    page_out = {
+        "page": idx,
+        "text": selectable_text,
+        "blocks": [],       # only used in full-page OCR mode
+        "images": []
+    }
+    return page_out, jobs
+
+
+def ocr_page_window(planned, ocr_language="ta", keep_images=False):
+    """
+    Fan out every OCR call (full pages and embedded images) of a window of
+    planned pages at once, then fill the results into the page dicts.
+
+    Images identical to one already OCR'd (earlier in this process, or
+    earlier in this window; see ImageDeduper.same_image) reuse that result
+    instead of a new call.
+
+    planned: list of (page_dict, jobs) from plan_page_ocr()
+    keep_images: also keep each image's PNG bytes ("png") and perceptual
+                 hash ("phash") in its entry, for the figure index. The
+                 crop's sha256 ("sha256") is always kept: it is part of the
+                 manifest's page hash.
+    Returns: list of page dicts in the same order.
+    """
+    flat = [(page_out, kind, bbox, img, ph) for page_out, jobs in planned for kind, bbox, img, ph in jobs]
+    results = [None] * len(flat)
+    to_send = []
+    same_as = {}        # job index → index of its duplicate in this window
+
+    for i, (_, _, _, _, ph) in enumerate(flat):
+        if ph is None:
+            to_send.append(i)
+            continue
+        known = image_deduper.lookup(ph)
+        if known is not None:
+            results[i] = known
+            ocr_stats.add(dedup_hits=1)
+            continue
+        rep = next((j for j in to_send if flat[j][4] is not None
+                    and image_deduper.same_image(flat[j][4], ph)), None)
+        if rep is not None:
+            same_as[i] = rep
+            ocr_stats.add(dedup_hits=1)
+            continue
+        to_send.append(i)
+
+    sent = get_client().ocr_many(
+        [flat[i][3] for i in to_send], language=ocr_language, return_layout=True
+    )
+    ocr_stats.add(ocr_requests=len(to_send))
+    for i, res in zip(to_send, sent):
+        results[i] = res
+        ph = flat[i][4]
+        if ph is not None and not isinstance(res, Exception):
+            image_deduper.add(ph, res)
+    for i, rep in same_as.items():
+        results[i] = results[rep]
+
+    for (page_out, kind, bbox, img, ph), res in zip(flat, results):
+        if kind == "page":
+            # failed full-page OCR keeps empty text/blocks
+            if not isinstance(res, Exception):
+                page_out["text"] = normalize_text(res.get("text", ""))
+                page_out["blocks"] = res.get("blocks", [])
+            continue
+        entry = {"bbox": bbox, "error": str(res)} if isinstance(res, Exception) else {"bbox": bbox, "ocr": res}
+        entry["sha256"] = ph.digest if ph else None
+        if keep_images:
+            entry.update(png=img, phash=ph.dhash if ph else None)
+        page_out["images"].append(entry)
+
+    return [page_out for page_out, _ in planned]
+
+
+def extract_single_page(page, idx, ocr_language="ta"):
+    """
+    Extract text + OCR for one pdfplumber page.
+    Returns a page dict (see extract_pages for the shape).
+    """
+    return ocr_page_window([plan_page_ocr(page, idx)], ocr_language)[0]
+
+
+def release_page(page):
+    """Drop pdfplumber's cached objects/layout of a page we are done with."""
+    close = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+    if close:
+        close()
+
+
+def iter_page_range(pdf_path, start, end, ocr_language="ta", window=OCR_PAGE_WINDOW, skip_pages=None,
+                    keep_images=False):
+    """
+    Generator over pages [start, end) (0-based) with its own pdfplumber
+    handle. OCR calls are issued concurrently for `window` pages at a time;
+    each page's caches are released as soon as it has been rendered, so at
+    most one window of pages is held in memory.
+    skip_pages: 1-based page numbers that are not opened at all.
+    keep_images: keep figure crops in the page dicts (see ocr_page_window).
+    """
+    window = max(1, window)
+    planned = []
+    numbers = [n for n in range(start + 1, end + 1) if not skip_pages or n not in skip_pages]
+    if not numbers:
+        return
+
+    # pages= limits pdfplumber to the range instead of building every Page
+    with pdfplumber.open(pdf_path, pages=numbers) as pdf:
+        for page in pdf.pages:
+            planned.append(plan_page_ocr(page, page.page_number))
+            release_page(page)
+            if len(planned) >= window:
+                yield from ocr_page_window(planned, ocr_language, keep_images)
+                planned = []
+
+        if planned:
+            yield from ocr_page_window(planned, ocr_language, keep_images)
+
+
+def extract_page_range(pdf_path, start, end, ocr_language="ta", window=OCR_PAGE_WINDOW):
+    """
+    Worker entry point: extracts pages [start, end) (0-based).
+    Returns page dicts in page order.
+    """
+    return list(iter_page_range(pdf_path, start, end, ocr_language, window))
+
+
+def _extract_range_worker(pdf_path, start, end, ocr_language, window, skip_pages=None, keep_images=False,
+                          profile=False):
+    """Pool task: page dicts of a range plus this task's OCR counters and stage profile."""
+    ocr_stats.reset()
+    profiler.reset()
+    profiler.enabled = profile
+    pages = list(iter_page_range(pdf_path, start, end, ocr_language, window, skip_pages, keep_images))
+    return pages, ocr_stats.as_dict(), profiler.snapshot()
+
+
+def page_ranges(total_pages, workers, ranges_per_worker=4, max_size=None):
+    """
+    Split [0, total_pages) into contiguous ranges.
+    Several small ranges per worker keep the pool busy when some pages
+    (scanned ones) are much slower than others; max_size caps a range so
+    worker results stay small regardless of book size.
+    """
+    if total_pages <= 0:
+        return []
+    n_ranges = max(1, min(total_pages, workers * ranges_per_worker))
+    size = math.ceil(total_pages / n_ranges)
+    if max_size:
+        size = max(1, min(size, max_size))
+    return [(s, min(s + size, total_pages)) for s in range(0, total_pages, size)]
+
+
+def count_pages(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_pages(pdf_path, ocr_language="ta", workers=1, window=OCR_PAGE_WINDOW, skip_pages=None,
+               keep_images=False):
+    """
+    Streaming version of extract_pages: yields page dicts in page order.
+
+    workers > 1 hands page ranges (at most `window` pages each) to a
+    process pool, with only 2 ranges per worker submitted ahead, so memory
+    stays flat however long the book is. Worker OCR counters are merged into
+    this process's ocr_stats (near-duplicate reuse is per worker process;
+    exact repeats across workers are caught by the OCR cache).
+    skip_pages: 1-based page numbers to leave out without extracting them
+    (e.g. pages a resumed ingest already finished).
+    keep_images: keep each figure crop's PNG bytes and perceptual hash in
+    the page dicts' "images" entries (for the figure index).
+    """
+    total = count_pages(pdf_path)
+    skip_pages = frozenset(skip_pages or ())
+
+    if not workers or workers <= 1:
+        yield from iter_page_range(pdf_path, 0, total, ocr_language, window, skip_pages, keep_images)
+        return
+
+    def submit(start, end):
+        skip = frozenset(n for n in skip_pages if start < n <= end)
+        return pool.submit(_extract_range_worker, pdf_path, start, end, ocr_language, window, skip, keep_images,
+                           profiler.enabled)
+
+    ranges = iter(page_ranges(total, workers, max_size=window))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for start, end in islice(ranges, workers * 2):
+            pending.append(submit(start, end))
+
+        # futures are in page-range order, so results stay in page order
+        while pending:
+            fut = pending.popleft()
+            for start, end in islice(ranges, 1):
+                pending.append(submit(start, end))
+            pages, stats, profile = fut.result()
+            ocr_stats.merge(stats)
+            profiler.merge(profile)
+            yield from pages
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=True)
+
+
+def extract_pages(pdf_path, ocr_language="ta", workers=1):
     """
     Extract text + OCR from a PDF.
 
+    workers > 1 hands page ranges to a process pool; each worker opens
+    its own pdfplumber handle. Output order and shape are the same in
+    both modes. Use iter_pages() to stream instead of materializing.
+
     Returns a list:
     [
       {
@@ -62,58 +448,11 @@ def extract_pages(pdf_path, ocr_language="ta"):
         "images": [
             {
                 "bbox": (x0, top, x1, bottom),
-                "ocr": {...}   # DeepSeek OCR output
+                "ocr": {...},      # DeepSeek OCR output
+                "sha256": "..."    # of the PNG crop
             }
         ]
       }
     ]
     """
-
-    pages_output = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for idx, page in enumerate(pdf.pages, start=1):
-
-            # 1️⃣ Try extracting text directly (for digital PDFs)
-            selectable_text = normalize_text(page.extract_text() or "")
-
-            # 2️⃣ If no text → scanned page → OCR whole page
-            if not selectable_text.strip():
-                full_text, blocks = extract_full_page_ocr(page, ocr_language)
-
-                pages_output.append({
-                    "page": idx,
-                    "text": full_text,
-                    "blocks": blocks,
-                    "images": []
-                })
-                continue
-
-            # 3️⃣ If text exists → also extract embedded images
-            images_info = []
-
-            for img_dict in page.images:
-                img_bytes, bbox = image_from_page(page, img_dict)
-
-                if img_bytes:
-                    try:
-                        ocr_res = ocr_image_bytes(img_bytes, language=ocr_language, return_layout=True)
-                        images_info.append({
-                            "bbox": bbox,
-                            "ocr": ocr_res
-                        })
-                    except Exception as e:
-                        images_info.append({
-                            "bbox": bbox,
-                            "error": str(e)
-                        })
-
-            # Combine
-            pages_output.append({
-                "page": idx,
-                "text": selectable_text,
-                "blocks": [],       # only used in full-page OCR mode
-                "images": images_info
-            })
-
-    return pages_output
+    return list(iter_pages(pdf_path, ocr_language, workers))
@@ -0,0 +1,293 @@
+# ingest/profiling.py
+"""
+Per-stage ingest profiling.
+
+Instrumented calls record, under a stage name ("pdf.page", "ocr.request",
+"embed.request", "pg.copy", "pg.merge", "neo4j.page_nodes", ...), their
+latency, bytes sent and items handled:
+
+    with profiler.stage("embed.request", bytes_sent=n) as rec:
+        vectors = call()
+        rec.items = len(vectors)
+
+The module-level `profiler` is shared by the whole process and records
+nothing until an ingest entry point calls profiler.start() (the app's
+query paths share these modules but never report a profile); extraction
+pool workers send a snapshot back that the parent merges (like ocr_stats).
+report() / summary() / to_prometheus() turn it into a dict, a table and
+Prometheus text exposition; write() saves JSON + .prom files per run.
+
+Time spent in a stage nested inside another one on the same thread
+(pdf.render inside pdf.page) counts only for the inner stage, so busy
+times of all stages add up without double counting.
+
+Percentiles come from a uniform reservoir sample of at most
+PROFILE_SAMPLE_SIZE latencies per stage (exact until it fills), so a
+long run keeps bounded memory.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")  # "" or "off" disables writing reports
+
+PROFILE_SAMPLE_SIZE = int(os.getenv("PROFILE_SAMPLE_SIZE", 4096))  # latencies kept per stage
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+class _Record:
+    """Handed to the `with` body so it can fill in counts known only afterwards."""
+    __slots__ = ("bytes_sent", "items")
+
+    def __init__(self, bytes_sent, items):
+        self.bytes_sent = bytes_sent
+        self.items = items
+
+
+def _merge_samples(ours, n_ours, theirs, n_theirs, size, rng):
+    """
+    Uniform sample of size `size` of the union of two populations of
+    n_ours and n_theirs values, given a uniform sample of each.
+    """
+    if len(ours) + len(theirs) <= size:
+        return ours + theirs
+    ours, theirs = rng.sample(ours, len(ours)), rng.sample(theirs, len(theirs))
+    out = []
+    while len(out) < size and (ours or theirs):
+        pick_ours = theirs == [] or (ours and rng.random() < n_ours / (n_ours + n_theirs))
+        out.append(ours.pop() if pick_ours else theirs.pop())
+    return out
+
+
+class StageStats:
+    def __init__(self, sample_size=PROFILE_SAMPLE_SIZE):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        self.items = 0
+        self.first_start = None     # wall clock, comparable across processes
+        self.last_end = None
+        self.max_latency = 0.0
+        self.sample_size = sample_size
+        self.latencies = []         # reservoir sample (algorithm R) of call latencies
+        self._rng = random.Random()
+
+    def _sample(self, seconds):
+        if len(self.latencies) < self.sample_size:
+            self.latencies.append(seconds)
+        else:
+            slot = self._rng.randrange(self.calls)
+            if slot < self.sample_size:
+                self.latencies[slot] = seconds
+
+    def add(self, seconds, bytes_sent=0, items=0, error=False, start=None, end=None):
+        start = time.time() - seconds if start is None else start
+        self.calls += 1
+        self.errors += int(bool(error))
+        self.seconds += seconds
+        self.bytes_sent += bytes_sent
+        self.items += items
+        self.max_latency = max(self.max_latency, seconds)
+        self._sample(seconds)
+        self.first_start = start if self.first_start is None else min(self.first_start, start)
+        end = start + seconds if end is None else end
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def merge(self, snap):
+        self.latencies = _merge_samples(self.latencies, self.calls, list(snap["latencies"]), snap["calls"],
+                                        self.sample_size, self._rng)
+        self.max_latency = max(self.max_latency, snap.get("max_latency", 0.0))
+        self.calls += snap["calls"]
+        self.errors += snap["errors"]
+        self.seconds += snap["seconds"]
+        self.bytes_sent += snap["bytes_sent"]
+        self.items += snap["items"]
+        for attr, pick in (("first_start", min), ("last_end", max)):
+            theirs = snap[attr]
+            if theirs is not None:
+                ours = getattr(self, attr)
+                setattr(self, attr, theirs if ours is None else pick(ours, theirs))
+
+    def snapshot(self):
+        return {
+            "calls": self.calls, "errors": self.errors, "seconds": self.seconds,
+            "bytes_sent": self.bytes_sent, "items": self.items,
+            "first_start": self.first_start, "last_end": self.last_end,
+            "latencies": list(self.latencies), "max_latency": self.max_latency,
+        }
+
+    def as_dict(self):
+        lat = sorted(self.latencies)
+        span = (self.last_end - self.first_start) if self.calls else 0.0
+        out = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "busy_s": round(self.seconds, 4),    # sum of call latencies
+            "span_s": round(span, 4),            # first call start → last call end
+            "bytes_sent": self.bytes_sent,
+            "items": self.items,
+            "items_per_s": round(self.items / span, 2) if span > 0 else None,
+        }
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}_ms"] = round(percentile(lat, q) * 1000, 2)
+        out["max_ms"] = round(self.max_latency * 1000, 2)
+        return out
+
+
+class Profiler:
+    """Thread-safe registry of StageStats by stage name; disabled until start()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()     # per thread: time of nested stages, per open stage
+        self.enabled = False
+        self.reset()
+
+    def start(self):
+        """Clear and enable recording (ingest entry points)."""
+        self.reset()
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self.started = time.time()
+
+    def record(self, name, seconds, bytes_sent=0, items=0, error=False, start=None, end=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.add(seconds, bytes_sent, items, error, start, end)
+
+    @contextmanager
+    def stage(self, name, bytes_sent=0, items=0):
+        """
+        Time the `with` body as one call of stage `name` (exceptions count as
+        errors), minus the time of stages nested in it.
+        """
+        rec = _Record(bytes_sent, items)
+        if not self.enabled:
+            yield rec
+            return
+        nested = self._local.__dict__.setdefault("nested", [])
+        nested.append(0.0)
+        start = time.time()
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield rec
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            inner = nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            self.record(name, elapsed - inner, rec.bytes_sent, rec.items, error, start, start + elapsed)
+
+    def snapshot(self):
+        """Raw per-stage data, for merge() in another process."""
+        with self._lock:
+            return {name: s.snapshot() for name, s in self._stages.items()}
+
+    def merge(self, snapshot):
+        with self._lock:
+            for name, snap in (snapshot or {}).items():
+                self._stages.setdefault(name, StageStats()).merge(snap)
+
+    def report(self):
+        with self._lock:
+            stages = {name: self._stages[name].as_dict() for name in sorted(self._stages)}
+        return {
+            "started": self.started,
+            "elapsed_s": round(time.time() - self.started, 3),
+            "stages": stages,
+        }
+
+    def summary(self, report=None):
+        report = report or self.report()
+        lines = [f"Stage profile ({report['elapsed_s']:.1f}s run):",
+                 f"  {'stage':<20} {'calls':>7} {'err':>4} {'busy s':>8} {'span s':>8} {'MB sent':>8} "
+                 f"{'items/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"]
+        for name, s in report["stages"].items():
+            rate = f"{s['items_per_s']:.1f}" if s["items_per_s"] is not None else "-"
+            lines.append(
+                f"  {name:<20} {s['calls']:>7} {s['errors']:>4} {s['busy_s']:>8.2f} {s['span_s']:>8.2f} "
+                f"{s['bytes_sent'] / 1e6:>8.2f} {rate:>8} {s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} {s['p99_ms']:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self, report=None, prefix="ingest"):
+        """Prometheus text exposition format (one snapshot per run)."""
+        report = report or self.report()
+        stages = report["stages"]
+        out = [
+            f"# HELP {prefix}_run_duration_seconds Wall time of the ingest run.",
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {report['elapsed_s']}",
+        ]
+        for metric, key, help_text in (
+            ("errors_total", "errors", "Failed calls per stage."),
+            ("bytes_sent_total", "bytes_sent", "Bytes sent to external services per stage."),
+            ("items_total", "items", "Items (pages, chunks, rows) handled per stage."),
+            ("span_seconds", "span_s", "First call start to last call end per stage."),
+        ):
+            kind = "gauge" if metric == "span_seconds" else "counter"
+            out.append(f"# HELP {prefix}_stage_{metric} {help_text}")
+            out.append(f"# TYPE {prefix}_stage_{metric} {kind}")
+            for name, s in stages.items():
+                out.append(f'{prefix}_stage_{metric}{{stage="{name}"}} {s[key]}')
+
+        metric = f"{prefix}_stage_latency_seconds"
+        out.append(f"# HELP {metric} Call latency per stage.")
+        out.append(f"# TYPE {metric} summary")
+        for name, s in stages.items():
+            for q in QUANTILES:
+                out.append(f'{metric}{{stage="{name}",quantile="{q}"}} {s[f"p{int(q * 100)}_ms"] / 1000}')
+            out.append(f'{metric}_sum{{stage="{name}"}} {s["busy_s"]}')
+            out.append(f'{metric}_count{{stage="{name}"}} {s["calls"]}')
+        return "\n".join(out) + "\n"
+
+    def write(self, folder=PROFILE_DIR, name=None):
+        """
+        Save this run as <folder>/<name>.json and <folder>/<name>.prom
+        (name defaults to ingest-<UTC timestamp>). Returns the JSON path,
+        or None when folder is "" / "off".
+        """
+        if not folder or folder.lower() == "off":
+            return None
+        os.makedirs(folder, exist_ok=True)
+        report = self.report()
+        name = name or time.strftime("ingest-%Y%m%dT%H%M%SZ", time.gmtime(report["started"]))
+        json_path = os.path.join(folder, name + ".json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(folder, name + ".prom"), "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(report))
+        return json_path
+
+
+# process-wide profiler used by the instrumented modules
+profiler = Profiler()
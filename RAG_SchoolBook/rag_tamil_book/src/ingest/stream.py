@@ -0,0 +1,102 @@
+# ingest/stream.py
+"""
+Tiny threaded stage pipeline with bounded queues.
+
+    run_stages(source, [stage_a, stage_b, ...], maxsize=4)
+
+- `source` is any iterable (e.g. ingest.pdf_ingest.iter_pages)
+- every stage is a generator function: it receives an iterator over the
+  previous stage's items and yields its own items, so stages can keep
+  state (batching, counters) and emit fewer/more items than they receive
+- each stage runs in its own thread; queues between stages hold at most
+  `maxsize` items, so a slow stage applies back-pressure instead of letting
+  work pile up in memory
+- the first exception in any stage stops the whole pipeline and is
+  re-raised in the caller
+"""
+
+import queue
+import threading
+
+_END = object()
+_POLL = 0.1
+
+
+class _Stopped(Exception):
+    """Raised inside a stage thread when another stage failed."""
+
+
+def _put(q, item, stop):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            q.put(item, timeout=_POLL)
+            return
+        except queue.Full:
+            continue
+
+
+def _drain(q, stop):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            item = q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def run_stages(source, stages, maxsize=4):
+    """
+    Run `source` through `stages`. Returns the list of items yielded by the
+    last stage (make the last stage yield nothing, or small summaries, to
+    keep memory flat).
+    """
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=max(1, maxsize)) for _ in range(len(stages) + 1)]
+
+    def worker(items, out_q):
+        try:
+            for item in items:
+                _put(out_q, item, stop)
+            _put(out_q, _END, stop)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+
+    threads = [threading.Thread(target=worker, args=(iter(source), queues[0]),
+                                name="stage-source", daemon=True)]
+    for i, stage in enumerate(stages):
+        items = stage(_drain(queues[i], stop))
+        threads.append(threading.Thread(target=worker, args=(items, queues[i + 1]),
+                                        name=f"stage-{getattr(stage, '__name__', i)}", daemon=True))
+
+    for t in threads:
+        t.start()
+
+    results = []
+    try:
+        results.extend(_drain(queues[-1], stop))
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+    return results
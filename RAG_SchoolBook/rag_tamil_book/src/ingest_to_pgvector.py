@@ -1,32 +1,58 @@
 # ingest_to_pgvector.py
 """
-Ingestion script:
+Ingestion script (streaming: the stages below overlap, with bounded
+queues between them, so memory stays flat regardless of page count):
 - Reads PDF pages (pdfplumber wrapper in ingest.pdf_ingest)
 - Collects page text + image OCR text
 - Normalizes and chunks text
-- Generates embeddings in batches (via ingest.embedder.embed_texts)
-- Upserts embeddings into Neon pgvector (db.pgvector_store.upsert_embedding)
-- Creates simple Neo4j Page nodes (kg.neo4j_client.create_page_node)
+- Generates embeddings in token-packed, rate-limited requests (via ingest.embedder.embed_texts)
+- Bulk-upserts embeddings into Neon pgvector (db.pgvector_store.upsert_embeddings_bulk)
+- Creates simple Neo4j Page nodes in batches (kg.neo4j_client.upsert_page_nodes)
+- Deletes orphaned chunks of re-ingested pages
+- --incremental: only pages whose content hash changed (ingest.manifest)
+- --bulk-load: build the HNSW index once after loading instead of per insert
+- --resume: continue an interrupted run from its last committed batch (ingest.checkpoint)
+- --figures: embed every figure crop with CLIP into the figures table (image index)
 """
 
 import os
-import math
-import time
+import argparse
 import hashlib
+from collections import deque
+from functools import partial
+from contextlib import nullcontext
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from ingest.pdf_ingest import extract_pages, normalize_text
+from ingest.pdf_ingest import iter_pages, count_pages, normalize_text, ocr_stats
+from ingest.profiling import PROFILE_DIR, profiler
 from ingest.chunker import chunk_text
-from ingest.embedder import embed_texts
-from db.pgvector_store import initialize_schema, upsert_embedding
-from kg.neo4j_client import get_driver, create_page_node
+from ingest.embedder import embed_texts, OPENAI_EMBED_MODEL
+from ingest.embed_scheduler import get_scheduler, estimate_tokens
+from ingest.stream import run_stages
+from embeddings.unified_embedder import get_unified_embedder
+from ingest.checkpoint import CHECKPOINT_PATH, Checkpoint, chunk_text_hash
+from ingest.manifest import (
+    MANIFEST_PATH, page_hash, load_manifest, save_manifest,
+    page_changed, removed_pages, record_page, forget_page,
+)
+from db.pgvector_store import (
+    initialize_schema, upsert_embeddings_bulk, delete_stale_chunks, deferred_vector_index,
+    initialize_figure_schema, upsert_figures, delete_stale_figures,
+)
+from kg.neo4j_client import PAGE_NODE_BATCH_SIZE, initialize_kg_schema, upsert_page_nodes, close_driver
 
 # Config (override by environment)
 PDF_PATH = os.getenv("PDF_PATH", "data/tamil_grade8_book.pdf")
-EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 8))
-SLEEP_BETWEEN_BATCHES = float(os.getenv("SLEEP_BETWEEN_BATCHES", 0.2))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 4))  # items buffered between pipeline stages
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 128))  # chunks per bulk COPY/merge
+FIGURE_BATCH_SIZE = int(os.getenv("FIGURE_BATCH_SIZE", 64))  # figures per CLIP encode + upsert
+# embed_stage flushes at whichever cap comes first, so upserts, checkpoints and
+# the manifest advance every few pages instead of after a full API request
+EMBED_STAGE_MAX_TOKENS = int(os.getenv("EMBED_STAGE_MAX_TOKENS", 16000))
+EMBED_STAGE_MAX_INPUTS = int(os.getenv("EMBED_STAGE_MAX_INPUTS", 128))
 
 def chunk_id_for(page, idx):
     """Deterministic chunk id from page & chunk index."""
@@ -34,6 +60,12 @@ def chunk_id_for(page, idx):
     return hashlib.sha1(key.encode("utf-8")).hexdigest()
 
 
+def figure_id_for(page, idx):
+    """Deterministic figure id from page & image index."""
+    key = f"{page}-fig-{idx}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
 def prepare_chunks_from_pages(pages):
     """
     pages: output from extract_pages()
@@ -76,96 +108,416 @@ def prepare_chunks_from_pages(pages):
     return all_chunks
 
 
-def batch(iterable, n=1):
-    """Simple batching helper."""
-    l = len(iterable)
-    for i in range(0, l, n):
-        yield iterable[i:i + n]
+def excerpt_for(text):
+    """Brief excerpt stored on the Neo4j Page node."""
+    return (text[:300] + "...") if len(text) > 300 else text
+
+
+class IngestRun:
+    """
+    State shared by the pipeline stages of one ingest run.
+    manifest=None skips manifest bookkeeping; prune=False skips deleting
+    stale chunks (used when only part of a page's chunks are passed in);
+    checkpoint=None skips run checkpointing (no --resume possible);
+    figures=True adds the figure index stage (pages must come from
+    iter_pages(..., keep_images=True)); a page whose figures failed to
+    write is in failed_pages like one whose chunks failed.
+    """
+
+    def __init__(self, manifest=None, manifest_path=MANIFEST_PATH, prune=True, checkpoint=None, figures=False):
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.prune = prune
+        self.checkpoint = checkpoint
+        self.figures = figures
+        self.figures_written = 0
+        self.failed_pages = set()
+        self.pages_done = 0
+        self.chunks_written = 0
+        self.stale_deleted = 0
+
+
+# ---------------------------------------------------------------------------
+# Streaming pipeline: extract/OCR → chunk → embed → upsert → KG page node.
+# Each stage is a generator over the previous stage's items and runs in its
+# own thread with bounded queues in between (ingest.stream.run_stages).
+# ---------------------------------------------------------------------------
+
+def figure_stage(pages, run, batch_size=FIGURE_BATCH_SIZE, embedder=None):
+    """
+    Pass-through (--figures): takes the figure crops off each page dict,
+    embeds them with the CLIP UnifiedEmbedder in batches and writes them to
+    the figures table, replacing the page's earlier figures. Identical crops
+    (same sha256, e.g. a logo) are encoded once per batch.
+    Pages are passed on only after their figures are written; when a write
+    fails they go to run.failed_pages, so their text is still ingested but
+    the manifest and checkpoint do not count them as done.
+    """
+    pending = []        # (page dict, figure rows without vectors, png per row)
+    count = 0
+
+    def flush():
+        nonlocal count, embedder
+        rows = [r for _, page_rows, _ in pending for r in page_rows]
+        pngs = [png for _, _, page_pngs in pending for png in page_pngs]
+        pages_in = [p["page"] for p, _, _ in pending]
+        keys = [r[5]["sha256"] or r[0] for r in rows]
+        try:
+            unique = dict(zip(keys, pngs))
+            if unique:
+                embedder = embedder or get_unified_embedder()
+                vectors = dict(zip(unique, embedder.embed_images(list(unique.values()))))
+                run.figures_written += upsert_figures([(*r, vectors[k]) for r, k in zip(rows, keys)])
+            if run.prune:
+                delete_stale_figures(pages_in, [r[0] for r in rows])
+        except Exception as e:
+            print(f"[WARN] Figure index write error for pages {pages_in[0]}-{pages_in[-1]}: {e}")
+            run.failed_pages.update(pages_in)     # retried by the next --incremental/--resume run
+        done = [p for p, _, _ in pending]
+        pending.clear()
+        count = 0
+        return done
+
+    for p in pages:
+        page_rows, page_pngs = [], []
+        for i, im in enumerate(p.get("images", []) or []):
+            png = im.pop("png", None)
+            phash = im.pop("phash", None)
+            if png is None:
+                continue
+            ocr = im.get("ocr")
+            caption = normalize_text(ocr.get("text", "")) if isinstance(ocr, dict) else ""
+            metadata = {"page": p["page"], "source": "TamilBook", "figure_index": i,
+                        "phash": f"{phash:016x}" if isinstance(phash, int) else phash, "sha256": im.get("sha256")}
+            page_rows.append((figure_id_for(p["page"], i), p["page"], "TamilBook", im.get("bbox"), caption, metadata))
+            page_pngs.append(png)
+        pending.append((p, page_rows, page_pngs))
+        count += len(page_rows)
+        if count >= batch_size or len(pending) >= batch_size:
+            yield from flush()
+
+    if pending:
+        yield from flush()
+
+
+def chunk_stage(pages):
+    """
+    page dict → {"page", "hash", "chunks"}.
+    OCR blocks/images are dropped here; only chunks travel further.
+    """
+    for p in pages:
+        yield {"page": p["page"], "hash": page_hash(p), "chunks": prepare_chunks_from_pages([p])}
+
+
+def embed_stage(page_items, scheduler=None, stored=None,
+                max_tokens=EMBED_STAGE_MAX_TOKENS, max_inputs=EMBED_STAGE_MAX_INPUTS):
+    """
+    Collects chunks across pages until max_tokens (estimated) or max_inputs
+    is reached, then embeds them with embed_texts, which packs them into
+    requests (ingest.embed_scheduler). The caps keep the pipeline moving
+    every few pages and bound what a crashed run loses.
+    Yields {"chunks", "vectors", "done_pages"}; a page shows up in
+    done_pages with the batch that carries its last chunk.
+    stored: {chunk_id: text sha1} already in the database (resumed run);
+    those chunks are neither embedded nor upserted again.
+    """
+    scheduler = scheduler or get_scheduler()
+    buffer = []
+    buffer_tokens = 0
+    waiting = deque()       # (offset after the page's last chunk, page info)
+    seen = 0
+    flushed = 0
+
+    def flush():
+        nonlocal flushed, buffer_tokens
+        part = buffer[:]
+        del buffer[:]
+        buffer_tokens = 0
+        vectors = embed_texts([c["text"] for c in part], scheduler=scheduler) if part else []
+        flushed += len(part)
+        done = []
+        while waiting and waiting[0][0] <= flushed:
+            done.append(waiting.popleft()[1])
+        return {"chunks": part, "vectors": vectors, "done_pages": done}
+
+    for item in page_items:
+        chunks = item["chunks"]
+        todo = chunks
+        if stored:
+            todo = [c for c in chunks if stored.get(c["chunk_id"]) != chunk_text_hash(c["text"])]
+        for c in todo:
+            n = estimate_tokens(c["text"], OPENAI_EMBED_MODEL)
+            if buffer and (buffer_tokens + n > max_tokens or len(buffer) + 1 > max_inputs
+                           or not scheduler.fits(buffer_tokens + n, len(buffer) + 1)):
+                yield flush()
+            buffer.append(c)
+            buffer_tokens += n
+        seen += len(todo)
+        waiting.append((seen, {
+            "page": item["page"],
+            "hash": item["hash"],
+            "chunk_ids": [c["chunk_id"] for c in chunks],
+            "excerpt": excerpt_for(chunks[0]["text"]) if chunks else "",
+            "source": chunks[0]["source"] if chunks else "TamilBook",
+        }))
+
+    if buffer or waiting:
+        yield flush()
+
+
+def upsert_stage(batches, run, batch_rows=UPSERT_BATCH_SIZE):
+    """
+    Collects embedded batches into bulk loads of ~batch_rows rows
+    (db.pgvector_store.upsert_embeddings_bulk), then finishes the pages they
+    completed: delete their stale chunks, record them in the manifest.
+    Yields finished page infos for the KG stage.
+    """
+    chunks, vectors, done_pages = [], [], []
+
+    def flush():
+        rows = [
+            (c["chunk_id"], c["text"], c["page"], c["source"], c["metadata"], v)
+            for c, v in zip(chunks, vectors)
+        ]
+        failures = upsert_embeddings_bulk(rows) if rows else []
+        page_of = {c["chunk_id"]: c["page"] for c in chunks}
+        for chunk_id, err in failures:
+            print(f"[ERROR] Failed upsert for chunk {chunk_id} (page {page_of.get(chunk_id)}): {err}")
+            run.failed_pages.add(page_of.get(chunk_id))
+        run.chunks_written += len(rows) - len(failures)
+
+        done = [p for p in done_pages if p["page"] not in run.failed_pages]
+
+        # orphans: chunks past the new end of each finished page
+        if run.prune and done:
+            keep = [cid for p in done for cid in p["chunk_ids"]]
+            run.stale_deleted += delete_stale_chunks([p["page"] for p in done], keep)
+
+        if run.manifest is not None and done_pages:
+            for p in done_pages:
+                if p["page"] in run.failed_pages:
+                    forget_page(run.manifest, p["page"])   # retry on the next run
+                else:
+                    record_page(run.manifest, p["page"], p["hash"], p["chunk_ids"], figures=run.figures)
+            save_manifest(run.manifest, run.manifest_path)
+
+        # only after the rows above are committed: a resumed run trusts this
+        if run.checkpoint is not None and (rows or done_pages):
+            failed = {cid for cid, _ in failures}
+            run.checkpoint.commit_batch([c for c in chunks if c["chunk_id"] not in failed], done)
+
+        run.pages_done += len(done_pages)
+        if rows:
+            print(f"Processed {run.chunks_written} chunks ({run.pages_done} pages done).")
+
+        chunks.clear()
+        vectors.clear()
+        done_pages.clear()
+        return done
+
+    for b in batches:
+        chunks.extend(b["chunks"])
+        vectors.extend(b["vectors"])
+        done_pages.extend(b["done_pages"])
+        if len(chunks) >= batch_rows:
+            yield from flush()
+
+    if chunks or done_pages:
+        yield from flush()
+
+
+def kg_stage(pages, run, batch_size=PAGE_NODE_BATCH_SIZE):
+    """
+    Creates one Neo4j Page node per finished page that has chunks,
+    written in UNWIND batches over the shared driver.
+    Yields the page numbers it handled.
+    """
+    rows = []
+
+    def flush():
+        handled = [r["page"] for r in rows]
+        # idempotent MERGE on page
+        try:
+            upsert_page_nodes(rows, batch_size)
+            if run.checkpoint is not None:
+                run.checkpoint.kg_done(handled)
+        except Exception as e:
+            # non-fatal: log and continue
+            print(f"[WARN] Neo4j page node write error for pages {rows[0]['page']}-{rows[-1]['page']}: {e}")
+        rows.clear()
+        return handled
+
+    for p in pages:
+        if not p["chunk_ids"]:
+            continue
+        rows.append({"page": p["page"], "excerpt": p["excerpt"], "source": p["source"]})
+        if len(rows) >= batch_size:
+            yield from flush()
+
+    if rows:
+        yield from flush()
+
+
+def ingest_pages(pages, run):
+    """
+    Streams page dicts (e.g. iter_pages()) through chunk → embed → upsert → KG.
+    Memory is bounded by the queue sizes, not by the number of pages.
+    """
+    stored = run.checkpoint.stored_chunks() if run.checkpoint is not None else None
+    stages = [partial(figure_stage, run=run)] if run.figures else []
+    stages += [
+        chunk_stage,
+        partial(embed_stage, stored=stored),
+        partial(upsert_stage, run=run),
+        partial(kg_stage, run=run),
+    ]
+    run_stages(pages, stages, maxsize=INGEST_QUEUE_SIZE)
+    return run
 
 
 def upsert_chunks_with_embeddings(chunks):
     """
     Given list of chunk dicts, obtain embeddings in batches and upsert each to DB.
     Also create basic Neo4j Page nodes (one per page).
+    Returns the set of pages that had at least one failed upsert.
     """
     if not chunks:
         print("No chunks to upsert.")
-        return
+        return set()
 
     # initialize DB schema (creates extension/table/index if not exists)
     initialize_schema()
 
-    # group by page to make page node creation idempotent
-    pages_seen = set()
+    # regroup into page items (chunks of a page are consecutive)
+    page_items = []
+    for c in chunks:
+        if not page_items or page_items[-1]["page"] != c["page"]:
+            page_items.append({"page": c["page"], "hash": None, "chunks": []})
+        page_items[-1]["chunks"].append(c)
 
-    texts = [c["text"] for c in chunks]
-    total = len(texts)
-    steps = math.ceil(total / EMBED_BATCH_SIZE)
-    print(f"Total chunks: {total}, batch size: {EMBED_BATCH_SIZE}, batches: {steps}")
+    run = IngestRun(manifest=None, prune=False)
+    run_stages(page_items, [embed_stage, partial(upsert_stage, run=run), partial(kg_stage, run=run)],
+               maxsize=INGEST_QUEUE_SIZE)
+    print("All batches processed.")
+    return run.failed_pages
 
-    index = 0
-    for batch_texts in batch(texts, EMBED_BATCH_SIZE):
-        # Get embeddings for this batch
-        try:
-            vectors = embed_texts(batch_texts)
-        except Exception as e:
-            print(f"[ERROR] Embedding API failed at batch starting index {index}: {e}")
-            # try simple retry once
-            time.sleep(1.0)
-            vectors = embed_texts(batch_texts)
-
-        # For each vector in batch, upsert into DB
-        for i, vec in enumerate(vectors):
-            chunk_obj = chunks[index + i]
-            try:
-                upsert_embedding(
-                    chunk_obj["chunk_id"],
-                    chunk_obj["text"],
-                    chunk_obj["page"],
-                    chunk_obj["source"],
-                    chunk_obj["metadata"],
-                    vec
-                )
-            except Exception as e:
-                print(f"[ERROR] Failed upsert for chunk {chunk_obj['chunk_id']} (page {chunk_obj['page']}): {e}")
-            else:
-                # create page node in Neo4j once per page (idempotent MERGE on page)
-                try:
-                    pg = chunk_obj["page"]
-                    if pg not in pages_seen:
-                        pages_seen.add(pg)
-                        driver = get_driver()
-                        with driver.session() as session:
-                            # create a brief excerpt for the node
-                            excerpt = (chunk_obj["text"][:300] + "...") if len(chunk_obj["text"]) > 300 else chunk_obj["text"]
-                            session.write_transaction(create_page_node, pg, excerpt, chunk_obj.get("source", "TamilBook"))
-                except Exception as e:
-                    # non-fatal: log and continue
-                    print(f"[WARN] Neo4j page node write error for page {chunk_obj['page']}: {e}")
-
-        index += len(vectors)
-        print(f"Processed {min(index, total)}/{total} chunks.")
-        time.sleep(SLEEP_BETWEEN_BATCHES)  # polite pacing
 
-    print("All batches processed.")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest the Tamil book PDF into pgvector + Neo4j.")
+    parser.add_argument("--pdf", default=PDF_PATH, help="Path to the PDF (default: PDF_PATH env)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Processes for page extraction/OCR (default: INGEST_WORKERS env or 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-chunk/embed/upsert pages whose content hash changed since the last run")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Drop the HNSW index during the load and rebuild it once at the end (full ingests)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Page manifest path (default: MANIFEST_PATH env)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted run from its last committed batch")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help="Run checkpoint path (default: CHECKPOINT_PATH env)")
+    parser.add_argument("--figures", action="store_true",
+                        help="Also embed every figure crop with CLIP into the figures table (image search)")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR,
+                        help="Where to write the run's stage profile as JSON + Prometheus text ('off' to skip)")
+    args = parser.parse_args(argv)
+    if args.bulk_load and args.incremental:
+        # dropping and rebuilding the index over the whole table to apply a few pages
+        parser.error("--bulk-load rebuilds the HNSW index for the whole table; use it for full ingests, "
+                     "not with --incremental")
+    return args
 
 
-def main():
-    if not os.path.exists(PDF_PATH):
-        raise SystemExit(f"PDF file not found at {PDF_PATH}. Place the Tamil book PDF at this path or set PDF_PATH env var.")
+def main(argv=None):
+    args = parse_args(argv)
+    pdf_path = args.pdf
 
-    print("Starting ingestion for:", PDF_PATH)
-    pages = extract_pages(PDF_PATH, ocr_language="ta")
-    print(f"Extracted {len(pages)} pages (with OCR).")
+    if not os.path.exists(pdf_path):
+        raise SystemExit(f"PDF file not found at {pdf_path}. Place the Tamil book PDF at this path or set PDF_PATH env var.")
 
-    chunks = prepare_chunks_from_pages(pages)
-    print(f"Prepared {len(chunks)} text chunks for embedding.")
+    print("Starting ingestion for:", pdf_path, f"(workers={args.workers})")
+    profiler.start()
 
-    if not chunks:
-        print("No chunks to embed. Exiting.")
-        return
+    manifest = load_manifest(args.manifest)
+    removed = removed_pages(count_pages(pdf_path), manifest)
+
+    checkpoint = Checkpoint.load(args.checkpoint)
+    skip_pages = set()
+    if args.resume and checkpoint is not None:
+        if not checkpoint.matches(pdf_path):
+            raise SystemExit(f"Checkpoint {args.checkpoint} was written for a different or modified PDF; "
+                             "run without --resume to start over.")
+        if checkpoint.complete:
+            print("The last run finished; nothing to resume.")
+            return
+        if args.figures and not checkpoint.figures:
+            raise SystemExit(f"Checkpoint {args.checkpoint} was written by a run without --figures; its done pages "
+                             "have no figures indexed. Run without --resume to start over.")
+        skip_pages = checkpoint.done_pages()
+        print(f"Resuming: {len(skip_pages)} pages and {len(checkpoint.stored_chunks())} chunks "
+              f"already stored ({checkpoint.data['batches']} batches).")
+    else:
+        if args.resume:
+            print("No checkpoint found; starting from page 1.")
+        elif checkpoint is not None and not checkpoint.complete:
+            print("[INFO] The previous run did not finish; starting over (use --resume to continue it).")
+        checkpoint = Checkpoint.start(pdf_path, args.checkpoint, figures=args.figures)
+
+    pages = iter_pages(pdf_path, ocr_language="ta", workers=args.workers, skip_pages=skip_pages,
+                       keep_images=args.figures)
+    if args.incremental:
+        pages = (p for p in pages if page_changed(p, manifest, figures=args.figures))
+        print("Incremental mode: only pages whose content hash changed are re-ingested.")
+
+    # initialize DB schema (creates extension/table, and the index unless bulk-loading)
+    initialize_schema(create_index=not args.bulk_load)
+    if args.figures:
+        initialize_figure_schema()
+
+    try:
+        initialize_kg_schema()
+    except Exception as e:
+        print(f"[WARN] Neo4j schema init failed: {e}")
+
+    run = IngestRun(manifest=manifest, manifest_path=args.manifest, prune=True, checkpoint=checkpoint,
+                    figures=args.figures)
+    try:
+        # Page nodes a killed run stored chunks for but never wrote
+        pending = checkpoint.kg_pending()
+        if pending:
+            try:
+                upsert_page_nodes(pending)
+                checkpoint.kg_done([r["page"] for r in pending])
+            except Exception as e:
+                print(f"[WARN] Neo4j page node write error for resumed pages: {e}")
+        with deferred_vector_index() if args.bulk_load else nullcontext():
+            ingest_pages(pages, run)
+    finally:
+        close_driver()
+
+    # pages that disappeared from the PDF
+    if removed:
+        run.stale_deleted += delete_stale_chunks(removed, [])
+        if args.figures:
+            delete_stale_figures(removed, [])
+        for page_num in removed:
+            forget_page(manifest, page_num)
+
+    manifest["pdf"] = pdf_path
+    save_manifest(manifest, args.manifest)
+    if not run.failed_pages:
+        checkpoint.finish()   # otherwise --resume retries the failed pages
 
-    upsert_chunks_with_embeddings(chunks)
+    print(f"Pages processed: {run.pages_done}, chunks written: {run.chunks_written}, "
+          f"stale chunks deleted: {run.stale_deleted}, pages with errors: {len(run.failed_pages)}")
+    if args.figures:
+        print(f"Figures indexed: {run.figures_written}")
+    print(ocr_stats.summary())
+    print(get_scheduler().summary())
+    print(profiler.summary())
+    profile_path = profiler.write(args.profile_dir)
+    if profile_path:
+        print(f"Stage profile written to {profile_path} (+ .prom)")
     print("Ingestion complete.")
 
 
@@ -1,22 +1,83 @@
 # kg/neo4j_client.py
 from neo4j import GraphDatabase
 import os
+import atexit
+import threading
 from dotenv import load_dotenv
+from ingest.profiling import profiler
 load_dotenv()
 
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+PAGE_NODE_BATCH_SIZE = int(os.getenv("PAGE_NODE_BATCH_SIZE", 100))
+
+_driver = None
+_driver_lock = threading.Lock()
+
 
 def get_driver():
+    """
+    Long-lived, process-wide driver. The driver is thread-safe and pools its
+    own connections, so callers open short sessions on it and never close it.
+    """
+    global _driver
     if not NEO4J_URI or not NEO4J_USER or not NEO4J_PASSWORD:
         raise RuntimeError("Neo4j credentials missing in .env")
-    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    return _driver
+
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)
+
+
+def _execute_write(session, fn, *args):
+    # execute_write (driver 5+) replaced write_transaction (4.x)
+    write = getattr(session, "execute_write", None) or session.write_transaction
+    return write(fn, *args)
+
+
+def initialize_kg_schema():
+    """
+    Uniqueness constraints so MERGE on Page.page / Topic.name is an index
+    lookup instead of a label scan.
+    """
+    with get_driver().session() as session:
+        session.run("CREATE CONSTRAINT page_page_unique IF NOT EXISTS FOR (p:Page) REQUIRE p.page IS UNIQUE")
+        session.run("CREATE CONSTRAINT topic_name_unique IF NOT EXISTS FOR (t:Topic) REQUIRE t.name IS UNIQUE")
 
 def create_page_node(tx, page_num, excerpt, source="TamilBook"):
     tx.run("MERGE (p:Page {page:$page}) SET p.excerpt=$excerpt, p.source=$source",
            page=page_num, excerpt=excerpt, source=source)
 
+def create_page_nodes(tx, rows):
+    """rows: list of {"page", "excerpt", "source"}; one statement for the whole batch."""
+    tx.run("UNWIND $rows AS row "
+           "MERGE (p:Page {page: row.page}) SET p.excerpt = row.excerpt, p.source = row.source",
+           rows=rows)
+
+def upsert_page_nodes(rows, batch_size=PAGE_NODE_BATCH_SIZE):
+    """Writes Page nodes in batches: one session, one transaction per batch."""
+    if not rows:
+        return
+    with get_driver().session() as session:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            with profiler.stage("neo4j.page_nodes", bytes_sent=sum(len(r.get("excerpt") or "") for r in batch),
+                                items=len(batch)):
+                _execute_write(session, create_page_nodes, batch)
+
 def link_topic_page(tx, topic, page_num):
     tx.run("MERGE (t:Topic {name:$topic}) MERGE (p:Page {page:$page}) MERGE (t)-[:EXPLAINED_ON]->(p)",
            topic=topic, page=page_num)
@@ -49,5 +110,4 @@ def query_graph_for_topic(topic_text, limit=100):
                 src = f"Topic::{tnode.id}"
                 dst = f"{list(nnode.labels)[0]}::{nnode.id}" if hasattr(nnode, "labels") and list(nnode.labels) else f"Node::{nnode.id}"
                 edges.append({"source": src, "target": dst, "type": type(rel).__name__})
-    driver.close()
     return {"nodes": list(nodes.values()), "edges": edges}
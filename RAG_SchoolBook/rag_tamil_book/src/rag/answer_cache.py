@@ -0,0 +1,117 @@
+# rag/answer_cache.py
+"""
+Semantic answer cache in front of rag.pipeline.answer_question.
+
+A question whose embedding is within ANSWER_CACHE_THRESHOLD cosine
+similarity (default 0.95) of an earlier question, asked with the same LLM,
+language, top_k and retrieval mode, gets that answer and sources back without
+retrieval or an LLM call. Entries live in the answer_cache table
+(db.pgvector_store); triggers on `embeddings` delete every entry built on a
+chunk as soon as that chunk is re-ingested or removed.
+
+The cache never fails a question: if the table is unreachable the answer
+is generated as usual and a warning is printed.
+
+    ANSWER_CACHE=off                 disable
+    ANSWER_CACHE_THRESHOLD=0.95      lower = more hits, more risk of
+                                     answering a different question
+"""
+
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+from db.pgvector_store import (initialize_answer_cache_schema, lookup_cached_answer,
+                               store_cached_answer, answer_cache_totals)
+from rag.query_cache import embed_question
+
+load_dotenv()
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "on").lower() not in ("", "0", "off", "false")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+
+
+class AnswerCache:
+    """Lookups and stores for one process, with hit/miss and latency-saved counters."""
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.saved_ms = 0.0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_schema(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    initialize_answer_cache_schema()
+                    self._ready = True
+
+    def lookup(self, question, variant):
+        """
+        (question vector, hit) where hit is None or
+        {"question", "answer", "sources", "chunk_ids", "similarity", "saved_ms"};
+        saved_ms is the original answer's retrieval + generation time minus
+        this lookup's.
+        """
+        t0 = time.perf_counter()
+        vec = embed_question(question)
+        try:
+            self._ensure_schema()
+            row = lookup_cached_answer(vec, variant, max_distance=1.0 - self.threshold)
+        except Exception as e:
+            print(f"[WARN] Answer cache lookup failed: {e}")
+            with self._lock:
+                self.errors += 1
+            return vec, None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return vec, None
+            cached_question, answer, sources, chunk_ids, generation_ms, distance = row
+            saved_ms = max(0.0, (generation_ms or 0.0) - (time.perf_counter() - t0) * 1000)
+            self.hits += 1
+            self.saved_ms += saved_ms
+        return vec, {"question": cached_question, "answer": answer, "sources": sources, "chunk_ids": chunk_ids,
+                     "similarity": 1.0 - distance, "saved_ms": saved_ms}
+
+    def store(self, vec, variant, question, answer, sources, chunk_ids, generation_ms):
+        try:
+            self._ensure_schema()
+            store_cached_answer(vec, variant, question, answer, sources, chunk_ids, generation_ms)
+        except Exception as e:
+            print(f"[WARN] Answer cache store failed: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        """This process's counters; totals() has the table-wide ones."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "errors": self.errors,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "saved_ms": round(self.saved_ms, 1),
+                    "threshold": self.threshold}
+
+    def totals(self):
+        return answer_cache_totals()
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Process-wide AnswerCache, or None when ANSWER_CACHE is off."""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+    return _answer_cache
@@ -1,11 +1,43 @@
 # rag/pipeline.py
-from rag.retriever import retrieve
-from rag.answer_generator import generate_answer
+import time
+from rag.retriever import retrieve, RETRIEVAL_MODE
+from rag.answer_generator import generate_answer, LLM_MODEL
+from rag.answer_cache import get_answer_cache
+
+def answer_question(question, top_k=5, use_cache=True):
+    """
+    Returns {"answer", "sources", "cache"}; "cache" reports whether the
+    answer came from the semantic answer cache (rag.answer_cache), the
+    similarity to the cached question, this call's latency and, on a hit,
+    the latency saved, plus the process-wide hit rate.
+    """
+    t0 = time.perf_counter()
+    cache = get_answer_cache() if use_cache else None
+    variant = f"{LLM_MODEL}/ta/k{top_k}/{RETRIEVAL_MODE}"
+
+    if cache is not None:
+        vec, hit = cache.lookup(question, variant)
+        if hit is not None:
+            latency_ms = (time.perf_counter() - t0) * 1000
+            return {"answer": hit["answer"], "sources": hit["sources"],
+                    "cache": {"hit": True, "similarity": round(hit["similarity"], 4),
+                              "cached_question": hit["question"], "latency_ms": round(latency_ms, 1),
+                              "saved_ms": round(hit["saved_ms"], 1),
+                              **_rates(cache)}}
 
-def answer_question(question, top_k=5):
     contexts = retrieve(question, top_k=top_k)
     if not contexts:
-        return {"answer": "No relevant context found.", "sources": []}
+        return {"answer": "No relevant context found.", "sources": [], "cache": {"hit": False}}
     ans = generate_answer(question, contexts, language="ta")
     sources = [f"{c['source']} (page {c['page']})" for c in contexts]
-    return {"answer": ans, "sources": sources}
+    latency_ms = (time.perf_counter() - t0) * 1000
+
+    if cache is not None:
+        cache.store(vec, variant, question, ans, sources, [c["chunk_id"] for c in contexts], latency_ms)
+    return {"answer": ans, "sources": sources,
+            "cache": {"hit": False, "latency_ms": round(latency_ms, 1), **(_rates(cache) if cache else {})}}
+
+
+def _rates(cache):
+    stats = cache.stats()
+    return {"hit_rate": stats["hit_rate"], "total_saved_ms": stats["saved_ms"]}
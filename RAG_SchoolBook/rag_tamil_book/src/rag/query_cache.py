@@ -0,0 +1,148 @@
+# rag/query_cache.py
+"""
+Query-embedding cache for retrieval.
+
+Key   = (model name, sha256 of the normalized question)
+Value = embedding vector
+
+Two layers in front of the embeddings API:
+
+- in-process LRU of QUERY_CACHE_SIZE entries (default 1024, 0 = off): a
+  question asked again in the same app process is a dict lookup
+- optional on-disk EmbeddingCache shared by every process, read by
+  embed_texts on an LRU miss. Off by default: EmbeddingCache never
+  evicts, so set QUERY_CACHE_PATH to its own file (not the ingest
+  EMBED_CACHE_PATH) and only where its growth is acceptable.
+
+LRU keys are computed on the normalized question (NFKC, casefold,
+whitespace collapsed), so "What is  Photosynthesis?" and
+"what is photosynthesis?" share one entry. The API gets the question as
+plain retrieval always embedded it (NFKC + strip, ingest.embedder.normalize),
+so cached and uncached vectors are the same.
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+from ingest.embedder import OPENAI_EMBED_MODEL, embed_texts
+from ingest.embedding_cache import EMBED_CACHE_PATH, EmbeddingCache, get_cache, text_hash
+
+load_dotenv()
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", "off")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question):
+    """NFKC + casefold + single spaces, stripped."""
+    text = unicodedata.normalize("NFKC", question or "").casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query vectors with hit/miss counters."""
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, key):
+        with self._lock:
+            vec = self._entries.get((model, key))
+            if vec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((model, key))
+            self.hits += 1
+            return vec
+
+    def put(self, model, key, vector):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[(model, key)] = vector
+            self._entries.move_to_end((model, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "max_size": self.max_size, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_query_cache = None
+_disk_cache = None
+_disk_cache_pid = None
+_lock = threading.Lock()
+
+
+def get_query_cache():
+    """Process-wide LRU."""
+    global _query_cache
+    if _query_cache is None:
+        with _lock:
+            if _query_cache is None:
+                _query_cache = QueryEmbeddingCache()
+    return _query_cache
+
+
+def get_disk_cache():
+    """
+    Shared on-disk layer, or None when QUERY_CACHE_PATH is "" or "off"
+    (the default). The ingest cache itself when the paths are the same.
+    """
+    global _disk_cache, _disk_cache_pid
+    if not QUERY_CACHE_PATH or QUERY_CACHE_PATH.lower() == "off":
+        return None
+    if QUERY_CACHE_PATH == EMBED_CACHE_PATH:
+        return get_cache()
+    if _disk_cache is None or _disk_cache_pid != os.getpid():
+        with _lock:
+            if _disk_cache is None or _disk_cache_pid != os.getpid():
+                _disk_cache = EmbeddingCache(QUERY_CACHE_PATH)
+                _disk_cache_pid = os.getpid()
+    return _disk_cache
+
+
+def embed_question(question, model=OPENAI_EMBED_MODEL):
+    """Embedding of a search question: LRU, then the disk cache, then the API."""
+    return embed_questions([question], model)[0]
+
+
+def embed_questions(questions, model=OPENAI_EMBED_MODEL):
+    """
+    embed_question() for a list, in order: LRU hits are served from memory
+    and all misses go through one embed_texts call (one API request unless
+    they exceed its per-request token limit).
+    """
+    keys = [text_hash(normalize_question(q)) for q in questions]
+    cache = get_query_cache()
+    vectors = [cache.get(model, key) for key in keys]
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    if missing:
+        fresh = embed_texts([questions[i] for i in missing], model=model, cache=get_disk_cache())
+        for i, vec in zip(missing, fresh):
+            vectors[i] = vec
+            cache.put(model, keys[i], vec)
+    return vectors
+
+
+def query_cache_stats():
+    """LRU counters plus the disk layer's, e.g. for a status panel or log line."""
+    disk = get_disk_cache()
+    return {"memory": get_query_cache().stats(), "disk": disk.stats() if disk is not None else None}
@@ -1,13 +1,99 @@
 # rag/retriever.py
-from ingest.embedder import embed_texts
-from db.pgvector_store import query_similar
-
-def retrieve(question, top_k=5):
-    q_vec = embed_texts([question])[0]
-    rows = query_similar(q_vec, top_k=top_k)
-    # rows: (chunk_id, content, page, source, metadata, distance)
-    results = []
-    for r in rows:
-        chunk_id, content, page, source, metadata, distance = r
-        results.append({"chunk_id": chunk_id, "content": content, "page": page, "source": source, "metadata": metadata, "distance": distance})
-    return results
+import os
+from PIL import Image
+from rag.query_cache import embed_question, embed_questions
+from db.pgvector_store import query_similar, query_similar_many, query_hybrid, query_multimodal
+from embeddings.unified_embedder import IMAGE_EXTENSIONS, get_unified_embedder
+
+# "vector": ANN only; "hybrid": ANN + full-text, fused by reciprocal rank
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector").lower()
+RETRIEVAL_MODES = ("vector", "hybrid")
+
+
+def _chunk_result(row):
+    """
+    Search row (chunk_id, content, page, source, metadata, distance[, score])
+    → result dict; "score" only for hybrid rows.
+    """
+    chunk_id, content, page, source, metadata, distance, *score = row
+    result = {"chunk_id": chunk_id, "content": content, "page": page, "source": source, "metadata": metadata,
+              "distance": distance}
+    if score:
+        result["score"] = score[0]
+    return result
+
+
+def retrieve(question, top_k=5, mode=None):
+    """
+    Top chunks for a question. mode="hybrid" also matches the question's
+    words in the text (exact Tamil phrases, names, poem titles) and adds
+    "score" (fused rank score) to each result; distance is None for
+    chunks found only by the text match. Defaults to RETRIEVAL_MODE.
+    """
+    mode = (mode or RETRIEVAL_MODE).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"mode must be one of {RETRIEVAL_MODES}, got {mode!r}")
+    q_vec = embed_question(question)
+    if mode == "hybrid":
+        rows = query_hybrid(question, q_vec, top_k=top_k)
+    else:
+        rows = query_similar(q_vec, top_k=top_k)
+    return [_chunk_result(r) for r in rows]
+
+
+def retrieve_many(questions, top_k=5, mode=None):
+    """
+    retrieve() for a list of questions (evaluation runs, batch jobs): all
+    questions are embedded in one batched call and, in vector mode, all
+    searches run in one SQL query (query_similar_many). Hybrid mode runs
+    one query_hybrid per question on the shared embeddings.
+    Returns one result list per question, in order, shaped as retrieve().
+    """
+    mode = (mode or RETRIEVAL_MODE).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"mode must be one of {RETRIEVAL_MODES}, got {mode!r}")
+    questions = list(questions)
+    if not questions:
+        return []
+    vectors = embed_questions(questions)
+    if mode == "hybrid":
+        grouped = [query_hybrid(q, vec, top_k=top_k) for q, vec in zip(questions, vectors)]
+    else:
+        grouped = query_similar_many(vectors, top_k=top_k)
+    return [[_chunk_result(r) for r in rows] for rows in grouped]
+
+
+def is_image_query(query):
+    """Image bytes, a PIL image or an image file path (as UnifiedEmbedder.embed_query decides)."""
+    if isinstance(query, (bytes, bytearray, memoryview, Image.Image)):
+        return True
+    return isinstance(query, str) and query.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def retrieve_multimodal(query, top_k=5, figure_k=3):
+    """
+    Text chunks and textbook figures for a text or image query, fetched in
+    one database round-trip (db.pgvector_store.query_multimodal).
+
+    Text query: chunks by the text embedding, figures by its CLIP text
+    embedding. Image query: figures by its CLIP image embedding, chunks
+    from the pages of those figures.
+
+    Returns {"chunks": [same dicts as retrieve()],
+             "figures": [{"figure_id", "page", "source", "bbox", "caption", "metadata", "distance"}]}
+    """
+    if is_image_query(query):
+        text_vec = None
+        figure_vec = get_unified_embedder().embed_image(query)
+    else:
+        text_vec = embed_question(query)
+        figure_vec = get_unified_embedder().embed_text(query)
+
+    chunk_rows, figure_rows = query_multimodal(text_vec, figure_vec, top_k=top_k, figure_k=figure_k)
+    chunks = [_chunk_result(r) for r in chunk_rows]
+    figures = [
+        {"figure_id": figure_id, "page": page, "source": source, "bbox": bbox, "caption": caption,
+         "metadata": metadata, "distance": distance}
+        for figure_id, page, source, bbox, caption, metadata, distance in figure_rows
+    ]
+    return {"chunks": chunks, "figures": figures}
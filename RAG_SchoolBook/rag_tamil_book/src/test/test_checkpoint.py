@@ -0,0 +1,61 @@
+# tests/test_checkpoint.py
+
+import sys, os
+import json
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from ingest.checkpoint import Checkpoint, chunk_text_hash
+
+
+def _page(num, chunk_ids, excerpt="excerpt"):
+    return {"page": num, "chunk_ids": chunk_ids, "excerpt": excerpt, "source": "TamilBook"}
+
+
+def test_checkpoint_resume_round_trip(tmp_path):
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF-1.4 stub")
+    path = str(tmp_path / "checkpoint.json")
+
+    cp = Checkpoint.start(str(pdf), path, figures=True)
+    assert Checkpoint.load(path).data["status"] == "running"
+
+    # page 1 finished in this batch; page 2 has one chunk stored so far
+    chunks = [{"chunk_id": "a", "text": "ஒன்று"}, {"chunk_id": "b", "text": "இரண்டு"},
+              {"chunk_id": "c", "text": "மூன்று"}]
+    cp.commit_batch(chunks, [_page(1, ["a", "b"])])
+    cp.commit_batch([], [_page(3, [])])       # a page without text
+
+    resumed = Checkpoint.load(path)
+    assert resumed.matches(str(pdf)) and not resumed.complete and resumed.figures
+    assert resumed.done_pages() == {1, 3}
+    assert resumed.stored_chunks() == {"c": chunk_text_hash("மூன்று")}
+    assert resumed.kg_pending() == [{"page": 1, "excerpt": "excerpt", "source": "TamilBook"}]
+    assert resumed.data["batches"] == 2
+
+    resumed.kg_done([1])
+    resumed.finish()
+    final = Checkpoint.load(path)
+    assert final.complete and final.kg_pending() == []
+    assert not os.path.exists(path + ".tmp")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["pages"] == [1, 3]
+
+
+def test_checkpoint_rejects_other_or_modified_pdf(tmp_path):
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF-1.4 stub")
+    path = str(tmp_path / "checkpoint.json")
+    Checkpoint.start(str(pdf), path)
+
+    cp = Checkpoint.load(path)
+    assert not cp.figures
+    assert not cp.matches(str(tmp_path / "other.pdf"))
+    pdf.write_bytes(b"%PDF-1.4 stub, second edition")
+    assert not cp.matches(str(pdf))
+
+
+def test_checkpoint_load_missing(tmp_path):
+    assert Checkpoint.load(str(tmp_path / "none.json")) is None
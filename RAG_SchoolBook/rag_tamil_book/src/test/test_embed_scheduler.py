@@ -0,0 +1,108 @@
+# tests/test_embed_scheduler.py
+
+import sys, os
+import asyncio
+
+import pytest
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from ingest import embed_scheduler
+from ingest.embed_scheduler import EmbeddingScheduler, TokenBucket, estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def _byte_token_estimate(monkeypatch):
+    # tiktoken would download its BPE file; tests must not need the network
+    monkeypatch.setattr(embed_scheduler, "tiktoken", None)
+
+
+def test_estimate_tokens_falls_back_when_encoding_cannot_load(monkeypatch):
+    class OfflineTiktoken:
+        calls = 0
+
+        def encoding_for_model(self, model):
+            raise KeyError(model)
+
+        def get_encoding(self, name):
+            OfflineTiktoken.calls += 1
+            raise ConnectionError("no network")
+
+    monkeypatch.setattr(embed_scheduler, "tiktoken", OfflineTiktoken())
+    monkeypatch.setattr(embed_scheduler, "_tiktoken_failed", False)
+    monkeypatch.setattr(embed_scheduler, "_encodings", {})
+
+    text = "தமிழ் பாடம்"
+    assert estimate_tokens(text, "text-embedding-3-large") == len(text.encode("utf-8")) // 2 + 1
+    assert estimate_tokens(text) == len(text.encode("utf-8")) // 2 + 1
+    assert OfflineTiktoken.calls == 1     # the failure is remembered
+
+
+def test_fits_checks_both_limits():
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0, max_tokens=100, max_inputs=3)
+    assert scheduler.fits(100, 3)
+    assert not scheduler.fits(101, 1)
+    assert not scheduler.fits(10, 4)
+
+
+def test_pack_respects_limits_and_order():
+    texts = ["அ" * n for n in (5, 30, 2, 7, 40, 1, 1, 1, 3)]
+    tokens = [estimate_tokens(t) for t in texts]
+    max_tokens = max(tokens) + 10
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0, max_tokens=max_tokens, max_inputs=3)
+
+    batches = scheduler.pack(texts)
+
+    # consecutive slices covering every text once
+    assert batches[0][0] == 0 and batches[-1][1] == len(texts)
+    assert all(a[1] == b[0] for a, b in zip(batches, batches[1:]))
+    for start, end, total in batches:
+        assert total == sum(tokens[start:end])
+        assert scheduler.fits(total, end - start)
+    # greedy: the next text would not have fit
+    for start, end, total in batches[:-1]:
+        assert not scheduler.fits(total + tokens[end], end - start + 1)
+
+    assert all(end - start <= 2 for start, end, _ in scheduler.pack(texts, max_inputs=2))
+
+
+def test_pack_gives_an_oversized_input_its_own_request():
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0, max_tokens=10, max_inputs=100)
+    texts = ["a", "அ" * 50, "b"]
+    assert [(s, e) for s, e, _ in scheduler.pack(texts)] == [(0, 1), (1, 2), (2, 3)]
+    assert scheduler.pack([]) == []
+
+
+def test_token_bucket_refill_and_wait():
+    bucket = TokenBucket(600)           # 10 per second, holds 600
+    assert bucket.acquire(600) == 0.0
+    wait = bucket._take(10)
+    assert 0.9 < wait <= 1.0            # about a second to refill 10
+
+    bucket.tokens, bucket.updated = 0.0, bucket.updated - 1.0
+    assert bucket._take(10) == 0.0      # refilled while "waiting"
+
+
+def test_token_bucket_blocks_then_passes():
+    bucket = TokenBucket(1200)          # 20 per second
+    bucket.acquire(1200)
+    assert 0.1 < bucket.acquire(4) < 1.0
+    assert 0.1 < asyncio.run(bucket.aacquire(4)) < 1.0
+
+
+def test_token_bucket_unlimited_and_oversized():
+    assert TokenBucket(0).acquire(10 ** 9) == 0.0
+    bucket = TokenBucket(60)
+    # larger than the bucket: goes through once the bucket is full
+    assert bucket.acquire(1000) == 0.0
+    assert bucket.tokens == pytest.approx(0.0, abs=0.1)
+
+
+def test_scheduler_counts_requests():
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0)
+    scheduler.acquire(100)
+    asyncio.run(scheduler.aacquire(50))
+    assert (scheduler.requests_sent, scheduler.tokens_sent) == (2, 150)
+    assert "2 requests" in scheduler.summary()
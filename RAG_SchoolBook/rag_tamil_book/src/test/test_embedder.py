@@ -0,0 +1,77 @@
+# tests/test_embedder.py
+
+import sys, os
+import asyncio
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from ingest import embedder
+from ingest.embed_scheduler import EmbeddingScheduler
+
+
+def _bad_request(message, code=None):
+    response = SimpleNamespace(status_code=400, headers={}, request=None)
+    return openai.BadRequestError(message, response=response, body={"message": message, "code": code})
+
+
+TOO_LARGE = "Requested 320000 tokens, max 300000 tokens per request"
+CONTEXT = "This model's maximum context length is 8192 tokens, however you requested 9000 tokens"
+
+
+def _fake_api(monkeypatch, error, limit):
+    """Batches over `limit` inputs fail with `error`; returns the list of batch sizes sent."""
+    calls = []
+
+    def embed_batch(batch, model=None):
+        calls.append(len(batch))
+        if len(batch) > limit:
+            raise error
+        return [[float(len(t))] for t in batch]
+
+    async def aembed_batch(batch, model=None, aclient=None):
+        return embed_batch(batch, model)
+
+    monkeypatch.setattr(embedder, "embed_batch", embed_batch)
+    monkeypatch.setattr(embedder, "aembed_batch", aembed_batch)
+    return calls
+
+
+def test_embed_packed_splits_on_the_request_limit(monkeypatch):
+    calls = _fake_api(monkeypatch, _bad_request(TOO_LARGE), limit=2)
+    texts = ["அ" * (i + 1) for i in range(8)]
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0)
+
+    assert embedder.embed_packed(texts, 100, scheduler=scheduler) == [[float(i + 1)] for i in range(8)]
+    assert calls == [8, 4, 2, 2, 4, 2, 2]
+
+    calls.clear()
+    vectors = asyncio.run(embedder.aembed_packed(texts, 100, scheduler=scheduler))
+    assert vectors == [[float(i + 1)] for i in range(8)] and calls == [8, 4, 2, 2, 4, 2, 2]
+
+
+@pytest.mark.parametrize("error", [_bad_request(CONTEXT), _bad_request("'$.input' is invalid")])
+def test_embed_packed_raises_other_bad_requests_at_once(monkeypatch, error):
+    calls = _fake_api(monkeypatch, error, limit=0)
+    scheduler = EmbeddingScheduler(rpm=0, tpm=0)
+
+    with pytest.raises(openai.BadRequestError):
+        embedder.embed_packed(["a", "b", "c", "d"], 100, scheduler=scheduler)
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(embedder.aembed_packed(["a", "b", "c", "d"], 100, scheduler=scheduler))
+    assert calls == [4, 4]
+    assert scheduler.requests_sent == 2
+
+
+def test_request_limit_detection():
+    assert embedder._is_request_too_large(_bad_request(TOO_LARGE))
+    assert embedder._is_request_too_large(_bad_request("'$.input' is invalid: array too long"))
+    assert embedder._is_request_too_large(_bad_request("input must have at most 2048 items"))
+    assert not embedder._is_request_too_large(_bad_request(CONTEXT))
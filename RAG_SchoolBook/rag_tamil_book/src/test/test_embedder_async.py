@@ -0,0 +1,69 @@
+# tests/test_embedder_async.py
+
+import sys, os
+import asyncio
+
+import pytest
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from openai import AsyncOpenAI
+from bench.stub_embed_server import start_stub_server, stub_vector
+from ingest.embedder import aembed_texts
+from ingest import embed_scheduler
+from ingest.embed_scheduler import EmbeddingScheduler
+
+
+@pytest.fixture(autouse=True)
+def _byte_token_estimate(monkeypatch):
+    # tiktoken would download its BPE file; tests must not need the network
+    monkeypatch.setattr(embed_scheduler, "tiktoken", None)
+
+
+def _embed(base_url, texts, concurrency, cache=None):
+    async def go():
+        aclient = AsyncOpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        try:
+            return await aembed_texts(texts, cache=cache, scheduler=EmbeddingScheduler(rpm=0, tpm=0),
+                                      concurrency=concurrency, batch_size=4, aclient=aclient)
+        finally:
+            await aclient.close()
+    return asyncio.run(go())
+
+
+def test_aembed_texts_is_ordered_and_bounded():
+    server, base_url = start_stub_server(latency=0.05, dim=4)
+    texts = ["அ" * (i + 1) for i in range(40)]
+    try:
+        vectors = _embed(base_url, texts, concurrency=3)
+    finally:
+        server.shutdown()
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    # float32 round trip through the base64 encoding
+    assert all(abs(a - b) < 1e-6 for a, b in zip(vectors[7], stub_vector(texts[7], 4)))
+
+    stats = server.stats.as_dict()
+    assert stats["requests"] == 10
+    assert 1 < stats["max_in_flight"] <= 3
+
+
+def test_aembed_texts_uses_cache(tmp_path):
+    from ingest.embedding_cache import EmbeddingCache
+
+    server, base_url = start_stub_server(latency=0.01, dim=4)
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    texts = ["ஒன்று", "இரண்டு", "ஒன்று"]
+    try:
+        first = _embed(base_url, texts, concurrency=2, cache=cache)
+        second = _embed(base_url, texts, concurrency=2, cache=cache)
+    finally:
+        cache.close()
+        server.shutdown()
+
+    assert first == second and first[0] == first[2]
+    assert server.inputs == 2   # duplicate sent once, second run fully cached
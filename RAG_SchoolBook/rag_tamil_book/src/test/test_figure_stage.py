@@ -0,0 +1,71 @@
+# tests/test_figure_stage.py
+
+import sys, os
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("NEON_DATABASE_URL", "postgresql://stub/stub")
+os.environ.setdefault("DEEPSEEK_API_KEY", "stub")
+os.environ.setdefault("DEEPSEEK_OCR_URL", "http://127.0.0.1:8765/ocr")
+
+import ingest_to_pgvector
+from ingest_to_pgvector import IngestRun, figure_stage
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.batches = []
+
+    def embed_images(self, images):
+        self.batches.append(list(images))
+        return [[float(sum(im))] for im in images]
+
+
+def _page(num, crops):
+    """crops: (png bytes, sha256, dhash) per figure"""
+    return {"page": num, "text": "பாடம்", "blocks": [],
+            "images": [{"bbox": (0, 0, 10, 10), "ocr": {"text": "படம்"}, "png": png, "sha256": sha, "phash": dh}
+                       for png, sha, dh in crops]}
+
+
+def _stub_db(monkeypatch, written, fail=False):
+    def upsert(rows):
+        if fail:
+            raise RuntimeError("db down")
+        written.extend(rows)
+        return len(rows)
+    monkeypatch.setattr(ingest_to_pgvector, "upsert_figures", upsert)
+    monkeypatch.setattr(ingest_to_pgvector, "delete_stale_figures", lambda pages, keep: 0)
+
+
+def test_figure_stage_dedups_by_sha256_not_dhash(monkeypatch):
+    written = []
+    _stub_db(monkeypatch, written)
+    embedder = FakeEmbedder()
+    # "cat" and "car" share a dHash; the logo repeats byte for byte
+    pages = [_page(1, [(b"cat", "s-cat", 7), (b"logo", "s-logo", 1)]),
+             _page(2, [(b"car", "s-car", 7), (b"logo", "s-logo", 1)])]
+
+    out = list(figure_stage(iter(pages), IngestRun(figures=True), batch_size=64, embedder=embedder))
+
+    assert [p["page"] for p in out] == [1, 2]
+    assert sorted(embedder.batches[0]) == [b"car", b"cat", b"logo"]
+    vectors = {r[5]["sha256"]: r[6] for r in written}
+    assert vectors["s-cat"] != vectors["s-car"]
+    assert len(written) == 4
+    assert all("png" not in im and "phash" not in im for p in out for im in p["images"])
+
+
+def test_figure_stage_marks_pages_failed_when_the_write_fails(monkeypatch):
+    _stub_db(monkeypatch, [], fail=True)
+    run = IngestRun(figures=True)
+    pages = [_page(n, [(b"fig%d" % n, "s%d" % n, n)]) for n in (1, 2, 3)]
+
+    out = list(figure_stage(iter(pages), run, batch_size=2, embedder=FakeEmbedder()))
+
+    # text still flows on, but none of the pages may be recorded as done
+    assert [p["page"] for p in out] == [1, 2, 3]
+    assert run.failed_pages == {1, 2, 3}
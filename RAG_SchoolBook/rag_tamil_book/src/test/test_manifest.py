@@ -0,0 +1,81 @@
+# tests/test_manifest.py
+
+import sys, os
+import copy
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from ingest.manifest import (page_hash, page_changed, removed_pages, record_page, forget_page,
+                             load_manifest, save_manifest)
+
+
+def _page(num=3, text="தமிழ் பாடம்", image_text="படம்"):
+    return {"page": num, "text": text, "blocks": [],
+            "images": [{"bbox": (0, 0, 10, 10), "ocr": {"text": image_text}}]}
+
+
+def test_page_changed_follows_the_content_hash():
+    manifest = {"pages": {}}
+    page = _page()
+    assert page_changed(page, manifest)             # new page
+
+    record_page(manifest, 3, page_hash(page), ["c1", "c2"])
+    assert not page_changed(copy.deepcopy(page), manifest)
+    assert page_changed(_page(text="தமிழ் பாடம் 2"), manifest)
+    assert page_changed(_page(image_text="வேறு படம்"), manifest)
+
+    forget_page(manifest, 3)
+    assert page_changed(page, manifest)
+
+
+def test_page_hash_covers_image_crops():
+    page = _page()
+    page["images"][0]["sha256"] = "a" * 64
+    redrawn = copy.deepcopy(page)
+    redrawn["images"][0]["sha256"] = "b" * 64
+    assert page_hash(page) != page_hash(redrawn)
+
+    # --figures only adds the PNG bytes and perceptual hash, which are not hashed
+    before = page_hash(page)
+    page["images"][0].update(png=b"...", phash=123)
+    assert page_hash(page) == before
+
+
+def test_page_changed_with_figures():
+    manifest = {"pages": {}}
+    page = _page()
+    text_only = _page(num=4)
+    text_only["images"] = []
+    record_page(manifest, 3, page_hash(page), ["c1"])
+    record_page(manifest, 4, page_hash(text_only), ["c2"])
+
+    # recorded by a run without --figures: only pages with images need the figure index
+    assert not page_changed(page, manifest)
+    assert page_changed(page, manifest, figures=True)
+    assert not page_changed(text_only, manifest, figures=True)
+
+    record_page(manifest, 3, page_hash(page), ["c1"], figures=True)
+    assert not page_changed(page, manifest, figures=True)
+    assert not page_changed(page, manifest)
+    # re-recorded without --figures: its figures may be stale
+    record_page(manifest, 3, page_hash(page), ["c1"])
+    assert page_changed(page, manifest, figures=True)
+
+
+def test_removed_pages():
+    manifest = {"pages": {"1": {}, "9": {}, "10": {}, "12": {}}}
+    assert removed_pages(9, manifest) == [10, 12]
+    assert removed_pages(20, manifest) == []
+    assert removed_pages(5, {"pages": {}}) == []
+
+
+def test_manifest_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "data" / "manifest.json")
+    assert load_manifest(path) == {"pdf": None, "pages": {}}
+
+    manifest = {"pdf": "book.pdf", "pages": {}}
+    record_page(manifest, 7, "h7", ["x", "y"])
+    save_manifest(manifest, path)
+    assert load_manifest(path) == {"pdf": "book.pdf", "pages": {"7": {"hash": "h7", "chunk_ids": ["x", "y"]}}}
@@ -0,0 +1,80 @@
+# tests/test_ocr_client.py
+
+import sys, os
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "stub")
+os.environ.setdefault("DEEPSEEK_OCR_URL", "http://127.0.0.1:8765/ocr")
+
+from bench.stub_ocr_server import start_stub_server
+from ingest.ocr_deepseek import DeepSeekOCRClient
+
+
+def test_ocr_many_is_ordered_and_bounded():
+    server, url = start_stub_server(latency=0.05)
+    client = DeepSeekOCRClient(url=url, api_key="stub", max_in_flight=4, cache=None)
+    # growing payloads -> growing request sizes, so order is checkable
+    images = [b"x" * (100 * (i + 1)) for i in range(20)]
+    try:
+        results = client.ocr_many(images, return_layout=True)
+    finally:
+        client.close()
+        server.shutdown()
+
+    sizes = [r["request_bytes"] for r in results]
+    assert sizes == sorted(sizes) and len(set(sizes)) == len(images)
+    assert all(isinstance(r["blocks"], list) for r in results)
+
+    stats = server.stats.as_dict()
+    assert stats["requests"] == len(images)
+    assert 1 < stats["max_in_flight"] <= 4
+
+
+def test_ocr_many_keeps_failures_in_place():
+    # nothing listens on the discard port, so every call fails
+    client = DeepSeekOCRClient(url="http://127.0.0.1:9/ocr", api_key="stub", timeout=1, cache=None)
+    try:
+        results = client.ocr_many([b"a", b"b"])
+    finally:
+        client.close()
+
+    assert len(results) == 2
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cache_skips_repeat_calls(tmp_path):
+    from ingest.ocr_cache import OCRCache
+
+    server, url = start_stub_server(latency=0.0)
+    cache = OCRCache(path=str(tmp_path / "ocr.sqlite"))
+    client = DeepSeekOCRClient(url=url, api_key="stub", cache=cache)
+    try:
+        first = client.ocr_many([b"page-1", b"page-2"], return_layout=True)
+        again = client.ocr_many([b"page-1", b"page-2"], return_layout=True)
+        other_flag = client.ocr(b"page-1", return_layout=False)
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert again == first
+    assert other_flag["image_sha1"]
+    assert client.api_calls == 3
+    assert server.stats.as_dict()["requests"] == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from ingest.ocr_cache import OCRCache, cache_key
+
+    cache = OCRCache(path=str(tmp_path / "ocr.sqlite"), max_bytes=250)
+    keys = [cache_key(f"img-{i}".encode(), "ta", True) for i in range(5)]
+    for k in keys:
+        cache.put(k, {"text": "x" * 80, "blocks": []})
+    cache.get(keys[0])  # touch the oldest entry so it survives
+    cache.evict()
+
+    assert cache.stats()["bytes"] <= 250
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
@@ -0,0 +1,164 @@
+# tests/test_pool.py
+
+import sys, os
+import time
+import threading
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from db.pool import ConnectionPool, PoolTimeout
+
+IDLE = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+INTRANS = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.executed.append(sql)
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.autocommit = False
+        self.status = IDLE
+        self.executed = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnect:
+    def __init__(self):
+        self.made = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        conn = FakeConn()
+        with self._lock:
+            self.made.append(conn)
+        return conn
+
+
+def test_pool_respects_max_size_and_timeout():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, min_size=0, max_size=2, timeout=0.2)
+    a, b = pool.getconn(), pool.getconn()
+    assert a is not b and len(connect.made) == 2
+
+    t0 = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert time.monotonic() - t0 >= 0.2
+
+    # a waiter gets the connection as soon as one is returned
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.putconn(a)
+    waiter.join(1)
+    assert got == [a]
+    assert pool.status()["size"] == 2 and len(connect.made) == 2
+    assert pool.status()["waits"] >= 2
+
+
+def test_pool_reuses_and_rolls_back_returned_connections():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, min_size=1, max_size=3)
+    with pool.connection() as conn:
+        conn.status = INTRANS          # left a transaction open
+    assert conn.rollbacks == 1
+    with pool.connection(autocommit=True) as again:
+        assert again is conn and again.autocommit
+    assert pool.status()["connects"] == 1
+
+
+def test_pool_discards_connection_on_operational_error():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, min_size=1, max_size=1)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            raise psycopg2.OperationalError("connection reset")
+    assert conn.closed
+    assert pool.status()["size"] == 0 and pool.status()["discarded"] == 1
+
+    # other errors return the connection to the pool
+    with pytest.raises(ValueError):
+        with pool.connection() as fresh:
+            raise ValueError("bad input")
+    assert fresh is not conn and not fresh.closed
+    assert pool.status()["idle"] == 1 and pool.status()["connects"] == 2
+
+
+def test_pool_reconnects_after_failed_ping():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, min_size=1, max_size=1, check_after=0.0)
+    stale = connect.made[0]
+    stale.broken = True
+
+    conn = pool.getconn()
+    assert conn is not stale and stale.closed
+    assert pool.status()["reconnects"] == 1 and pool.status()["connects"] == 2
+    pool.putconn(conn)
+
+    # a healthy connection passes the ping and is reused
+    assert pool.getconn() is conn and conn.executed == ["SELECT 1;"]
+
+
+def test_pool_counters_under_concurrency():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, min_size=0, max_size=4, timeout=5, check_after=0.0)
+
+    def work():
+        for _ in range(200):
+            with pool.connection():
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    status = pool.status()
+    assert status["checkouts"] == 1600
+    assert status["connects"] == len(connect.made) <= 4
+    assert status["in_use"] == 0
+
+
+def test_pool_closeall_rejects_checkouts():
+    pool = ConnectionPool(FakeConnect(), min_size=2, max_size=2)
+    pool.closeall()
+    assert pool.status()["size"] == 0
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
@@ -0,0 +1,52 @@
+# tests/test_profiling.py
+
+import sys, os
+import time
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from ingest.profiling import Profiler
+
+
+def test_profiler_records_nothing_until_started():
+    prof = Profiler()
+    with prof.stage("pg.query") as rec:
+        rec.items = 5
+    assert prof.report()["stages"] == {}
+
+    prof.start()
+    with prof.stage("pdf.page", items=1):
+        pass
+    assert prof.report()["stages"]["pdf.page"]["calls"] == 1
+
+
+def test_nested_stage_time_is_not_counted_twice():
+    prof = Profiler()
+    prof.start()
+    with prof.stage("pdf.page"):
+        time.sleep(0.05)
+        with prof.stage("pdf.render"):
+            time.sleep(0.2)
+
+    stages = prof.report()["stages"]
+    page, render = stages["pdf.page"], stages["pdf.render"]
+    assert 0.2 <= render["busy_s"] < 0.3
+    assert 0.05 <= page["busy_s"] < 0.15
+    # the outer call's span still covers the inner one
+    assert page["span_s"] >= render["span_s"]
+
+
+def test_snapshot_merge_keeps_counts():
+    worker, parent = Profiler(), Profiler()
+    worker.start()
+    parent.start()
+    for _ in range(3):
+        with worker.stage("ocr.request", bytes_sent=10, items=1):
+            pass
+    with parent.stage("ocr.request", bytes_sent=5, items=1):
+        pass
+    parent.merge(worker.snapshot())
+    s = parent.report()["stages"]["ocr.request"]
+    assert (s["calls"], s["bytes_sent"], s["items"]) == (4, 35, 4)
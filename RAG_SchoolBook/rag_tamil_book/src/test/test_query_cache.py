@@ -0,0 +1,40 @@
+# tests/test_query_cache.py
+
+import sys, os
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from rag import query_cache
+from rag.query_cache import QueryEmbeddingCache, embed_questions
+
+
+def test_embed_questions_keys_on_normalized_text_but_embeds_the_question(monkeypatch):
+    sent = []
+
+    def embed_texts(texts, model=None, cache=None):
+        assert cache is None            # no disk layer by default
+        sent.extend(texts)
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(query_cache, "embed_texts", embed_texts)
+    monkeypatch.setattr(query_cache, "_query_cache", QueryEmbeddingCache(max_size=8))
+
+    first = embed_questions(["What is  Photosynthesis?"])
+    again = embed_questions(["what is photosynthesis?", "ஒளிச்சேர்க்கை என்றால் என்ன?"])
+
+    # the API sees the question as plain retrieval embeds it, not casefolded
+    assert sent == ["What is  Photosynthesis?", "ஒளிச்சேர்க்கை என்றால் என்ன?"]
+    assert again[0] == first[0]
+    assert query_cache.get_query_cache().stats()["hits"] == 1
+
+
+def test_lru_evicts_oldest():
+    cache = QueryEmbeddingCache(max_size=2)
+    for key in ("a", "b", "c"):
+        cache.put("m", key, [1.0])
+    assert cache.get("m", "a") is None and cache.get("m", "c") == [1.0]
+    assert cache.stats()["entries"] == 2
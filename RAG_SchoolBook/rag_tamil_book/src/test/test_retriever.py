@@ -0,0 +1,39 @@
+# tests/test_retriever.py
+
+import sys, os
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+import pytest
+
+retriever = pytest.importorskip("rag.retriever")
+
+VECTOR_ROW = ("c1", "text", 3, "TamilBook", {"lang": "ta"}, 0.12)
+HYBRID_ROW = ("c2", "text", 4, "TamilBook", {}, None, 0.031)
+
+
+@pytest.fixture
+def stub_search(monkeypatch):
+    monkeypatch.setattr(retriever, "embed_question", lambda q: [0.0])
+    monkeypatch.setattr(retriever, "embed_questions", lambda qs: [[0.0]] * len(qs))
+    monkeypatch.setattr(retriever, "query_similar", lambda vec, top_k: [VECTOR_ROW])
+    monkeypatch.setattr(retriever, "query_similar_many", lambda vecs, top_k: [[VECTOR_ROW] for _ in vecs])
+    monkeypatch.setattr(retriever, "query_hybrid", lambda q, vec, top_k: [HYBRID_ROW])
+
+
+def test_vector_results_have_no_score(stub_search):
+    expected = {"chunk_id": "c1", "content": "text", "page": 3, "source": "TamilBook",
+                "metadata": {"lang": "ta"}, "distance": 0.12}
+    assert retriever.retrieve("q", mode="vector") == [expected]
+    assert retriever.retrieve_many(["a", "b"], mode="vector") == [[expected], [expected]]
+
+
+def test_hybrid_results_add_score(stub_search):
+    expected = {"chunk_id": "c2", "content": "text", "page": 4, "source": "TamilBook",
+                "metadata": {}, "distance": None, "score": 0.031}
+    assert retriever.retrieve("q", mode="hybrid") == [expected]
+    assert retriever.retrieve_many(["a"], mode="hybrid") == [[expected]]
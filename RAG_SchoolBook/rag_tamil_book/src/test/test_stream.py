@@ -0,0 +1,91 @@
+# tests/test_stream.py
+
+import sys, os
+import time
+import itertools
+import threading
+
+import pytest
+
+# Add src/ to Python path so imports work
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from ingest.stream import run_stages
+
+
+def _double(items):
+    for x in items:
+        yield 2 * x
+
+
+def _pairs(items):
+    batch = []
+    for x in items:
+        batch.append(x)
+        if len(batch) == 2:
+            yield tuple(batch)
+            batch = []
+    if batch:
+        yield tuple(batch)
+
+
+def test_run_stages_keeps_order():
+    assert run_stages(range(50), [_double, _double], maxsize=2) == [4 * x for x in range(50)]
+    # stages may emit fewer items than they receive
+    assert run_stages(range(5), [_double, _pairs]) == [(0, 2), (4, 6), (8,)]
+    assert run_stages([], [_double]) == []
+
+
+def test_run_stages_applies_back_pressure():
+    produced = [0]
+
+    def source():
+        for x in range(1000):
+            produced[0] += 1
+            yield x
+
+    seen = []
+
+    def slow(items):
+        for x in items:
+            if x == 0:
+                time.sleep(0.3)     # everything upstream fills its queue meanwhile
+                seen.append(produced[0])
+            yield x
+
+    assert len(run_stages(source(), [slow], maxsize=2)) == 1000
+    # one item in the slow stage, a full queue, one waiting in put()
+    assert seen[0] <= 5
+
+
+def test_first_error_stops_every_stage():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from itertools.count()
+        finally:
+            closed.set()
+
+    def boom(items):
+        for x in items:
+            if x == 10:
+                raise ValueError("stage failed")
+            yield x
+
+    after = []
+
+    def sink(items):
+        for x in items:
+            after.append(x)
+            yield x
+
+    t0 = time.perf_counter()
+    with pytest.raises(ValueError, match="stage failed"):
+        run_stages(source(), [_double, boom, sink], maxsize=2)
+
+    assert time.perf_counter() - t0 < 5
+    assert closed.is_set()
+    assert 10 not in after
+    assert not [t for t in threading.enumerate() if t.name.startswith("stage-")]